@@ -0,0 +1,246 @@
+# 车队运营指标：车辆/司机利用率、空闲间隔、每日任务数、按要求送货日期的准时率、滞箱/滞期风险
+#
+# 按自然日分区计算，区间结果由各天的列（占用秒数、行程数、任务数、空闲间隔）逐列相加得到。
+# 今天之前的分区计算一次后缓存：
+# - 车队分区（行程/任务）在行程或任务变更涉及该天时失效（通过 CHANGE_LOG 监听，记录每条行程/任务落在哪几天）；
+# - 容器分区（准时率、风险）在容器数据版本变化时失效。
+# 今天及以后的分区每次重新计算；全量重新加载数据（VERSIONS['loads'] 变化）时清空缓存。
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from app import database
+from app.changelog import Change
+from app.utils import Str2Date
+
+# 单次查询的最大天数
+MAX_DAYS = 366
+# 返回的风险容器明细条数上限（按截止日期排序，计数不受影响）
+MAX_RISK_ITEMS = 1000
+
+# 车队分区中每个车辆/司机的列：占用秒数、行程数、任务数、空闲间隔数、空闲秒数、最长空闲秒数
+BUSY, TRIPS, TASKS, GAPS, GAP_SECONDS, MAX_GAP = range(6)
+
+
+def _group_stats(trips: List[dict], day_start: datetime, day_end: datetime) -> list:
+    """一辆车（或一名司机）当天的统计列；trips 为与当天重叠的行程，按开始时间排序"""
+    row = [0, 0, 0, 0, 0, 0]
+    merged: List[list] = []
+    for trip_data in trips:
+        start = max(trip_data['startTime'], day_start)
+        end = min(trip_data['endTime'], day_end)
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+        if trip_data['startTime'] >= day_start:
+            row[TRIPS] += 1
+            row[TASKS] += database.count_trip_tasks(trip_data['id'])
+    for i, (start, end) in enumerate(merged):
+        row[BUSY] += int((end - start).total_seconds())
+        if i:
+            gap = int((start - merged[i - 1][1]).total_seconds())
+            row[GAPS] += 1
+            row[GAP_SECONDS] += gap
+            row[MAX_GAP] = max(row[MAX_GAP], gap)
+    return row
+
+
+def _deadline_passed(actual: str, planned: str, deadline: str) -> Optional[bool]:
+    """实际日期优先，否则用计划日期与截止日期比较（按 Str2Date 解析后比较日期，兼容 d/m/Y 等格式）；都没有时返回 None"""
+    done = Str2Date(actual.strip() or planned.strip())
+    limit = Str2Date(deadline.strip())
+    if done is None or limit is None:
+        return None
+    return done > limit
+
+
+class Analytics:
+    def __init__(self):
+        self.fleet: Dict[date, dict] = {}
+        self.containers: Dict[date, Tuple[int, dict]] = {}
+        # (kind, id) -> 该行程/任务计入过的分区日期
+        self.record_days: Dict[Tuple[str, str], Set[date]] = {}
+        self.loads = database.VERSIONS['loads']
+        self.hits = 0
+        self.computed = 0
+        database.CHANGE_LOG.subscribe(self._on_change)
+
+    def clear(self):
+        self.fleet.clear()
+        self.containers.clear()
+        self.record_days.clear()
+
+    def _invalidate(self, days: Set[date]):
+        for day in days:
+            self.fleet.pop(day, None)
+
+    def _on_change(self, change: Change):
+        if change.kind == 'vehicle':
+            return
+        # 修改前计入过的分区
+        days = self.record_days.pop((change.kind, change.record_id), None)
+        if days:
+            self._invalidate(days)
+        # 修改后所在的分区
+        if change.op == 'delete':
+            return
+        if change.kind == 'task':
+            task_data = database.get_task(change.record_id)
+            trip_data = database.get_trip(task_data['tripId']) if task_data else None
+            if trip_data is not None:
+                self._invalidate({trip_data['startTime'].date()})
+        else:
+            trip_data = database.get_trip(change.record_id)
+            if trip_data is not None:
+                self._invalidate(_days_between(trip_data['startTime'], trip_data['endTime']))
+
+    def _remember(self, kind: str, record_id: str, day: date):
+        self.record_days.setdefault((kind, record_id), set()).add(day)
+
+    def _fleet_day(self, day: date) -> dict:
+        """某天的车辆、司机统计列"""
+        day_start = datetime.combine(day, datetime.min.time())
+        day_end = day_start + timedelta(days=1)
+        vehicles = {}
+        for vehicle_id in database.get_vehicle_ids():
+            trips = database.TRIP_INDEX.query(vehicle_id, day_start, day_end)
+            if trips:
+                vehicles[vehicle_id] = _group_stats(trips, day_start, day_end)
+                for trip_data in trips:
+                    self._remember('trip', trip_data['id'], day)
+                    if trip_data['startTime'] >= day_start:
+                        for task_data in database.get_trip_tasks(trip_data['id']):
+                            self._remember('task', task_data['id'], day)
+        drivers = {}
+        for driver_id in list(database.DRIVER_TRIP_INDEX.vehicles):
+            trips = database.DRIVER_TRIP_INDEX.query(driver_id, day_start, day_end)
+            if trips:
+                drivers[driver_id] = _group_stats(trips, day_start, day_end)
+        return {'vehicles': vehicles, 'drivers': drivers}
+
+    def _container_day(self, day: date) -> dict:
+        """某天到期的送货准时情况和滞箱（Last Free）/ 滞期（Last Dention）风险"""
+        deliveries = {'due': 0, 'onTime': 0, 'late': 0, 'unplanned': 0}
+        for c in database.get_containers_by_date('Request Deliver Date', day):
+            deliveries['due'] += 1
+            late = _deadline_passed(c.deliverDate, c.planDeliverDate, c.RequestDeliverDate)
+            deliveries['unplanned' if late is None else 'late' if late else 'onTime'] += 1
+
+        risks = []
+        for field, kind, actual, planned, deadline in (
+            ('Last Free', 'demurrage', 'pickUpDate', 'planPickUpDate', 'lastFree'),
+            ('Last Dention', 'detention', 'dehireDate', 'planDehireDate', 'lastDention'),
+        ):
+            for c in database.get_containers_by_date(field, day):
+                if getattr(c, actual).strip():
+                    continue  # 已完成
+                if _deadline_passed('', getattr(c, planned), getattr(c, deadline)) is not False:
+                    risks.append({
+                        'ctnNumber': c.ctnNumber,
+                        'type': kind,
+                        'deadline': getattr(c, deadline),
+                        'planned': getattr(c, planned).strip() or None,
+                    })
+        return {'deliveries': deliveries, 'risks': risks}
+
+    def _partitions(self, day: date, today: date) -> Tuple[dict, dict]:
+        cacheable = day < today
+        fleet = self.fleet.get(day) if cacheable else None
+        if fleet is None:
+            fleet = self._fleet_day(day)
+            self.computed += 1
+            if cacheable:
+                self.fleet[day] = fleet
+        else:
+            self.hits += 1
+
+        version = database.VERSIONS['containers']
+        cached = self.containers.get(day) if cacheable else None
+        if cached is not None and cached[0] == version:
+            containers = cached[1]
+        else:
+            containers = self._container_day(day)
+            if cacheable:
+                self.containers[day] = (version, containers)
+        return fleet, containers
+
+    def kpis(self, start_date: date, end_date: date) -> dict:
+        """start_date 到 end_date（含）的指标"""
+        if database.VERSIONS['loads'] != self.loads:
+            self.clear()
+            self.loads = database.VERSIONS['loads']
+
+        today = date.today()
+        days = (end_date - start_date).days + 1
+        hits, computed = self.hits, self.computed
+        vehicles: Dict[str, list] = {}
+        drivers: Dict[str, list] = {}
+        deliveries = {'due': 0, 'onTime': 0, 'late': 0, 'unplanned': 0}
+        risks = []
+        for offset in range(days):
+            fleet, containers = self._partitions(start_date + timedelta(days=offset), today)
+            for totals, rows in ((vehicles, fleet['vehicles']), (drivers, fleet['drivers'])):
+                for key, row in rows.items():
+                    total = totals.get(key)
+                    if total is None:
+                        totals[key] = list(row)
+                        continue
+                    for column in (BUSY, TRIPS, TASKS, GAPS, GAP_SECONDS):
+                        total[column] += row[column]
+                    total[MAX_GAP] = max(total[MAX_GAP], row[MAX_GAP])
+            for key, value in containers['deliveries'].items():
+                deliveries[key] += value
+            risks.extend(containers['risks'])
+
+        deliveries['onTimeRate'] = round(deliveries['onTime'] / deliveries['due'], 4) if deliveries['due'] else None
+        vehicle_rows = []
+        for vehicle_id in database.get_vehicle_ids():
+            vehicle_data = database.get_vehicle(vehicle_id)
+            vehicle_rows.append({
+                'id': vehicle_id,
+                'plateNumber': vehicle_data['plateNumber'],
+                **_summary(vehicles.get(vehicle_id, [0] * 6), days),
+            })
+        return {
+            'startDate': start_date.isoformat(),
+            'endDate': end_date.isoformat(),
+            'days': days,
+            'vehicles': vehicle_rows,
+            'drivers': [{'id': driver_id, **_summary(row, days)} for driver_id, row in sorted(drivers.items())],
+            'deliveries': deliveries,
+            'risk': {
+                'demurrage': sum(1 for risk in risks if risk['type'] == 'demurrage'),
+                'detention': sum(1 for risk in risks if risk['type'] == 'detention'),
+                'containers': sorted(risks, key=lambda risk: risk['deadline'])[:MAX_RISK_ITEMS],
+            },
+            'cache': {'cachedDays': self.hits - hits, 'computedDays': self.computed - computed},
+        }
+
+
+def _days_between(start: datetime, end: datetime) -> Set[date]:
+    """[start, end) 覆盖的日期"""
+    last = (end - timedelta(microseconds=1)).date() if end > start else start.date()
+    return {start.date() + timedelta(days=i) for i in range((last - start.date()).days + 1)}
+
+
+def _summary(row: list, days: int) -> dict:
+    return {
+        'busyHours': round(row[BUSY] / 3600, 2),
+        # 占区间总时长的百分比
+        'utilization': round(row[BUSY] * 100 / (days * 86400), 1),
+        'trips': row[TRIPS],
+        'tasks': row[TASKS],
+        'tasksPerDay': round(row[TASKS] / days, 2),
+        'idleGaps': {
+            'count': row[GAPS],
+            'hours': round(row[GAP_SECONDS] / 3600, 2),
+            'maxHours': round(row[MAX_GAP] / 3600, 2),
+        },
+    }
+
+
+ANALYTICS = Analytics()
+
+
+def get_kpis(start_date: date, end_date: date) -> dict:
+    return ANALYTICS.kpis(start_date, end_date)
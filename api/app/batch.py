@@ -0,0 +1,290 @@
+# 行程/任务批量操作
+#
+# 整批先在暂存视图上按顺序校验（车辆存在、满载、每个行程最多 2 个任务等），
+# 全部通过后才依次写入；任一操作校验失败时整批不写入，写入中途出错时撤销已写入的操作。
+# reject 冲突模式下，与其他行程时间重叠的新建/修改也视为校验失败。
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app import database
+from app.conflicts import CONFLICT_MODE, check_trip_change, find_trip_conflicts
+from app.models import BatchOperation, Task, Trip
+from app.utils import create_task_from_container
+
+logger = logging.getLogger(__name__)
+
+# 每个行程最多的任务数（与 /api/gantt/task 一致）
+MAX_TRIP_TASKS = 2
+
+# 可更新的字段
+TRIP_UPDATE_FIELDS = ('vehicleId', 'driverId', 'startTime', 'endTime', 'fullLoad')
+TASK_UPDATE_FIELDS = tuple(name for name in Task.model_fields if name != 'id')
+
+
+class BatchError(ValueError):
+    """单个操作校验失败"""
+
+
+def _validation_message(e: ValidationError) -> str:
+    return '; '.join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+
+
+class _Staging:
+    """本批操作生效后的数据视图（未改动的记录直接读数据库）"""
+
+    def __init__(self):
+        self.trips: Dict[str, Optional[dict]] = {}
+        self.tasks: Dict[str, Optional[dict]] = {}
+        self.task_counts: Dict[str, int] = {}
+        self.refs: Dict[str, str] = {}
+
+    def trip(self, trip_id: str) -> Optional[dict]:
+        if trip_id in self.trips:
+            return self.trips[trip_id]
+        return database.get_trip(trip_id)
+
+    def task(self, task_id: str) -> Optional[dict]:
+        task_data = self.tasks[task_id] if task_id in self.tasks else database.get_task(task_id)
+        # 所属行程在本批中被删除时，任务随之删除
+        if task_data is not None and self.trip(task_data['tripId']) is None:
+            return None
+        return task_data
+
+    def count(self, trip_id: str) -> int:
+        if trip_id not in self.task_counts:
+            self.task_counts[trip_id] = database.count_trip_tasks(trip_id)
+        return self.task_counts[trip_id]
+
+    def resolve_trip(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """把 tripRef 换成同批新建行程的 ID"""
+        ref = fields.pop('tripRef', None)
+        if ref is not None:
+            if ref not in self.refs:
+                raise BatchError(f'未知的行程引用: {ref}')
+            fields['tripId'] = self.refs[ref]
+        return fields
+
+
+def _check_fields(fields: Dict[str, Any], allowed: Tuple[str, ...]):
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise BatchError(f"不支持的字段: {', '.join(unknown)}")
+
+
+def _naive(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=None) if dt.tzinfo is not None else dt
+
+
+def _check_trip(trip: Trip):
+    # 存储中的时间不带时区，请求中的时间可能带时区，先统一再比较
+    trip.startTime = _naive(trip.startTime)
+    trip.endTime = _naive(trip.endTime)
+    if database.get_vehicle(trip.vehicleId) is None:
+        raise BatchError('车辆不存在')
+    if trip.startTime >= trip.endTime:
+        raise BatchError('开始时间必须早于结束时间')
+
+
+def _overlaps(record: dict, other: dict) -> bool:
+    same_driver = record.get('driverId') is not None and other.get('driverId') == record['driverId']
+    return (other['vehicleId'] == record['vehicleId'] or same_driver) \
+        and other['startTime'] < record['endTime'] and record['startTime'] < other['endTime']
+
+
+def _check_conflicts(staging: _Staging, trip_id: str, record: dict):
+    """reject 模式下检查暂存后的行程与其他行程（数据库中未被本批改动的、以及本批暂存的）是否重叠"""
+    if CONFLICT_MODE != 'reject':
+        return
+    others = [conflict['otherTripId'] for conflict in find_trip_conflicts(
+        trip_id, record['vehicleId'], record.get('driverId'), record['startTime'], record['endTime'],
+        ignore=staging.trips
+    )]
+    others.extend(
+        other_id for other_id, other in staging.trips.items()
+        if other is not None and other_id != trip_id and _overlaps(record, other)
+    )
+    if others:
+        raise BatchError(f"行程时间冲突: {', '.join(dict.fromkeys(others))}")
+
+
+def _check_task_target(staging: _Staging, trip_id: Optional[str]):
+    trip = staging.trip(trip_id) if trip_id else None
+    if trip is None:
+        raise BatchError('行程不存在')
+    if trip['fullLoad'] == 'Y':
+        raise BatchError('行程已满载，无法添加任务')
+    if staging.count(trip_id) >= MAX_TRIP_TASKS:
+        raise BatchError('行程任务数量已达上限')
+
+
+def _stage_trip(staging: _Staging, operation: BatchOperation) -> tuple:
+    fields = dict(operation.fields)
+    if operation.op == 'create':
+        trip_id = operation.id or str(uuid.uuid4())
+        if staging.trip(trip_id) is not None:
+            raise BatchError('行程已存在')
+        _check_fields(fields, TRIP_UPDATE_FIELDS)
+        trip = Trip(id=trip_id, **fields)
+        _check_trip(trip)
+        record = trip.dict()
+        record.pop('tasks')
+        _check_conflicts(staging, trip_id, record)
+        staging.trips[trip_id] = record
+        staging.task_counts[trip_id] = 0
+        if operation.ref:
+            staging.refs[operation.ref] = trip_id
+        return 'create', 'trip', trip_id, record
+
+    current = staging.trip(operation.id) if operation.id else None
+    if current is None:
+        raise BatchError('行程不存在')
+    if operation.op == 'delete':
+        staging.trips[operation.id] = None
+        staging.task_counts[operation.id] = 0
+        return 'delete', 'trip', operation.id, None
+
+    _check_fields(fields, TRIP_UPDATE_FIELDS)
+    trip = Trip(**{**current, **fields})
+    _check_trip(trip)
+    changes = {name: getattr(trip, name) for name in fields}
+    record = {**current, **changes}
+    _check_conflicts(staging, operation.id, record)
+    staging.trips[operation.id] = record
+    return 'update', 'trip', operation.id, changes
+
+
+def _stage_task(staging: _Staging, operation: BatchOperation) -> tuple:
+    fields = staging.resolve_trip(dict(operation.fields))
+    if operation.op == 'create':
+        task_id = operation.id or str(uuid.uuid4())
+        if staging.task(task_id) is not None:
+            raise BatchError('任务已存在')
+        _check_fields(fields, TASK_UPDATE_FIELDS)
+        trip_id = fields.get('tripId')
+        _check_task_target(staging, trip_id)
+
+        # 未给出计划时间时与所属行程（可能是同批新建的）一致
+        trip = staging.trip(trip_id)
+        plan_start, plan_end = trip['startTime'], trip['endTime']
+        record = {'planStart': plan_start, 'planEnd': plan_end, 'startAddress': '', 'endAddress': ''}
+        if fields.get('containerNo') and 'taskType' in fields:
+            # 与 /api/orders/plan-to-task 相同：地址、箱重等默认值取自容器
+            container = database.get_container_by_number(fields['containerNo'])
+            if container is None:
+                raise BatchError('容器不存在')
+            record = create_task_from_container(container, fields['taskType'], trip_id=trip_id,
+                                                plan_start=plan_start, plan_end=plan_end)
+        record.update(fields)
+        record['id'] = task_id
+        task = Task(**record)
+
+        record = task.dict()
+        staging.tasks[task_id] = record
+        staging.task_counts[trip_id] = staging.count(trip_id) + 1
+        return 'create', 'task', task_id, record
+
+    current = staging.task(operation.id) if operation.id else None
+    if current is None:
+        raise BatchError('任务不存在')
+    if operation.op == 'delete':
+        staging.tasks[operation.id] = None
+        staging.task_counts[current['tripId']] = staging.count(current['tripId']) - 1
+        return 'delete', 'task', operation.id, None
+
+    _check_fields(fields, TASK_UPDATE_FIELDS)
+    new_trip_id = fields.get('tripId', current['tripId'])
+    if new_trip_id != current['tripId']:
+        _check_task_target(staging, new_trip_id)
+        staging.task_counts[current['tripId']] = staging.count(current['tripId']) - 1
+        staging.task_counts[new_trip_id] = staging.count(new_trip_id) + 1
+    task = Task(**{**current, **fields})
+    changes = {name: getattr(task, name) for name in fields}
+    staging.tasks[operation.id] = {**current, **changes}
+    return 'update', 'task', operation.id, changes
+
+
+def validate_batch(operations: List[BatchOperation]) -> Tuple[List[tuple], List[dict], Dict[str, str]]:
+    """按顺序校验全部操作，返回 (执行计划, 错误列表 [{index, message}], 引用名 -> 行程ID)"""
+    staging = _Staging()
+    plan = []
+    errors = []
+    for index, operation in enumerate(operations):
+        try:
+            stage = _stage_trip if operation.kind == 'trip' else _stage_task
+            plan.append(stage(staging, operation))
+        except ValidationError as e:
+            errors.append({'index': index, 'message': _validation_message(e)})
+        except BatchError as e:
+            errors.append({'index': index, 'message': str(e)})
+    return plan, errors, staging.refs
+
+
+def batch_conflicts(results: List[dict]) -> List[dict]:
+    """批量写入后，本批新建/修改的行程与其他行程的重叠（flag 模式下随结果返回）
+
+    两个行程都在本批中写入时，同一重叠从两边各查到一次，按 (类型, 无序行程对) 只保留一条。
+    """
+    conflicts = {}
+    for result in results:
+        if result['kind'] == 'trip' and result['op'] != 'delete':
+            for conflict in check_trip_change(result['id'], {}):
+                key = (conflict['type'], frozenset((conflict['tripId'], conflict['otherTripId'])))
+                conflicts.setdefault(key, conflict)
+    return list(conflicts.values())
+
+
+def _undo_step(op: str, kind: str, record_id: str, data: Optional[dict]) -> Callable[[], Any]:
+    """执行操作前记下恢复所需的原数据，返回撤销该操作的函数"""
+    if op == 'create':
+        return lambda: database.delete_trip(record_id) if kind == 'trip' else database.delete_task(record_id)
+    if kind == 'trip':
+        old = dict(database.get_trip(record_id))
+        if op == 'update':
+            return lambda: database.update_trip(record_id, {name: old[name] for name in data})
+        # 删除行程会连带删除其任务
+        tasks = [dict(task_data) for task_data in database.get_trip_tasks(record_id)]
+
+        def restore_trip():
+            database.add_trip(old)
+            for task_data in tasks:
+                database.add_task(task_data)
+        return restore_trip
+    old = dict(database.get_task(record_id))
+    if op == 'update':
+        return lambda: database.update_task(record_id, {name: old[name] for name in data})
+    return lambda: database.add_task(old)
+
+
+def apply_batch(plan: List[tuple]) -> List[dict]:
+    """依次执行已校验的计划，返回每个操作的结果
+
+    执行中途出错时按相反顺序撤销已执行的操作（内存和存储一起恢复）后再抛出，整批不生效。
+    """
+    results = []
+    undo = []
+    try:
+        for op, kind, record_id, data in plan:
+            undo.append(_undo_step(op, kind, record_id, data))
+            if op == 'create':
+                model = database.add_trip(data) if kind == 'trip' else database.add_task(data)
+                data = model.dict()
+            elif op == 'update':
+                record = database.update_trip(record_id, data) if kind == 'trip' else database.update_task(record_id, data)
+                data = dict(record)
+            elif kind == 'trip':
+                database.delete_trip(record_id)
+            else:
+                database.delete_task(record_id)
+            results.append({'op': op, 'kind': kind, 'id': record_id, 'data': data})
+    except BaseException:
+        for step in reversed(undo):
+            try:
+                step()
+            except Exception:
+                logger.exception('撤销批量操作失败')
+        raise
+    return results
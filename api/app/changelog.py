@@ -0,0 +1,71 @@
+# 数据变更日志
+from collections import deque
+from typing import Callable, Deque, Dict, List, Literal, NamedTuple, Optional, Tuple
+
+RecordKind = Literal['vehicle', 'trip', 'task']
+ChangeOp = Literal['upsert', 'delete']
+
+
+class Change(NamedTuple):
+    revision: int
+    kind: RecordKind
+    op: ChangeOp
+    record_id: str
+
+
+class ChangeLog:
+    """单调递增的变更日志，只保留最近 max_entries 条"""
+
+    def __init__(self, max_entries: int = 100000):
+        self.revision = 0
+        # 保留窗口的起点：早于它的版本无法增量
+        self.floor = 0
+        self.entries: Deque[Change] = deque(maxlen=max_entries)
+        self.listeners: List[Callable[[Change], None]] = []
+
+    def subscribe(self, listener: Callable[[Change], None]):
+        """注册变更监听（在写入线程中同步调用，应尽快返回）"""
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[Change], None]):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def clear(self, revision: int = 0):
+        """清空日志，版本号从 revision 开始"""
+        self.revision = self.floor = revision
+        self.entries.clear()
+
+    def record(self, kind: RecordKind, op: ChangeOp, record_id: str,
+               revision: Optional[int] = None) -> int:
+        """记录一次变更，返回新的版本号
+
+        revision 由共享存储分配（多 worker 全局递增，可能不连续）时传入，否则自增。
+        """
+        self.revision = self.revision + 1 if revision is None else revision
+        change = Change(self.revision, kind, op, record_id)
+        if len(self.entries) == self.entries.maxlen:
+            self.floor = self.entries[0].revision
+        self.entries.append(change)
+        for listener in self.listeners:
+            listener(change)
+        return self.revision
+
+    def since(self, revision: int) -> Optional[List[Change]]:
+        """返回 revision 之后每条记录的最后一次变更（按版本号排序）
+
+        revision 早于保留窗口或晚于当前版本（如服务重启）时返回 None，调用方需全量刷新。
+        """
+        if revision > self.revision:
+            return None
+        if revision == self.revision:
+            return []
+        if revision < self.floor:
+            return None
+
+        latest: Dict[Tuple[str, str], Change] = {}
+        for change in reversed(self.entries):
+            if change.revision <= revision:
+                break
+            latest.setdefault((change.kind, change.record_id), change)
+        return sorted(latest.values())
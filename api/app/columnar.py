@@ -0,0 +1,103 @@
+# 列式 + 字典编码的 JSON 格式（format=columnar），用于车辆、容器列表这类大响应
+#
+# 行（键相同的 dict）按列存放，列名每张表只出现一次；重复出现的字符串放进共享字符串表，列中只存下标。
+# 嵌套的 dict 列表（车辆的 trips、行程的 tasks）展开成一张子表，附带每行的元素个数。
+#
+#   {"strings": [...], "table": 表}
+#   表 = {"n": 行数, "columns": [[列名, 类型, 数据], ...]}
+#   类型 "s"：数据为字符串表下标（null 表示 None）
+#        "v"：数据为原始值
+#        "l"：数据为 {"counts": [每行元素个数], "table": 子表}
+#
+# 前端解码见 src/utils/columnar.ts。
+from typing import Any, Dict, List, Optional
+
+# 列中不同字符串数不超过行数的该比例时才进字符串表（ID 等几乎不重复的列按原样输出）
+INTERN_RATIO = 0.5
+
+_STRING_TYPES = {str, type(None)}
+
+
+class _Encoder:
+    def __init__(self):
+        self.strings: List[str] = []
+        self.index: Dict[str, int] = {}
+
+    def intern(self, value: Optional[str]) -> Optional[int]:
+        if value is None:
+            return None
+        i = self.index.get(value)
+        if i is None:
+            i = self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return i
+
+    def column(self, values: list) -> list:
+        if all(isinstance(v, list) for v in values):
+            rows = [row for value in values for row in value]
+            if is_table(rows):
+                return ['l', {'counts': [len(v) for v in values], 'table': self.table(rows)}]
+        if set(map(type, values)) <= _STRING_TYPES:
+            # 每个不同的值只查一次字符串表
+            distinct = dict.fromkeys(values)
+            if len(distinct) <= max(1, len(values) * INTERN_RATIO):
+                for value in distinct:
+                    distinct[value] = self.intern(value)
+                return ['s', [distinct[v] for v in values]]
+        return ['v', values]
+
+    def table(self, rows: List[dict]) -> dict:
+        keys = list(rows[0]) if rows else []
+        columns = []
+        for key in keys:
+            kind, data = self.column([row[key] for row in rows])
+            columns.append([key, kind, data])
+        return {'n': len(rows), 'columns': columns}
+
+
+def is_table(rows: list) -> bool:
+    """rows 是否为键（及顺序）完全相同的 dict 列表，空列表也算"""
+    if not rows:
+        return True
+    if not isinstance(rows[0], dict):
+        return False
+    keys = list(rows[0])
+    return all(isinstance(row, dict) and list(row) == keys for row in rows)
+
+
+def encode_rows(rows: List[dict]) -> dict:
+    """把键相同的 dict 列表编码为列式格式（调用方先用 is_table 检查）"""
+    encoder = _Encoder()
+    table = encoder.table(rows)
+    return {'strings': encoder.strings, 'table': table}
+
+
+def encode_columns(columns: Dict[str, list], count: int) -> dict:
+    """已按列取出的数据（列名 -> 值列表）直接编码，省去先拼成行"""
+    encoder = _Encoder()
+    table = {'n': count, 'columns': [[key, *encoder.column(values)] for key, values in columns.items()]}
+    return {'strings': encoder.strings, 'table': table}
+
+
+def _decode_table(table: dict, strings: List[str]) -> List[dict]:
+    n = table['n']
+    rows: List[Dict[str, Any]] = [{} for _ in range(n)]
+    for key, kind, data in table['columns']:
+        if kind == 's':
+            values = [None if i is None else strings[i] for i in data]
+        elif kind == 'l':
+            children = _decode_table(data['table'], strings)
+            values, offset = [], 0
+            for count in data['counts']:
+                values.append(children[offset:offset + count])
+                offset += count
+        else:
+            values = data
+        for row, value in zip(rows, values):
+            row[key] = value
+    return rows
+
+
+def decode_rows(payload: dict) -> List[dict]:
+    """encode_rows 的逆过程（与前端解码一致，供测试和基准使用）"""
+    return _decode_table(payload['table'], payload['strings'])
@@ -0,0 +1,132 @@
+# 响应压缩：按 Accept-Encoding 协商 brotli / gzip
+#
+# BSB_COMPRESSION=1（默认）时注册。brotli 为可选依赖（pip install brotli），未安装时只提供 gzip。
+# 只压缩一次性发送的 JSON / 文本响应，流式响应和已带 Content-Encoding 的响应原样转发。
+# 带 ETag 的响应（见 responses.cached_json_response）按 (路径, 查询参数, ETag, 编码) 缓存压缩结果，
+# 数据未变化时重复请求不再重新压缩。
+import gzip
+import os
+from typing import Optional
+
+from app.responses import ResponseCache
+
+try:
+    import brotli
+except ImportError:  # 可选依赖，未安装时只使用 gzip
+    brotli = None
+
+ENABLED = os.environ.get('BSB_COMPRESSION', '1') == '1'
+
+# 小于该字节数的响应不压缩（压缩收益抵不过开销）
+MIN_SIZE = 1024
+# 动态响应使用偏快的压缩级别
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 5
+
+_COMPRESSIBLE_TYPES = (b'application/json', b'text/')
+
+# 压缩结果缓存
+COMPRESSED_CACHE = ResponseCache(max_entries=128, max_bytes=32 * 1024 * 1024)
+
+
+def _accepted(accept_encoding: str) -> dict:
+    """解析 Accept-Encoding，返回 {编码: q 值}"""
+    accepted = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """在客户端接受的编码中选择 br 或 gzip（同等 q 值时优先 br），都不接受时返回 None"""
+    if not accept_encoding:
+        return None
+    accepted = _accepted(accept_encoding)
+    wildcard = accepted.get('*', 0.0)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_q = None, 0.0
+    for name in candidates:
+        q = accepted.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """按 Accept-Encoding 压缩响应体（纯 ASGI 中间件）"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = None
+        for name, value in scope['headers']:
+            if name == b'accept-encoding':
+                encoding = choose_encoding(value.decode('latin-1'))
+                break
+
+        start_message = None
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message['type'] == 'http.response.start':
+                start_message = message
+                return
+            if message['type'] != 'http.response.body' or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = list(start.get('headers', []))
+            header_map = {name.lower(): value for name, value in headers}
+            content_type = header_map.get(b'content-type', b'')
+            body = message.get('body', b'')
+            if not content_type.startswith(_COMPRESSIBLE_TYPES) or b'content-encoding' in header_map:
+                await send(start)
+                await send(message)
+                return
+
+            # 压缩与否取决于请求头，共享缓存需要区分
+            headers.append((b'vary', b'Accept-Encoding'))
+            if encoding is None or message.get('more_body') or len(body) < MIN_SIZE:
+                await send({**start, 'headers': headers})
+                await send(message)
+                return
+
+            etag = header_map.get(b'etag')
+            key = (scope['path'], scope.get('query_string', b''), etag, encoding)
+            cached = COMPRESSED_CACHE.get(key) if etag is not None else None
+            if cached is not None:
+                compressed = cached[0]
+            else:
+                compressed = compress(body, encoding)
+                if etag is not None:
+                    COMPRESSED_CACHE.put(key, compressed, {})
+
+            headers = [(name, value) for name, value in headers if name.lower() != b'content-length']
+            headers.append((b'content-encoding', encoding.encode()))
+            headers.append((b'content-length', str(len(compressed)).encode()))
+            await send({**start, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': compressed})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,139 @@
+# 行程冲突检测：同一车辆或同一司机的行程时间重叠
+#
+# 单次检查直接查车辆/司机的有序区间索引（database.TRIP_INDEX / DRIVER_TRIP_INDEX），O(log n + k)；
+# 时间窗口报告按车辆、司机分组做扫描线，O(n log n + 冲突数)。
+# 司机取行程自身的 driverId，未指定司机的行程只参与车辆冲突检查。
+#
+# preview_trip_change 为拖拽预览：在行程副本上应用修改（不写存储），返回冲突和截止日期违规。
+import heapq
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from app import database
+
+# 写入时的处理方式：flag（默认）照常写入并在响应中返回冲突；reject 拒绝产生冲突的修改
+CONFLICT_MODE = os.environ.get('BSB_CONFLICT_MODE', 'flag').lower()
+if CONFLICT_MODE not in ('flag', 'reject'):
+    raise ValueError(f'未知的冲突处理方式: {CONFLICT_MODE}')
+
+# 任务类型对应的容器截止日期字段：提柜看 Last Free，送货看 Request Deliver Date，还空箱看 Last Dention；
+# 其他类型不受截止日期约束
+TASK_DEADLINE_FIELDS = {
+    'Yard(F)': 'Last Free',
+    'Client': 'Request Deliver Date',
+    'Empty Park': 'Last Dention',
+}
+
+
+def _naive(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=None) if dt.tzinfo is not None else dt
+
+
+def _conflict(kind: str, key: str, trip_id: str, start: datetime, end: datetime, other: dict) -> dict:
+    return {
+        'type': kind,
+        'key': key,
+        'tripId': trip_id,
+        'otherTripId': other['id'],
+        # 重叠部分
+        'start': max(start, other['startTime']).isoformat(),
+        'end': min(end, other['endTime']).isoformat(),
+    }
+
+
+def find_trip_conflicts(trip_id: str, vehicle_id: Optional[str], driver_id: Optional[str],
+                        start: datetime, end: datetime, ignore: Iterable[str] = ()) -> List[dict]:
+    """行程放在 vehicle_id / driver_id 的 [start, end) 时与其他行程的冲突（忽略自身和 ignore 中的行程）"""
+    start, end = _naive(start), _naive(end)
+    ignore = set(ignore)
+    ignore.add(trip_id)
+    conflicts = []
+    for kind, index, key in (('vehicle', database.TRIP_INDEX, vehicle_id),
+                             ('driver', database.DRIVER_TRIP_INDEX, driver_id)):
+        if key is None:
+            continue
+        for other in index.query(key, start, end):
+            if other['id'] not in ignore:
+                conflicts.append(_conflict(kind, key, trip_id, start, end, other))
+    return conflicts
+
+
+def check_trip_change(trip_id: str, changes: dict) -> List[dict]:
+    """现有行程按 changes（vehicleId / driverId / startTime / endTime）修改后会产生的冲突"""
+    trip_data = database.get_trip(trip_id)
+    if trip_data is None:
+        return []
+    merged = {**trip_data, **changes}
+    return find_trip_conflicts(
+        trip_id, merged['vehicleId'], merged.get('driverId'), merged['startTime'], merged['endTime']
+    )
+
+
+def deadline_violations(trip_data: dict) -> List[dict]:
+    """行程结束时间晚于其任务容器的截止日期（按任务类型取 TASK_DEADLINE_FIELDS 中的字段，当天结束为限）"""
+    violations = []
+    for task_data in database.get_trip_tasks(trip_data['id']):
+        ctn = task_data.get('containerNo')
+        field = TASK_DEADLINE_FIELDS.get(task_data.get('taskType'))
+        if not ctn or field is None:
+            continue
+        day = database.get_container_dates(ctn).get(field)
+        if day is None:
+            continue
+        deadline = datetime.combine(day + timedelta(days=1), datetime.min.time())
+        if trip_data['endTime'] > deadline:
+            violations.append({
+                'taskId': task_data['id'],
+                'containerNo': ctn,
+                'field': field,
+                'deadline': deadline,
+                'lateMinutes': int((trip_data['endTime'] - deadline).total_seconds() // 60),
+            })
+    return violations
+
+
+def preview_trip_change(trip_id: str, changes: dict) -> Optional[dict]:
+    """行程按 changes 修改后的样子及其冲突、截止日期违规；行程不存在时返回 None"""
+    trip_data = database.get_trip(trip_id)
+    if trip_data is None:
+        return None
+    preview = {**trip_data, **changes}
+    # new 表示修改前并未违规（由本次拖拽造成）
+    late_before = {(v['taskId'], v['field']) for v in deadline_violations(trip_data)}
+    violations = deadline_violations(preview)
+    for violation in violations:
+        violation['new'] = (violation['taskId'], violation['field']) not in late_before
+    return {
+        'trip': preview,
+        'conflicts': find_trip_conflicts(
+            trip_id, preview['vehicleId'], preview.get('driverId'), preview['startTime'], preview['endTime']
+        ),
+        'deadlineViolations': violations,
+    }
+
+
+def _sweep(kind: str, key: str, trips: List[dict]) -> List[dict]:
+    """trips 已按开始时间排序；维护按结束时间排序的活动集合"""
+    conflicts = []
+    active: List[tuple] = []  # (endTime, 序号, trip)
+    for seq, trip in enumerate(trips):
+        while active and active[0][0] <= trip['startTime']:
+            heapq.heappop(active)
+        for _, _, other in active:
+            conflicts.append(_conflict(kind, key, other['id'], other['startTime'], other['endTime'], trip))
+        heapq.heappush(active, (trip['endTime'], seq, trip))
+    return conflicts
+
+
+def scan_conflicts(range_start: datetime, range_end: datetime) -> List[dict]:
+    """时间范围内全部车辆冲突和司机冲突"""
+    range_start = _naive(range_start)
+    range_end = _naive(range_end)
+    conflicts = []
+    for kind, index in (('vehicle', database.TRIP_INDEX), ('driver', database.DRIVER_TRIP_INDEX)):
+        for key in index.vehicles:
+            trips = index.query(key, range_start, range_end)
+            if len(trips) > 1:
+                conflicts.extend(_sweep(kind, key, trips))
+    return conflicts
@@ -0,0 +1,180 @@
+# 容器批量导入（CSV / XLSX）
+#
+# 列名与 models.Container 的别名一致（'CTN NUMBER', 'Logitics Status', ...），按 CTN NUMBER 新增或覆盖。
+# 行按批读取、校验和写入，内存占用与文件大小无关。
+#
+# 命令行：cd api && python -m app.container_import containers.csv [--dry-run]
+# （写入 BSB_STORAGE 指定的持久化存储，内存模式下导入结果随进程退出丢失）
+import argparse
+import csv
+import json
+import sys
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from app import database
+from app.models import Container
+
+# 每批校验/写入的行数
+BATCH_SIZE = 1000
+# 返回的行错误条数上限（错误总数仍完整统计）
+MAX_ERRORS = 1000
+
+# 导入文件必须包含的列
+REQUIRED_COLUMNS = tuple(field.alias for field in Container.model_fields.values())
+
+# (文件中的行号, 列名 -> 单元格)
+Row = Tuple[int, Dict[str, Any]]
+
+
+class ImportFormatError(ValueError):
+    """文件格式错误（无法读取或缺少列），整份文件不导入"""
+
+
+def _check_columns(columns: Iterable[Optional[str]]):
+    columns = set(columns)
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ImportFormatError(f"缺少列: {', '.join(missing)}")
+
+
+def iter_csv_rows(lines: Iterable[str]) -> Iterator[Row]:
+    """逐行读取 CSV（首行为列名）
+
+    行号取 reader.line_num（该行最后一个物理行），跳过的空行和跨行的引号字段不会使行号错位。
+    """
+    reader = csv.DictReader(lines)
+    _check_columns(column.strip() for column in reader.fieldnames or ())
+    reader.fieldnames = [column.strip() for column in reader.fieldnames]
+    for row in reader:
+        yield reader.line_num, row
+
+
+def iter_xlsx_rows(source: Union[str, BinaryIO]) -> Iterator[Row]:
+    """逐行读取 XLSX 第一个工作表（首行为列名），需要安装 openpyxl
+
+    source 为文件路径或可 seek 的二进制文件对象。
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError('导入 XLSX 需要安装 openpyxl')
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise ImportFormatError('文件为空')
+        columns = [str(column).strip() if column is not None else None for column in header]
+        _check_columns(columns)
+        for line, values in enumerate(rows, 2):
+            yield line, {
+                column: value for column, value in zip(columns, values)
+                if column is not None
+            }
+    finally:
+        workbook.close()
+
+
+def _cell_text(value: Any) -> str:
+    """单元格统一转成字符串（Container 字段均为字符串，日期按原格式保存）"""
+    if value is None:
+        return ''
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _validate_batch(rows: List[Row], result: Dict[str, Any]) -> List[Container]:
+    containers = []
+    for line, row in rows:
+        ctn_number = _cell_text(row.get('CTN NUMBER'))
+        if not any(value not in (None, '') for value in row.values()):
+            continue  # 跳过空行
+        result['total'] += 1
+        try:
+            if not ctn_number:
+                raise ValueError('CTN NUMBER 不能为空')
+            containers.append(Container.model_validate(
+                {column: _cell_text(row.get(column)) for column in REQUIRED_COLUMNS}
+            ))
+        except (ValidationError, ValueError) as e:
+            result['failed'] += 1
+            if len(result['errors']) < MAX_ERRORS:
+                message = '; '.join(
+                    f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors()
+                ) if isinstance(e, ValidationError) else str(e)
+                result['errors'].append({'row': line, 'ctnNumber': ctn_number or None, 'message': message})
+    return containers
+
+
+def import_batches(rows: Iterable[Row], dry_run: bool = False) -> Iterator[Dict[str, Any]]:
+    """按批校验并写入容器，每批之后产出当前累计结果
+
+    rows 为 iter_csv_rows / iter_xlsx_rows 产出的 (行号, 行)；dry_run 时只校验不写入。
+    """
+    result: Dict[str, Any] = {'total': 0, 'inserted': 0, 'updated': 0, 'failed': 0, 'errors': []}
+    rows = iter(rows)
+    empty = True
+    while True:
+        batch = list(islice(rows, BATCH_SIZE))
+        if not batch:
+            break
+        empty = False
+        containers = _validate_batch(batch, result)
+        if containers and not dry_run:
+            inserted, updated = database.upsert_containers(containers)
+            result['inserted'] += inserted
+            result['updated'] += updated
+        yield result
+    if empty:
+        yield result
+
+
+def import_rows(rows: Iterable[Row], dry_run: bool = False) -> Dict[str, Any]:
+    """导入全部行，返回 {total, inserted, updated, failed, errors: [{row, ctnNumber, message}]}"""
+    result = None
+    for result in import_batches(rows, dry_run):
+        pass
+    return result
+
+
+def import_file(path: str, dry_run: bool = False) -> Dict[str, Any]:
+    """按扩展名导入 CSV 或 XLSX 文件"""
+    if path.lower().endswith('.xlsx'):
+        return import_rows(iter_xlsx_rows(path), dry_run)
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        return import_rows(iter_csv_rows(f), dry_run)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量导入容器（CSV / XLSX）')
+    parser.add_argument('path', help='导入文件路径')
+    parser.add_argument('--dry-run', action='store_true', help='只校验不写入')
+    args = parser.parse_args()
+
+    storage = database.STORAGE
+    if storage.shared:
+        storage.begin()
+    try:
+        result = import_file(args.path, args.dry_run)
+    except BaseException:
+        if storage.shared:
+            storage.rollback()
+        raise
+    if storage.shared:
+        storage.commit()
+    storage.flush()
+
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    return 1 if result['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
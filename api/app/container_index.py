@@ -0,0 +1,149 @@
+# 容器搜索索引
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set
+from app.utils import Str2Date
+
+# 关键词搜索字段（子串匹配，不区分大小写）
+SEARCH_FIELDS = ('CTN NUMBER', 'FULL CLIENT Name')
+# 精确筛选字段
+FILTER_FIELDS = ('Logitics Status', 'Deliver Type', 'Terminal')
+# 按日期分桶的字段（TodoBar 提醒）
+DATE_FIELDS = ('Last Free', 'Last Dention', 'Request Deliver Date')
+# n-gram 最大长度：不超过该长度的关键词可直接命中倒排表
+MAX_GRAM = 3
+
+
+def _grams(text: str) -> Set[str]:
+    """文本的 1..MAX_GRAM 元子串"""
+    grams = set()
+    for n in range(1, MAX_GRAM + 1):
+        for i in range(len(text) - n + 1):
+            grams.add(text[i:i + n])
+    return grams
+
+
+class ContainerIndex:
+    """容器 n-gram 关键词索引 + 字段倒排索引，随容器增删增量维护"""
+
+    def __init__(self):
+        self.grams: Dict[str, Set[str]] = {}
+        self.fields: Dict[str, Dict[str, Set[str]]] = {field: {} for field in FILTER_FIELDS}
+        self.texts: Dict[str, List[str]] = {}
+        self.values: Dict[str, Dict[str, str]] = {}
+        self.dates: Dict[str, Dict[date, Set[str]]] = {field: {} for field in DATE_FIELDS}
+        self.days: Dict[str, Dict[str, Optional[date]]] = {}
+        self.order: Dict[str, int] = {}
+        self._seq = 0
+
+    def clear(self):
+        self.grams.clear()
+        for postings in self.fields.values():
+            postings.clear()
+        for buckets in self.dates.values():
+            buckets.clear()
+        self.texts.clear()
+        self.values.clear()
+        self.days.clear()
+        self.order.clear()
+
+    def add(self, container_data: dict, days: Optional[Dict[str, Optional[date]]] = None):
+        """加入容器（已存在时先移除）
+
+        days 为调用方已批量解析好的日期字段（见 utils.parse_container_dates），不传时在此解析。
+        """
+        ctn = container_data['CTN NUMBER']
+        seq = self.order.get(ctn)
+        self.remove(ctn)
+
+        texts = [str(container_data.get(field) or '').lower() for field in SEARCH_FIELDS]
+        self.texts[ctn] = texts
+        for gram in set().union(*(_grams(text) for text in texts)):
+            self.grams.setdefault(gram, set()).add(ctn)
+
+        values = {field: container_data.get(field) for field in FILTER_FIELDS}
+        self.values[ctn] = values
+        for field, value in values.items():
+            self.fields[field].setdefault(value, set()).add(ctn)
+
+        # 日期字段只在写入时解析一次
+        if days is None:
+            days = {field: Str2Date(container_data.get(field) or '') for field in DATE_FIELDS}
+        self.days[ctn] = days
+        for field, day in days.items():
+            if day is not None:
+                self.dates[field].setdefault(day, set()).add(ctn)
+
+        # 覆盖写入时保留原顺序，与 DB 字典的顺序一致
+        if seq is None:
+            self._seq += 1
+            seq = self._seq
+        self.order[ctn] = seq
+
+    def remove(self, ctn: str):
+        """移除容器"""
+        texts = self.texts.pop(ctn, None)
+        if texts is None:
+            return
+        for gram in set().union(*(_grams(text) for text in texts)):
+            postings = self.grams.get(gram)
+            if postings is not None:
+                postings.discard(ctn)
+                if not postings:
+                    del self.grams[gram]
+
+        for field, value in self.values.pop(ctn).items():
+            postings = self.fields[field].get(value)
+            if postings is not None:
+                postings.discard(ctn)
+                if not postings:
+                    del self.fields[field][value]
+
+        for field, day in self.days.pop(ctn).items():
+            bucket = self.dates[field].get(day)
+            if bucket is not None:
+                bucket.discard(ctn)
+                if not bucket:
+                    del self.dates[field][day]
+
+        del self.order[ctn]
+
+    def _match_keyword(self, keyword: str) -> Set[str]:
+        keyword = keyword.lower()
+        if len(keyword) <= MAX_GRAM:
+            return set(self.grams.get(keyword, ()))
+
+        # 长关键词：先求各 MAX_GRAM 元子串倒排表的交集，再逐条确认
+        postings = []
+        for i in range(len(keyword) - MAX_GRAM + 1):
+            posting = self.grams.get(keyword[i:i + MAX_GRAM])
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return {
+            ctn for ctn in candidates
+            if any(keyword in text for text in self.texts[ctn])
+        }
+
+    def search(self, keyword: Optional[str] = None,
+               filters: Optional[Dict[str, Optional[str]]] = None) -> Optional[Set[str]]:
+        """返回匹配的容器号集合；没有任何条件时返回 None（表示全部）"""
+        sets: List[Set[str]] = []
+        for field, value in (filters or {}).items():
+            if value:
+                sets.append(self.fields[field].get(value, set()))
+        if keyword:
+            sets.append(self._match_keyword(keyword))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return set(sets[0]).intersection(*sets[1:])
+
+    def on_date(self, field: str, day: date) -> Set[str]:
+        """某日期字段落在 day 的容器号"""
+        return set(self.dates[field].get(day, ()))
+
+    def ordered(self, ctns: Iterable[str]) -> List[str]:
+        """按写入顺序排列"""
+        return sorted(ctns, key=self.order.__getitem__)
@@ -1,18 +1,68 @@
 # 内存数据库实现
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 import uuid
 from app.models import Vehicle, Trip, Task, Container
+from app.trip_index import TripIntervalIndex
+from app.container_index import ContainerIndex, DATE_FIELDS
+from app.changelog import Change, ChangeLog
+from app.metrics import span
+from app.storage import create_storage
+from app.utils import parse_container_dates
 
-# 内存数据存储
+# 内存数据存储（主键索引）
 DB = {
     'plateNumber': [],
     'driverId': [],
-    'trips': [],
-    'tasks': [],
-    'containers': []
+    'vehicles': {},     # vehicle_id -> vehicle
+    'trips': {},        # trip_id -> trip
+    'tasks': {},        # task_id -> task
+    'containers': {}    # ctn_number -> Container（已校验的模型实例）
 }
 
+# 二级索引
+TRIP_TASKS: Dict[str, List[str]] = {}       # trip_id -> [task_id]
+VEHICLE_TRIPS: Dict[str, List[str]] = {}    # vehicle_id -> [trip_id]
+
+# 行程时间区间索引（按车辆 / 按行程司机）
+TRIP_INDEX = TripIntervalIndex()
+DRIVER_TRIP_INDEX = TripIntervalIndex(key='driverId')
+
+# 容器搜索索引
+CONTAINER_INDEX = ContainerIndex()
+
+# 车辆/行程/任务变更日志（版本号即 CHANGE_LOG.revision）
+CHANGE_LOG = ChangeLog()
+
+# 持久化存储后端（BSB_STORAGE 环境变量选择，默认仅内存）
+STORAGE = create_storage()
+
+# 数据版本号，每次写入递增；loads 为全量装入（_load_records）次数
+VERSIONS = {'containers': 0, 'loads': 0}
+
+# 进程启动标识（单进程模式下 get_data_version 使用）
+BOOT_ID = uuid.uuid4().hex[:8]
+
+# 容器数据最近一次变更的存储版本号（共享存储模式下为 changes 表的全局版本号）
+CONTAINER_REVISION = {'revision': 0}
+
+# 容器 JSON 序列化缓存：ctn_number -> bytes，容器写入时失效
+_CONTAINER_JSON: Dict[str, bytes] = {}
+
+# 行程/任务时间字段以 datetime 保存，字符串格式化只在 API 层进行
+TRIP_TIME_FIELDS = ('startTime', 'endTime')
+TASK_TIME_FIELDS = ('planStart', 'planEnd')
+
+def _naive(dt: datetime) -> datetime:
+    """去掉时区信息，与原字符串存储的语义保持一致"""
+    return dt.replace(tzinfo=None) if dt.tzinfo is not None else dt
+
+def _index_trip(trip_data: dict):
+    """将行程加入区间索引"""
+    TRIP_INDEX.add(trip_data, trip_data['startTime'], trip_data['endTime'])
+    DRIVER_TRIP_INDEX.add(trip_data, trip_data['startTime'], trip_data['endTime'])
+
 def init_sample_data():
     """初始化示例数据"""
 
@@ -37,20 +87,17 @@ def init_sample_data():
         {
             'id': 'PM001',
             'plateNumber': 'ABC-123',
-            'driverId': 'DRIVER001',
-            'trips': []
+            'driverId': 'DRIVER001'
         },
         {
             'id': 'PM002', 
             'plateNumber': 'DEF-456',
-            'driverId': 'DRIVER002',
-            'trips': []
+            'driverId': 'DRIVER002'
         },
         {
             'id': 'PM003',
             'plateNumber': 'GHI-789',
-            'driverId': None,
-            'trips': []
+            'driverId': None
         }
     ]
     
@@ -323,15 +370,15 @@ def init_sample_data():
     ]
     
     # 创建示例行程和任务
-    now = datetime.now()
+    now = datetime.now().replace(microsecond=0)
     
     # 为PM001创建行程和任务
     trip1 = {
         'id': str(uuid.uuid4()),
         'vehicleId': 'PM001',
         'driverId': 'DRIVER001',
-        'startTime': (now + timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S'),
-        'endTime': (now + timedelta(hours=4)).strftime('%Y-%m-%d %H:%M:%S'),
+        'startTime': (now + timedelta(hours=1)),
+        'endTime': (now + timedelta(hours=4)),
         'fullLoad': 'N'
     }
     
@@ -340,8 +387,8 @@ def init_sample_data():
         'tripId': trip1['id'],
         'containerNo': 'CONT001',
         'taskType': 'Client',
-        'planStart': (now + timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S'),
-        'planEnd': (now + timedelta(hours=2)).strftime('%Y-%m-%d %H:%M:%S'),
+        'planStart': (now + timedelta(hours=1)),
+        'planEnd': (now + timedelta(hours=2)),
         'startAddress': '悉尼港码头',
         'endAddress': '客户A仓库',
         'status': 'pending'
@@ -352,64 +399,273 @@ def init_sample_data():
         'tripId': trip1['id'],
         'containerNo': 'CONT002',
         'taskType': 'Empty Park',
-        'planStart': (now + timedelta(hours=2, minutes=30)).strftime('%Y-%m-%d %H:%M:%S'),
-        'planEnd': (now + timedelta(hours=4)).strftime('%Y-%m-%d %H:%M:%S'),
+        'planStart': (now + timedelta(hours=2, minutes=30)),
+        'planEnd': (now + timedelta(hours=4)),
         'startAddress': '客户A仓库',
         'endAddress': '空柜场A',
         'status': 'pending'
     }
     
     # 更新数据
-    DB['plateNumber'] = plateNumber
-    DB['driverId'] = driverId
-    DB['vehicles'] = vehicles
-    DB['containers'] = containers
-    DB['trips'].append(trip1)
-    DB['tasks'].extend([task1, task2])
-    
-    # 更新车辆行程关系
-    for vehicle in DB['vehicles']:
-        if vehicle['id'] == 'PM001':
-            vehicle['trips'] = [trip1]
-            break
+    _load_records(plateNumber, driverId, vehicles, containers, [trip1], [task1, task2])
+    _persist_all()
+
+def init_data():
+    """启动时加载数据：优先从持久化存储恢复，存储为空时生成示例数据"""
+    if STORAGE.shared:
+        # 多个 worker 同时启动时，只有第一个取得写锁的进程生成示例数据
+        STORAGE.begin()
+        try:
+            snapshot = STORAGE.load()
+            if snapshot is None:
+                init_sample_data()
+            STORAGE.commit()
+        except BaseException:
+            STORAGE.rollback()
+            raise
+        if snapshot is None:
+            snapshot = STORAGE.load()
+        _load_snapshot(snapshot)
+        return
+
+    snapshot = STORAGE.load()
+    if snapshot is None:
+        init_sample_data()
+        return
+    _load_snapshot(snapshot)
+
+def reload_data():
+    """从持久化存储全量重新加载（多 worker 模式下增量同步失败时使用）"""
+    snapshot = STORAGE.load()
+    if snapshot is not None:
+        _load_snapshot(snapshot)
+
+def _load_snapshot(snapshot: dict):
+    meta = snapshot['meta']
+    _load_records(
+        meta.get('plateNumber', []), meta.get('driverId', []),
+        snapshot['vehicles'], snapshot['containers'], snapshot['trips'], snapshot['tasks'],
+        snapshot.get('revision', 0), snapshot.get('containerRevision', 0)
+    )
+
+def _load_records(plate_numbers: List[str], driver_ids: List[str], vehicles: Iterable[dict],
+                  containers: Iterable[dict], trips: Iterable[dict], tasks: Iterable[dict],
+                  revision: int = 0, container_revision: int = 0):
+    """清空并装入全部数据、重建索引（不写持久化，不记变更日志）"""
+    DB['plateNumber'] = list(plate_numbers)
+    DB['driverId'] = list(driver_ids)
+    DB['vehicles'].clear()
+    DB['trips'].clear()
+    DB['tasks'].clear()
+    DB['containers'].clear()
+    TRIP_TASKS.clear()
+    VEHICLE_TRIPS.clear()
+    TRIP_INDEX.clear()
+    DRIVER_TRIP_INDEX.clear()
+    CONTAINER_INDEX.clear()
+    _CONTAINER_JSON.clear()
+
+    for vehicle in vehicles:
+        _store_vehicle(vehicle)
+    for container in containers:
+        _store_container(container)
+    for trip in trips:
+        _store_trip(trip)
+    for task in tasks:
+        _store_task(task)
+    CHANGE_LOG.clear(revision)
+    CONTAINER_REVISION['revision'] = container_revision
+    VERSIONS['containers'] += 1
+    VERSIONS['loads'] += 1
+
+def _persist_all():
+    """把内存中的全部数据写入持久化存储"""
+    for vehicle in DB['vehicles'].values():
+        STORAGE.save('vehicle', vehicle)
+    for container in DB['containers'].values():
+        STORAGE.save('container', container.model_dump(by_alias=True))
+    for trip in DB['trips'].values():
+        STORAGE.save('trip', trip)
+    for task in DB['tasks'].values():
+        STORAGE.save('task', task)
+    # meta 最后写入，load() 以它判断存储中是否已有完整数据
+    STORAGE.save_meta('plateNumber', DB['plateNumber'])
+    STORAGE.save_meta('driverId', DB['driverId'])
+
+def _container_saved(revision: Optional[int]):
+    """记录容器写入后的存储版本号（仅共享存储返回版本号）"""
+    if revision is not None:
+        CONTAINER_REVISION['revision'] = revision
+
+def _upserted(kind: str, record: dict):
+    """写入持久化存储并记录变更"""
+    revision = STORAGE.save(kind, record)
+    CHANGE_LOG.record(kind, 'upsert', record['id'], revision)
+
+def _deleted(kind: str, record_id: str):
+    """从持久化存储删除并记录变更"""
+    revision = STORAGE.delete(kind, record_id)
+    CHANGE_LOG.record(kind, 'delete', record_id, revision)
+
+def _store_vehicle(vehicle_data: dict):
+    """写入车辆并维护索引"""
+    DB['vehicles'][vehicle_data['id']] = vehicle_data
+    VEHICLE_TRIPS.setdefault(vehicle_data['id'], [])
+
+def _store_container(container: Union[dict, Container],
+                     days: Optional[Dict[str, Optional[date]]] = None) -> Container:
+    """校验并写入容器、维护搜索索引"""
+    if not isinstance(container, Container):
+        container = Container(**container)
+    DB['containers'][container.ctnNumber] = container
+    CONTAINER_INDEX.add(container.model_dump(by_alias=True), days)
+    return container
+
+def _store_trip(trip_data: dict):
+    """写入行程并维护索引"""
+    DB['trips'][trip_data['id']] = trip_data
+    VEHICLE_TRIPS.setdefault(trip_data['vehicleId'], []).append(trip_data['id'])
+    _index_trip(trip_data)
+
+def _store_task(task_data: dict):
+    """写入任务并维护索引"""
+    DB['tasks'][task_data['id']] = task_data
+    TRIP_TASKS.setdefault(task_data['tripId'], []).append(task_data['id'])
+
+def _drop_vehicle(vehicle_id: str) -> Optional[dict]:
+    """移除车辆及其索引"""
+    vehicle_data = DB['vehicles'].pop(vehicle_id, None)
+    if vehicle_data is not None:
+        VEHICLE_TRIPS.pop(vehicle_id, None)
+    return vehicle_data
 
-def get_vehicles_by_time_range(start_time: str, end_time: str) -> List[Vehicle]:
+def _drop_container(ctn_number: str) -> bool:
+    """移除容器及其索引、缓存"""
+    if DB['containers'].pop(ctn_number, None) is None:
+        return False
+    CONTAINER_INDEX.remove(ctn_number)
+    _CONTAINER_JSON.pop(ctn_number, None)
+    VERSIONS['containers'] += 1
+    return True
+
+def _drop_trip(trip_id: str) -> Optional[dict]:
+    """移除行程及其索引（不含任务）"""
+    trip_data = DB['trips'].pop(trip_id, None)
+    if trip_data is not None:
+        vehicle_trip_ids = VEHICLE_TRIPS.get(trip_data['vehicleId'])
+        if vehicle_trip_ids and trip_id in vehicle_trip_ids:
+            vehicle_trip_ids.remove(trip_id)
+        TRIP_INDEX.remove(trip_id)
+        DRIVER_TRIP_INDEX.remove(trip_id)
+    return trip_data
+
+def _drop_task(task_id: str) -> Optional[dict]:
+    """移除任务及其索引"""
+    task_data = DB['tasks'].pop(task_id, None)
+    if task_data is not None:
+        trip_task_ids = TRIP_TASKS.get(task_data['tripId'])
+        if trip_task_ids and task_id in trip_task_ids:
+            trip_task_ids.remove(task_id)
+    return task_data
+
+def _apply_remote(kind: str, op: str, record_id: str, record: Optional[dict]):
+    """把其他 worker 提交的变更应用到内存（不写持久化）"""
+    if kind == 'container':
+        if op == 'delete':
+            _drop_container(record_id)
+        else:
+            _store_container(record)
+            _CONTAINER_JSON.pop(record_id, None)
+            VERSIONS['containers'] += 1
+        return
+
+    # 先移除旧记录（行程可能换了车辆，任务可能换了行程），再按新内容写入
+    if kind == 'vehicle':
+        if op == 'delete':
+            _drop_vehicle(record_id)
+        else:
+            _store_vehicle(record)
+    elif kind == 'trip':
+        _drop_trip(record_id)
+        if op == 'delete':
+            TRIP_TASKS.pop(record_id, None)
+        else:
+            _store_trip(record)
+    else:
+        _drop_task(record_id)
+        if op != 'delete':
+            _store_task(record)
+
+@span
+def sync_shared_state():
+    """多 worker 模式下同步其他 worker 已提交的变更，单进程模式下直接返回
+
+    车辆/行程/任务变更按全局版本号写入 CHANGE_LOG，/changes 与 WebSocket 推送因此覆盖所有 worker 的写入。
+    """
+    if not STORAGE.shared:
+        return
+    changes = STORAGE.poll()
+    if changes is None:
+        reload_data()
+        return
+    for revision, kind, op, record_id, record in changes:
+        _apply_remote(kind, op, record_id, record)
+        if kind == 'container':
+            CONTAINER_REVISION['revision'] = revision
+        else:
+            CHANGE_LOG.record(kind, op, record_id, revision)
+
+def get_vehicle(vehicle_id: str) -> Optional[dict]:
+    """根据ID获取车辆"""
+    return DB['vehicles'].get(vehicle_id)
+
+def get_trip(trip_id: str) -> Optional[dict]:
+    """根据ID获取行程"""
+    return DB['trips'].get(trip_id)
+
+def get_task(task_id: str) -> Optional[dict]:
+    """根据ID获取任务"""
+    return DB['tasks'].get(task_id)
+
+def get_trip_tasks(trip_id: str) -> List[dict]:
+    """获取行程下的任务"""
+    return [DB['tasks'][task_id] for task_id in TRIP_TASKS.get(trip_id, [])]
+
+def count_trip_tasks(trip_id: str) -> int:
+    """行程下的任务数量"""
+    return len(TRIP_TASKS.get(trip_id, []))
+
+def get_vehicle_ids() -> List[str]:
+    """全部车辆ID"""
+    return list(DB['vehicles'])
+
+def get_vehicle_trips(vehicle_id: str) -> List[dict]:
+    """获取车辆的全部行程"""
+    return [DB['trips'][trip_id] for trip_id in VEHICLE_TRIPS.get(vehicle_id, [])]
+
+@span
+def get_vehicles_by_time_range(range_start: datetime, range_end: datetime) -> List[Vehicle]:
     """根据时间范围获取车辆数据"""
+    range_start = _naive(range_start)
+    range_end = _naive(range_end)
+
     vehicles = []
-    
-    for vehicle_data in DB['vehicles']:
+    for vehicle_data in DB['vehicles'].values():
         vehicle_trips = []
-        
-        for trip_data in DB['trips']:
-            if trip_data['vehicleId'] == vehicle_data['id']:
-                # 检查行程是否在时间范围内
-                trip_start = datetime.strptime(trip_data['startTime'], '%Y-%m-%d %H:%M:%S')
-                trip_end = datetime.strptime(trip_data['endTime'], '%Y-%m-%d %H:%M:%S')
-                range_start = datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S')
-                range_end = datetime.strptime(end_time, '%Y-%m-%d %H:%M:%S')
-                
-                # 如果行程与时间范围有重叠
-                if not (trip_end <= range_start or trip_start >= range_end):
-                    trip_tasks = []
-                    for task_data in DB['tasks']:
-                        if task_data['tripId'] == trip_data['id']:
-                            # 转换时间字符串为datetime对象
-                            task_data_copy = task_data.copy()
-                            task_data_copy['planStart'] = datetime.strptime(task_data['planStart'], '%Y-%m-%d %H:%M:%S')
-                            task_data_copy['planEnd'] = datetime.strptime(task_data['planEnd'], '%Y-%m-%d %H:%M:%S')
-                            task = Task(**task_data_copy)
-                            trip_tasks.append(task)
-                    
-                    trip = Trip(
-                        id=trip_data['id'],
-                        vehicleId=trip_data['vehicleId'],
-                        driverId=trip_data.get('driverId'),
-                        startTime=datetime.strptime(trip_data['startTime'], '%Y-%m-%d %H:%M:%S'),
-                        endTime=datetime.strptime(trip_data['endTime'], '%Y-%m-%d %H:%M:%S'),
-                        fullLoad=trip_data['fullLoad'],
-                        tasks=trip_tasks
-                    )
-                    vehicle_trips.append(trip)
+        # 通过区间索引取出与时间范围重叠的行程
+        for trip_data in TRIP_INDEX.query(vehicle_data['id'], range_start, range_end):
+            trip_tasks = [Task(**task_data) for task_data in get_trip_tasks(trip_data['id'])]
+
+            trip = Trip(
+                id=trip_data['id'],
+                vehicleId=trip_data['vehicleId'],
+                driverId=trip_data.get('driverId'),
+                startTime=trip_data['startTime'],
+                endTime=trip_data['endTime'],
+                fullLoad=trip_data['fullLoad'],
+                tasks=trip_tasks
+            )
+            vehicle_trips.append(trip)
         
         vehicle = Vehicle(
             id=vehicle_data['id'],
@@ -421,126 +677,429 @@ def get_vehicles_by_time_range(start_time: str, end_time: str) -> List[Vehicle]:
     
     return vehicles
 
+# 甘特图输出字段及默认值（与 Task/Trip 模型一致）
+_TASK_DEFAULTS = tuple((name, field.default) for name, field in Task.model_fields.items())
+_TRIP_FIELDS = tuple(name for name in Trip.model_fields if name != 'tasks')
+
+def _task_payload(task_data: dict) -> dict:
+    task = {name: task_data.get(name, default) for name, default in _TASK_DEFAULTS}
+    for field in TASK_TIME_FIELDS:
+        task[field] = task[field].isoformat()
+    return task
+
+def _trip_payload(trip_data: dict) -> dict:
+    trip = {name: trip_data.get(name) for name in _TRIP_FIELDS}
+    for field in TRIP_TIME_FIELDS:
+        trip[field] = trip[field].isoformat()
+    trip['tasks'] = [_task_payload(task_data) for task_data in get_trip_tasks(trip_data['id'])]
+    return trip
+
+@span
+def get_vehicles_payload(range_start: datetime, range_end: datetime,
+                         vehicle_ids: Optional[List[str]] = None) -> List[dict]:
+    """直接从存储生成甘特图车辆数据（JSON 可编码的 dict），不经过 pydantic 模型
+
+    输出与 [v.dict() for v in get_vehicles_by_time_range(...)] 经 JSON 编码后一致。
+    """
+    range_start = _naive(range_start)
+    range_end = _naive(range_end)
+    if vehicle_ids is None:
+        vehicles = DB['vehicles'].values()
+    else:
+        wanted = set(vehicle_ids)
+        vehicles = [v for v in DB['vehicles'].values() if v['id'] in wanted]
+
+    return [_vehicle_payload(vehicle_data, range_start, range_end) for vehicle_data in vehicles]
+
+def _vehicle_payload(vehicle_data: dict, range_start: datetime, range_end: datetime) -> dict:
+    return {
+        'id': vehicle_data['id'],
+        'plateNumber': vehicle_data['plateNumber'],
+        'driverId': vehicle_data.get('driverId'),
+        'trips': [
+            _trip_payload(trip_data)
+            for trip_data in TRIP_INDEX.query(vehicle_data['id'], range_start, range_end)
+        ]
+    }
+
+@span
+def get_vehicles_page(range_start: datetime, range_end: datetime, cursor: Optional[str] = None,
+                      row_start: int = 0, limit: Optional[int] = None,
+                      empty: str = 'include') -> Tuple[List[dict], int, Optional[str]]:
+    """分页生成甘特图车辆数据，返回 (本页车辆, 总行数, 下一页游标)
+
+    行按车辆添加顺序排列；empty 为 omit 时不含时间范围内没有行程的车辆，
+    为 ids 时这些车辆只输出 {'id': ...}。cursor 为上一页最后一辆车的 ID（优先于 row_start），
+    游标车辆不存在时抛出 ValueError。只有本页的车辆生成行程数据。
+    """
+    range_start = _naive(range_start)
+    range_end = _naive(range_end)
+    if empty == 'omit':
+        rows = [v for v in DB['vehicles'].values() if TRIP_INDEX.overlaps(v['id'], range_start, range_end)]
+    else:
+        rows = list(DB['vehicles'].values())
+
+    if cursor is not None:
+        if cursor not in DB['vehicles']:
+            raise ValueError('游标已失效')
+        # 游标车辆在 omit 模式下可能已不在结果中，按添加顺序找到它之后的第一行
+        order = {vehicle_id: i for i, vehicle_id in enumerate(DB['vehicles'])}
+        row_start = bisect_right([order[v['id']] for v in rows], order[cursor])
+    row_end = len(rows) if limit is None else min(len(rows), row_start + limit)
+
+    page = []
+    for vehicle_data in rows[row_start:row_end]:
+        if empty == 'ids' and not TRIP_INDEX.overlaps(vehicle_data['id'], range_start, range_end):
+            page.append({'id': vehicle_data['id']})
+        else:
+            page.append(_vehicle_payload(vehicle_data, range_start, range_end))
+    next_cursor = rows[row_end - 1]['id'] if row_end < len(rows) and row_end > 0 else None
+    return page, len(rows), next_cursor
+
+def get_revision() -> int:
+    """车辆/行程/任务数据的当前版本号"""
+    return CHANGE_LOG.revision
+
+def get_data_version(kind: str) -> str:
+    """'fleet'（车辆/行程/任务）或 'containers' 的数据版本标识，数据变化后必然不同（用于 ETag 和响应缓存）
+
+    共享存储模式下取存储的全局版本号：各 worker 同步到同一版本时标识相同，重启后也不会重复。
+    单进程模式下内存中的计数在重启、重新加载后会重复，因此带上进程启动标识和全量装入次数。
+    """
+    if STORAGE.shared:
+        revision = CHANGE_LOG.revision if kind == 'fleet' else CONTAINER_REVISION['revision']
+        return f"r{revision}"
+    counter = CHANGE_LOG.revision if kind == 'fleet' else VERSIONS['containers']
+    return f"{BOOT_ID}-{VERSIONS['loads']}-{counter}"
+
+def _in_window(trip_data: dict, range_start: datetime, range_end: datetime) -> bool:
+    return trip_data['endTime'] > range_start and trip_data['startTime'] < range_end
+
+@span
+def get_changes(since: int, range_start: datetime, range_end: datetime) -> Optional[dict]:
+    """since 版本之后，时间范围内的增量变更；无法增量时返回 None（需全量刷新）"""
+    changes = CHANGE_LOG.since(since)
+    if changes is None:
+        return None
+    return build_changes_payload(changes, range_start, range_end)
+
+def build_changes_payload(changes: Iterable[Change], range_start: datetime, range_end: datetime,
+                          vehicle_ids: Optional[Set[str]] = None) -> dict:
+    """按当前数据生成变更记录的输出
+
+    行程/任务被删除、移出时间范围或不属于 vehicle_ids 时列入 removed；
+    车辆不受时间范围限制。
+    """
+    range_start = _naive(range_start)
+    range_end = _naive(range_end)
+
+    def visible(trip_data: Optional[dict]) -> bool:
+        return (
+            trip_data is not None
+            and _in_window(trip_data, range_start, range_end)
+            and (vehicle_ids is None or trip_data['vehicleId'] in vehicle_ids)
+        )
+
+    result = {
+        kind: {'upserted': [], 'removed': []} for kind in ('vehicles', 'trips', 'tasks')
+    }
+    for change in changes:
+        if change.kind == 'vehicle':
+            vehicle_data = DB['vehicles'].get(change.record_id)
+            if vehicle_ids is not None and change.record_id not in vehicle_ids:
+                continue
+            if vehicle_data is None:
+                result['vehicles']['removed'].append(change.record_id)
+            else:
+                result['vehicles']['upserted'].append({
+                    'id': vehicle_data['id'],
+                    'plateNumber': vehicle_data['plateNumber'],
+                    'driverId': vehicle_data.get('driverId'),
+                })
+        elif change.kind == 'trip':
+            trip_data = DB['trips'].get(change.record_id)
+            if visible(trip_data):
+                result['trips']['upserted'].append(_trip_payload(trip_data))
+            else:
+                result['trips']['removed'].append(change.record_id)
+        else:
+            task_data = DB['tasks'].get(change.record_id)
+            trip_data = task_data and DB['trips'].get(task_data['tripId'])
+            if visible(trip_data):
+                result['tasks']['upserted'].append(_task_payload(task_data))
+            else:
+                result['tasks']['removed'].append(change.record_id)
+    return result
+
+@span
+def get_visible_ids(range_start: datetime, range_end: datetime,
+                    vehicle_ids: Optional[Set[str]] = None) -> Tuple[Set[str], Set[str]]:
+    """时间范围内可见的 (行程ID集合, 任务ID集合)"""
+    range_start = _naive(range_start)
+    range_end = _naive(range_end)
+    trip_ids: Set[str] = set()
+    task_ids: Set[str] = set()
+    for vehicle_id in (DB['vehicles'] if vehicle_ids is None else vehicle_ids):
+        for trip_data in TRIP_INDEX.query(vehicle_id, range_start, range_end):
+            trip_ids.add(trip_data['id'])
+            task_ids.update(TRIP_TASKS.get(trip_data['id'], ()))
+    return trip_ids, task_ids
+
+@span
 def get_containers() -> List[Container]:
-    """获取所有容器"""
-    containers = []
-    for container_data in DB['containers']:
-        container = Container(**container_data)
-        containers.append(container)
-    return containers
+    """获取所有容器（返回缓存的模型实例，调用方不应修改）"""
+    return list(DB['containers'].values())
 
 def get_container_by_number(ctn_number: str) -> Optional[Container]:
-    """根据容器号获取容器信息"""
-    for container_data in DB['containers']:
-        if container_data['CTN NUMBER'] == ctn_number:
-            return Container(**container_data)
-    return None
+    """根据容器号获取容器信息（返回缓存的模型实例，调用方不应修改）"""
+    return DB['containers'].get(ctn_number)
+
+@span
+def get_container_json(ctn_number: str) -> Optional[bytes]:
+    """容器的 JSON 序列化结果（字段名输出，与 Container.dict() 一致），按容器缓存"""
+    cached = _CONTAINER_JSON.get(ctn_number)
+    if cached is None:
+        container = DB['containers'].get(ctn_number)
+        if container is None:
+            return None
+        cached = _CONTAINER_JSON[ctn_number] = container.model_dump_json().encode()
+    return cached
+
+def _search_container_numbers(keyword: Optional[str], filters: Optional[Dict[str, Optional[str]]],
+                              sort_by: Optional[str], descending: bool,
+                              offset: int, limit: Optional[int]) -> Tuple[int, List[str]]:
+    matched = CONTAINER_INDEX.search(keyword, filters)
+    if matched is None:
+        ctns = list(DB['containers'])
+    else:
+        ctns = CONTAINER_INDEX.ordered(matched)
+
+    if sort_by:
+        ctns.sort(key=lambda ctn: getattr(DB['containers'][ctn], sort_by) or '', reverse=descending)
+    elif descending:
+        ctns.reverse()
+
+    total = len(ctns)
+    page = ctns[offset:] if limit is None else ctns[offset:offset + limit]
+    return total, page
+
+@span
+def search_containers(keyword: Optional[str] = None, filters: Optional[Dict[str, Optional[str]]] = None,
+                      sort_by: Optional[str] = None, descending: bool = False,
+                      offset: int = 0, limit: Optional[int] = None) -> Tuple[int, List[Container]]:
+    """按关键词/字段筛选容器，返回 (总数, 当前页容器)
+
+    filters 使用原始字段名（如 'Terminal'），sort_by 使用模型字段名（如 'ctnNumber'）。
+    """
+    total, ctns = _search_container_numbers(keyword, filters, sort_by, descending, offset, limit)
+    return total, [DB['containers'][ctn] for ctn in ctns]
+
+@span
+def search_containers_json(keyword: Optional[str] = None, filters: Optional[Dict[str, Optional[str]]] = None,
+                           sort_by: Optional[str] = None, descending: bool = False,
+                           offset: int = 0, limit: Optional[int] = None) -> Tuple[int, bytes]:
+    """同 search_containers，但直接返回拼接好的 JSON 数组"""
+    total, ctns = _search_container_numbers(keyword, filters, sort_by, descending, offset, limit)
+    return total, b'[' + b','.join(get_container_json(ctn) for ctn in ctns) + b']'
+
+@span
+def get_containers_by_date(field: str, day: date) -> List[Container]:
+    """获取日期字段（'Last Free' / 'Last Dention' / 'Request Deliver Date'）为 day 的容器"""
+    ctns = CONTAINER_INDEX.ordered(CONTAINER_INDEX.on_date(field, day))
+    return [DB['containers'][ctn] for ctn in ctns]
+
+def get_container_dates(ctn_number: str) -> Dict[str, Optional[date]]:
+    """容器日期字段（Last Free / Last Dention / Request Deliver Date）写入时解析好的日期"""
+    return CONTAINER_INDEX.days.get(ctn_number, {})
+
+@span
+def get_planned_container_numbers() -> Set[str]:
+    """已有任务的容器号"""
+    return {task['containerNo'] for task in DB['tasks'].values() if task.get('containerNo')}
 
+@span
+def add_container(container: Union[dict, Container]) -> Container:
+    """添加或覆盖容器（写入时校验一次，之后读取不再校验）"""
+    container = _store_container(container)
+    _CONTAINER_JSON.pop(container.ctnNumber, None)
+    VERSIONS['containers'] += 1
+    _container_saved(STORAGE.save('container', container.model_dump(by_alias=True)))
+    return container
+
+@span
+def upsert_containers(containers: List[Container]) -> Tuple[int, int]:
+    """批量添加或覆盖已校验的容器，返回 (新增数, 更新数)
+
+    日期字段整批解析一次，搜索索引在同一遍中更新，版本号整批只递增一次。
+    """
+    records = [container.model_dump(by_alias=True) for container in containers]
+    dates = parse_container_dates(records, DATE_FIELDS)
+    inserted = updated = 0
+    for i, (container, record) in enumerate(zip(containers, records)):
+        if container.ctnNumber in DB['containers']:
+            updated += 1
+        else:
+            inserted += 1
+        _store_container(container, {field: dates[field][i] for field in DATE_FIELDS})
+        _CONTAINER_JSON.pop(container.ctnNumber, None)
+        _container_saved(STORAGE.save('container', record))
+    VERSIONS['containers'] += 1
+    return inserted, updated
+
+@span
+def delete_container(ctn_number: str) -> bool:
+    """删除容器"""
+    if not _drop_container(ctn_number):
+        return False
+    _container_saved(STORAGE.delete('container', ctn_number))
+    return True
+
+@span
+def add_vehicle(vehicle_data: dict) -> dict:
+    """添加车辆"""
+    _store_vehicle(vehicle_data)
+    _upserted('vehicle', vehicle_data)
+    return vehicle_data
+
+@span
+def update_vehicle(vehicle_id: str, plate_number: str, driver_id: str) -> Optional[dict]:
+    """更新车辆信息"""
+    vehicle_data = DB['vehicles'].get(vehicle_id)
+    if vehicle_data is None:
+        return None
+    vehicle_data['plateNumber'] = plate_number
+    vehicle_data['driverId'] = driver_id
+    _upserted('vehicle', vehicle_data)
+    return vehicle_data
+
+@span
+def delete_vehicle(vehicle_id: str) -> Optional[dict]:
+    """删除车辆"""
+    vehicle_data = _drop_vehicle(vehicle_id)
+    if vehicle_data is not None:
+        _deleted('vehicle', vehicle_id)
+    return vehicle_data
+
+@span
 def add_task(task_data: dict) -> Task:
     """添加任务"""
     task = Task(**task_data)
-    DB['tasks'].append(task.dict())
-    
-    # 更新行程数据
-    for trip_data in DB['trips']:
-        if trip_data['id'] == task_data['tripId']:
-            if 'tasks' not in trip_data:
-                trip_data['tasks'] = []
-            trip_data['tasks'].append(task.dict())
-            break
-    
+    task_dict = task.dict()
+    for field in TASK_TIME_FIELDS:
+        task_dict[field] = _naive(task_dict[field])
+    _store_task(task_dict)
+    _upserted('task', task_dict)
     return task
 
+@span
 def delete_task(task_id: str) -> bool:
     """删除任务"""
-    for i, task_data in enumerate(DB['tasks']):
-        if task_data['id'] == task_id:
-            DB['tasks'].pop(i)
-            
-            # 从行程数据中移除任务
-            for trip_data in DB['trips']:
-                if 'tasks' in trip_data:
-                    trip_data['tasks'] = [t for t in trip_data['tasks'] if t['id'] != task_id]
-            
-            return True
-    return False
+    if _drop_task(task_id) is None:
+        return False
+    _deleted('task', task_id)
+    return True
 
+@span
 def add_trip(trip_data: dict) -> Trip:
     """添加行程"""
     trip = Trip(**trip_data)
     trip_dict = trip.dict()
-    trip_dict['tasks'] = []  # 初始化任务列表
-    DB['trips'].append(trip_dict)
-    
-    # 更新车辆数据
-    for vehicle_data in DB['vehicles']:
-        if vehicle_data['id'] == trip_data['vehicleId']:
-            vehicle_data['trips'].append(trip_dict)
-            break
-    
+    trip_dict.pop('tasks', None)  # 任务通过 TRIP_TASKS 索引关联
+    for field in TRIP_TIME_FIELDS:
+        trip_dict[field] = _naive(trip_dict[field])
+    _store_trip(trip_dict)
+    _upserted('trip', trip_dict)
     return trip
 
+@span
 def delete_trip(trip_id: str) -> bool:
     """删除行程"""
+    if trip_id not in DB['trips']:
+        return False
+
     # 删除相关任务
-    DB['tasks'] = [task for task in DB['tasks'] if task['tripId'] != trip_id]
-    
-    # 删除行程
-    for i, trip_data in enumerate(DB['trips']):
-        if trip_data['id'] == trip_id:
-            DB['trips'].pop(i)
-            
-            # 从车辆数据中移除
-            for vehicle_data in DB['vehicles']:
-                vehicle_data['trips'] = [
-                    trip for trip in vehicle_data['trips'] 
-                    if trip['id'] != trip_id
-                ]
-            return True
-    return False
+    for task_id in TRIP_TASKS.pop(trip_id, []):
+        DB['tasks'].pop(task_id, None)
+        _deleted('task', task_id)
+
+    _drop_trip(trip_id)
+    _deleted('trip', trip_id)
+    return True
+
+@span
+def update_task(task_id: str, changes: dict) -> Optional[dict]:
+    """更新任务字段（可改所属行程），返回更新后的任务"""
+    task_data = DB['tasks'].get(task_id)
+    if task_data is None:
+        return None
+
+    old_trip_id = task_data['tripId']
+    for field in TASK_TIME_FIELDS:
+        if field in changes:
+            changes[field] = _naive(changes[field])
+    task_data.update(changes)
+
+    if task_data['tripId'] != old_trip_id:
+        old_task_ids = TRIP_TASKS.get(old_trip_id)
+        if old_task_ids and task_id in old_task_ids:
+            old_task_ids.remove(task_id)
+        TRIP_TASKS.setdefault(task_data['tripId'], []).append(task_id)
+
+    _upserted('task', task_data)
+    return task_data
+
+@span
+def update_trip(trip_id: str, changes: dict) -> Optional[dict]:
+    """更新行程字段（vehicleId / driverId / startTime / endTime / fullLoad），返回更新后的行程"""
+    trip_data = DB['trips'].get(trip_id)
+    if trip_data is None:
+        return None
+
+    old_vehicle_id = trip_data['vehicleId']
+    for field in TRIP_TIME_FIELDS:
+        if field in changes:
+            changes[field] = _naive(changes[field])
+    trip_data.update(changes)
+    _index_trip(trip_data)
+
+    # 更新车辆关系
+    new_vehicle_id = trip_data['vehicleId']
+    if old_vehicle_id != new_vehicle_id:
+        old_trip_ids = VEHICLE_TRIPS.get(old_vehicle_id)
+        if old_trip_ids and trip_id in old_trip_ids:
+            old_trip_ids.remove(trip_id)
+        VEHICLE_TRIPS.setdefault(new_vehicle_id, []).append(trip_id)
+
+    _upserted('trip', trip_data)
+    return trip_data
+
+def trip_pm_changes(trip_data: dict, new_pm_id: str, new_start_time: datetime) -> dict:
+    """拖拽改变车辆对应的字段修改"""
+    # 计算新的结束时间（保持时长不变）
+    duration = trip_data['endTime'] - trip_data['startTime']
+    new_start_time = _naive(new_start_time)
+    return {
+        'vehicleId': new_pm_id,
+        'startTime': new_start_time,
+        'endTime': new_start_time + duration,
+    }
+
+def trip_time_changes(new_start: datetime, new_end: datetime) -> dict:
+    """拖拽改变时间对应的字段修改"""
+    return {'startTime': _naive(new_start), 'endTime': _naive(new_end)}
 
 def update_trip_pm(trip_id: str, new_pm_id: str, new_start_time: datetime) -> bool:
     """更新行程车辆"""
-    for trip_data in DB['trips']:
-        if trip_data['id'] == trip_id:
-            old_vehicle_id = trip_data['vehicleId']
-            
-            # 计算新的结束时间（保持时长不变）
-            old_start = datetime.strptime(trip_data['startTime'], '%Y-%m-%d %H:%M:%S')
-            old_end = datetime.strptime(trip_data['endTime'], '%Y-%m-%d %H:%M:%S')
-            duration = old_end - old_start
-            new_end_time = new_start_time + duration
-            
-            # 更新行程数据
-            trip_data['vehicleId'] = new_pm_id
-            trip_data['startTime'] = new_start_time.strftime('%Y-%m-%d %H:%M:%S')
-            trip_data['endTime'] = new_end_time.strftime('%Y-%m-%d %H:%M:%S')
-            
-            # 更新车辆关系
-            # 从旧车辆移除
-            for vehicle_data in DB['vehicles']:
-                if vehicle_data['id'] == old_vehicle_id:
-                    vehicle_data['trips'] = [
-                        trip for trip in vehicle_data['trips'] 
-                        if trip['id'] != trip_id
-                    ]
-            
-            # 添加到新车辆
-            for vehicle_data in DB['vehicles']:
-                if vehicle_data['id'] == new_pm_id:
-                    vehicle_data['trips'].append(trip_data)
-            
-            return True
-    return False
+    trip_data = DB['trips'].get(trip_id)
+    if trip_data is None:
+        return False
+
+    update_trip(trip_id, trip_pm_changes(trip_data, new_pm_id, new_start_time))
+    return True
 
 def update_trip_time(trip_id: str, new_start: datetime, new_end: datetime) -> bool:
     """更新行程时间"""
-    for trip_data in DB['trips']:
-        if trip_data['id'] == trip_id:
-            trip_data['startTime'] = new_start.strftime('%Y-%m-%d %H:%M:%S')
-            trip_data['endTime'] = new_end.strftime('%Y-%m-%d %H:%M:%S')
-            return True
-    return False
-
-# 初始化示例数据
-init_sample_data()
+    return update_trip(trip_id, trip_time_changes(new_start, new_end)) is not None
+
+# 初始化数据
+init_data()
\ No newline at end of file
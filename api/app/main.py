@@ -1,12 +1,16 @@
 # FastAPI主应用
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import gantt, orders
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app import compression, metrics, profiler, shared_state
+from app.database import STORAGE
+from app.routers import admin, analytics, gantt, orders, ws
 
 app = FastAPI(
     title="BSB调度甘特系统API",
     description="BSB调度甘特系统的后端API服务",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=shared_state.lifespan
 )
 
 # 配置CORS
@@ -16,17 +20,45 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Revision", "X-Next-Cursor", "X-Profile-Id", "ETag"],
 )
 
+# 多 worker 共享存储模式下的数据同步；sqlite 模式下写请求响应前等待落盘（内存模式不注册）
+shared_state.install(app)
+
+# 响应压缩（按 Accept-Encoding 协商 br / gzip）
+if compression.ENABLED:
+    app.add_middleware(compression.CompressionMiddleware)
+
+# 请求耗时/响应大小统计（最外层，包含同步和 CORS 处理的耗时）
+if metrics.ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# 单请求采样（X-Profile 请求头，仅在配置了管理员令牌时注册）
+if profiler.ADMIN_TOKEN is not None:
+    app.add_middleware(profiler.RequestProfileMiddleware)
+
 # 注册路由
 app.include_router(gantt.router, prefix="/api/gantt", tags=["gantt"])
 app.include_router(orders.router, prefix="/api/orders", tags=["orders"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
+app.include_router(ws.router, tags=["realtime"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 @app.get("/health")
 async def health_check():
-    """健康检查接口"""
+    """健康检查接口（持久化存储不可用时返回 503）"""
+    if STORAGE.error is not None:
+        return JSONResponse(status_code=503, content={
+            "code": 503, "message": f"存储不可用: {STORAGE.error}", "data": {"status": "unhealthy"}
+        })
     return {"code": 0, "message": "ok", "data": {"status": "healthy"}}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Prometheus 指标"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/")
 async def root():
     """根路径"""
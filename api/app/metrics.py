@@ -0,0 +1,142 @@
+# 请求耗时与存储函数埋点，/metrics 以 Prometheus 文本格式输出
+#
+# BSB_METRICS=1（默认）记录每个路由的耗时直方图、响应大小直方图和进行中的请求数；
+# BSB_METRICS_SPANS=1 另外记录 database 中标注了 @span 的存储函数耗时（默认关闭，关闭时装饰器原样返回函数）。
+# 指标只在本进程内累计，多 worker 时由 Prometheus 分别抓取各 worker。
+import os
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, List, Tuple
+
+ENABLED = os.environ.get('BSB_METRICS', '1') == '1'
+SPANS_ENABLED = os.environ.get('BSB_METRICS_SPANS', '0') == '1'
+
+# 直方图桶上限（秒 / 字节）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+    """固定桶直方图；counts[i] 为落在第 i 个桶（不累计）的次数，最后一个为 +Inf"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str, out: List[str]):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            out.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        out.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        out.append(f'{name}_sum{{{labels}}} {self.sum}')
+        out.append(f'{name}_count{{{labels}}} {self.count}')
+
+
+# (method, 路由模板, 状态码) -> 直方图
+REQUEST_LATENCY: Dict[Tuple[str, str, int], Histogram] = {}
+RESPONSE_SIZE: Dict[Tuple[str, str], Histogram] = {}
+IN_FLIGHT: Dict[str, int] = {}
+# 存储函数名 -> 直方图
+STORE_LATENCY: Dict[str, Histogram] = {}
+
+
+def _histogram(family: dict, key, buckets) -> Histogram:
+    histogram = family.get(key)
+    if histogram is None:
+        histogram = family[key] = Histogram(buckets)
+    return histogram
+
+
+def span(func: Callable) -> Callable:
+    """存储函数耗时埋点（BSB_METRICS_SPANS=1 时生效）"""
+    if not SPANS_ENABLED:
+        return func
+    histogram = _histogram(STORE_LATENCY, func.__name__, LATENCY_BUCKETS)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        began = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - began)
+    return wrapper
+
+
+class MetricsMiddleware:
+    """ASGI 中间件：按路由模板（如 /api/gantt/trip/{trip_id}）统计，未匹配路由的请求记为 <unmatched>"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                size += len(message.get('body', b''))
+            await send(message)
+
+        IN_FLIGHT[method] = IN_FLIGHT.get(method, 0) + 1
+        began = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - began
+            IN_FLIGHT[method] -= 1
+            route = scope.get('route')
+            path = route.path if route is not None else '<unmatched>'
+            _histogram(REQUEST_LATENCY, (method, path, status), LATENCY_BUCKETS).observe(elapsed)
+            _histogram(RESPONSE_SIZE, (method, path), SIZE_BUCKETS).observe(size)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render() -> str:
+    """Prometheus 文本格式（0.0.4）"""
+    out = [
+        '# HELP bsb_http_request_duration_seconds HTTP request latency by route.',
+        '# TYPE bsb_http_request_duration_seconds histogram',
+    ]
+    for (method, path, status), histogram in sorted(REQUEST_LATENCY.items()):
+        histogram.render('bsb_http_request_duration_seconds',
+                         f'method="{method}",route="{_escape(path)}",status="{status}"', out)
+
+    out.append('# HELP bsb_http_response_size_bytes HTTP response body size by route.')
+    out.append('# TYPE bsb_http_response_size_bytes histogram')
+    for (method, path), histogram in sorted(RESPONSE_SIZE.items()):
+        histogram.render('bsb_http_response_size_bytes', f'method="{method}",route="{_escape(path)}"', out)
+
+    out.append('# HELP bsb_http_requests_in_flight HTTP requests currently being processed.')
+    out.append('# TYPE bsb_http_requests_in_flight gauge')
+    for method, count in sorted(IN_FLIGHT.items()):
+        out.append(f'bsb_http_requests_in_flight{{method="{method}"}} {count}')
+
+    if SPANS_ENABLED:
+        out.append('# HELP bsb_store_call_duration_seconds Store function latency.')
+        out.append('# TYPE bsb_store_call_duration_seconds histogram')
+        for name, histogram in sorted(STORE_LATENCY.items()):
+            histogram.render('bsb_store_call_duration_seconds', f'function="{name}"', out)
+    return '\n'.join(out) + '\n'
@@ -1,7 +1,7 @@
 # 数据模型定义
 from pydantic import BaseModel, Field
 from datetime import datetime, date
-from typing import Optional, List, Literal, Any
+from typing import Optional, List, Literal, Any, Dict
 
 # 任务类型
 TaskType = Literal[
@@ -114,6 +114,13 @@ class DragTimePayload(BaseModel):
     newStart: datetime
     newEnd: datetime
 
+# 拖拽预览请求：给出 newPmId 时同 /drag/pm（newStart 为新开始时间，保持时长），否则同 /drag/time
+class DragPreviewPayload(BaseModel):
+    tripId: str
+    newPmId: Optional[str] = None
+    newStart: datetime
+    newEnd: Optional[datetime] = None
+
 # 车辆刷新请求
 class VehicleRefreshRequest(BaseModel):
     vehicleIds: List[str]
@@ -132,4 +139,33 @@ class ApiResponse(BaseModel):
 
 # 时间查询格式
 class DateRequest(BaseModel):
-    query_date: date
\ No newline at end of file
+    query_date: date
+
+# 日期范围查询格式
+class DateRangeRequest(BaseModel):
+    start_date: date
+    end_date: date
+
+# 批量操作
+class BatchOperation(BaseModel):
+    op: Literal['create', 'update', 'delete']
+    kind: Literal['trip', 'task']
+    id: Optional[str] = None            # update / delete 的目标；create 时可选，不传自动生成
+    ref: Optional[str] = None           # 本批内的引用名，任务可通过 tripRef 指向同批新建的行程
+    fields: Dict[str, Any] = {}         # create / update 的字段
+
+# 批量操作请求
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(max_length=1000)
+
+# 自动排班请求
+class OptimizeRequest(BaseModel):
+    date: date
+    containerNos: Optional[List[str]] = Field(None, max_length=5000)  # 不传则取任务类型的截止字段当天到期且未排任务的容器
+    vehicleIds: Optional[List[str]] = None                            # 不传则使用全部车辆
+    taskType: TaskType = 'Client'
+    taskMinutes: int = Field(60, ge=5, le=480)
+    startHour: int = Field(6, ge=0, le=23)
+    endHour: int = Field(20, ge=1, le=24)
+    timeBudgetMs: int = Field(2000, ge=10, le=10000)
+    seed: int = 0
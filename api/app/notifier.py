@@ -0,0 +1,109 @@
+# 甘特图变更推送
+import asyncio
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from app import database
+from app.changelog import Change, ChangeLog
+
+# 合并窗口：拖拽过程中的连续更新只推送最后状态
+COALESCE_SECONDS = 0.03
+# 单个客户端积压的记录数上限，超过后改发 reset 让客户端全量刷新
+MAX_PENDING = 2000
+
+
+class Subscriber:
+    """单个 WebSocket 客户端的订阅状态"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.range: Optional[Tuple[datetime, datetime]] = None
+        self.vehicle_ids: Optional[Set[str]] = None
+        self.pending: Dict[Tuple[str, str], Change] = {}
+        self.overflow = False
+        self.wakeup = asyncio.Event()
+        # 客户端当前持有的行程/任务，只对这些发送 removed
+        self.known_trips: Set[str] = set()
+        self.known_tasks: Set[str] = set()
+
+    def subscribe(self, range_start: datetime, range_end: datetime,
+                  vehicle_ids: Optional[Iterable[str]] = None):
+        """设置订阅范围（客户端应在此之后用 /vehicles 拉取一次全量）"""
+        self.range = (range_start, range_end)
+        self.vehicle_ids = set(vehicle_ids) if vehicle_ids is not None else None
+        self.pending.clear()
+        self.overflow = False
+        self.known_trips, self.known_tasks = database.get_visible_ids(
+            range_start, range_end, self.vehicle_ids
+        )
+
+    def push(self, change: Change):
+        if self.range is None or self.overflow:
+            return
+        # 同一记录只保留最后一次变更
+        self.pending[(change.kind, change.record_id)] = change
+        if len(self.pending) > MAX_PENDING:
+            self.overflow = True
+            self.pending.clear()
+        self.wakeup.set()
+
+    def take(self) -> Optional[dict]:
+        """取出积压的变更并生成推送消息，没有需要推送的内容时返回 None"""
+        if self.overflow:
+            self.overflow = False
+            return {'type': 'reset', 'revision': database.get_revision()}
+        if not self.pending:
+            return None
+
+        changes = sorted(self.pending.values())
+        self.pending.clear()
+        payload = database.build_changes_payload(changes, *self.range, vehicle_ids=self.vehicle_ids)
+
+        trips = payload['trips']
+        trips['removed'] = [trip_id for trip_id in trips['removed'] if trip_id in self.known_trips]
+        self.known_trips.difference_update(trips['removed'])
+        for trip in trips['upserted']:
+            self.known_trips.add(trip['id'])
+            self.known_tasks.update(task['id'] for task in trip['tasks'])
+
+        tasks = payload['tasks']
+        tasks['removed'] = [task_id for task_id in tasks['removed'] if task_id in self.known_tasks]
+        self.known_tasks.difference_update(tasks['removed'])
+        self.known_tasks.update(task['id'] for task in tasks['upserted'])
+
+        if not any(group['upserted'] or group['removed'] for group in payload.values()):
+            return None
+        return {'type': 'changes', 'revision': changes[-1].revision, **payload}
+
+
+class GanttNotifier:
+    """把变更日志分发给所有 WebSocket 订阅者"""
+
+    def __init__(self):
+        self.subscribers: Set[Subscriber] = set()
+
+    def attach(self, change_log: ChangeLog):
+        change_log.subscribe(self._on_change)
+
+    def add(self, loop: asyncio.AbstractEventLoop) -> Subscriber:
+        subscriber = Subscriber(loop)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def remove(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def _on_change(self, change: Change):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for subscriber in list(self.subscribers):
+            if subscriber.loop is running:
+                subscriber.push(change)
+            else:
+                subscriber.loop.call_soon_threadsafe(subscriber.push, change)
+
+
+NOTIFIER = GanttNotifier()
+NOTIFIER.attach(database.CHANGE_LOG)
@@ -0,0 +1,329 @@
+# 自动排班：把容器分配到车辆行程
+#
+# 每个容器生成一个任务，每个行程最多 MAX_TRIP_TASKS 个任务、任务首尾相接；
+# 行程只能放在车辆现有行程之间的空档内（工作时段内，互不重叠）。
+# 截止时间取任务类型对应的容器日期字段（conflicts.TASK_DEADLINE_FIELDS，与冲突检查一致）当天 24:00，
+# 没有对应字段的任务类型不设截止时间。
+#
+# 求解：按截止时间贪心构造初始解，再在时间预算内做局部搜索（任务移动/交换、行程换车/换位），
+# 只接受不变差的改动，每次只重算受影响的车辆。
+# 结果是预览：operations 可直接提交给 /api/gantt/batch。
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app import database
+from app.batch import MAX_TRIP_TASKS
+from app.conflicts import TASK_DEADLINE_FIELDS
+from app.models import TaskType
+
+# 代价权重：未能排入 >> 超期数 >> 超期分钟数 >> 完成时间
+UNSCHEDULED_PENALTY = 1e9
+LATE_PENALTY = 1e5
+TARDINESS_PENALTY = 1.0
+FINISH_WEIGHT = 1e-3
+
+# 每隔多少次迭代检查一次时间预算
+CHECK_EVERY = 64
+
+
+class _Job:
+    __slots__ = ('ctn', 'deadline')
+
+    def __init__(self, ctn: str, deadline: Optional[datetime]):
+        self.ctn = ctn
+        self.deadline = deadline
+
+
+class _Vehicle:
+    """车辆的工作时段空档和已排行程序列"""
+
+    __slots__ = ('id', 'driver_id', 'busy', 'trips', 'cost', 'schedule')
+
+    def __init__(self, vehicle_id: str, driver_id: Optional[str], busy: List[Tuple[datetime, datetime]]):
+        self.id = vehicle_id
+        self.driver_id = driver_id
+        self.busy = busy
+        self.trips: List[List[int]] = []
+        self.cost = 0.0
+        self.schedule: List[Optional[Tuple[datetime, datetime]]] = []
+
+
+class _Solver:
+    def __init__(self, jobs: List[_Job], vehicles: List[_Vehicle], horizon: Tuple[datetime, datetime],
+                 task_duration: timedelta, task_type: TaskType, unknown: List[str], rng: random.Random):
+        self.jobs = jobs
+        self.vehicles = vehicles
+        self.horizon = horizon
+        self.task_duration = task_duration
+        self.task_type = task_type
+        self.unknown = unknown
+        self.rng = rng
+        # 本次改动前受影响车辆的状态，用于回退
+        self.saved: Dict[str, tuple] = {}
+
+    # ---- 评估 ----
+    def _earliest_slot(self, vehicle: _Vehicle, cursor: datetime, duration: timedelta) -> Optional[datetime]:
+        """cursor 之后第一个能放下 duration 的空档起点"""
+        for busy_start, busy_end in vehicle.busy:
+            if busy_end <= cursor:
+                continue
+            if cursor + duration <= busy_start:
+                break
+            cursor = busy_end
+        return cursor if cursor + duration <= self.horizon[1] else None
+
+    def _sort_trip(self, trip: List[int]):
+        # 行程内按截止时间先后执行（对超期最优）
+        trip.sort(key=lambda j: self.jobs[j].deadline or datetime.max)
+
+    def evaluate(self, vehicle: _Vehicle):
+        """按行程顺序依次放入最早空档，计算车辆代价"""
+        cost = 0.0
+        cursor = self.horizon[0]
+        schedule = []
+        for trip in vehicle.trips:
+            self._sort_trip(trip)
+            duration = self.task_duration * len(trip)
+            start = self._earliest_slot(vehicle, cursor, duration)
+            if start is None:
+                schedule.append(None)
+                cost += UNSCHEDULED_PENALTY * len(trip)
+                continue
+            schedule.append((start, start + duration))
+            cursor = start + duration
+            for k, j in enumerate(trip):
+                deadline = self.jobs[j].deadline
+                end = start + self.task_duration * (k + 1)
+                if deadline is not None and end > deadline:
+                    cost += LATE_PENALTY + TARDINESS_PENALTY * (end - deadline).total_seconds() / 60
+            cost += FINISH_WEIGHT * (cursor - self.horizon[0]).total_seconds() / 60
+        vehicle.cost = cost
+        vehicle.schedule = schedule
+
+    def total_cost(self) -> float:
+        return sum(vehicle.cost for vehicle in self.vehicles)
+
+    # ---- 贪心构造 ----
+    def construct(self):
+        """按截止时间顺序两两组成行程，放到完成最早的车辆"""
+        order = sorted(range(len(self.jobs)), key=lambda j: self.jobs[j].deadline or datetime.max)
+        cursors = {vehicle.id: self.horizon[0] for vehicle in self.vehicles}
+        for i in range(0, len(order), MAX_TRIP_TASKS):
+            trip = order[i:i + MAX_TRIP_TASKS]
+            duration = self.task_duration * len(trip)
+            best = None
+            for vehicle in self.vehicles:
+                start = self._earliest_slot(vehicle, cursors[vehicle.id], duration)
+                if start is not None and (best is None or start < best[0]):
+                    best = (start, vehicle)
+            vehicle = best[1] if best is not None else min(self.vehicles, key=lambda v: len(v.trips))
+            vehicle.trips.append(trip)
+            if best is not None:
+                cursors[vehicle.id] = best[0] + duration
+        for vehicle in self.vehicles:
+            self.evaluate(vehicle)
+
+    # ---- 局部搜索 ----
+    def _random_trip(self) -> Optional[Tuple[_Vehicle, int]]:
+        candidates = [vehicle for vehicle in self.vehicles if vehicle.trips]
+        if not candidates:
+            return None
+        vehicle = self.rng.choice(candidates)
+        return vehicle, self.rng.randrange(len(vehicle.trips))
+
+    def _save(self, *vehicles: _Vehicle):
+        for vehicle in vehicles:
+            if vehicle.id not in self.saved:
+                self.saved[vehicle.id] = ([list(trip) for trip in vehicle.trips], vehicle.cost, vehicle.schedule)
+
+    def _move(self) -> Optional[Sequence[_Vehicle]]:
+        """随机做一次改动，返回受影响的车辆；没有可做的改动时返回 None"""
+        picked = self._random_trip()
+        if picked is None:
+            return None
+        source, ti = picked
+        target = self.rng.choice(self.vehicles)
+        kind = self.rng.random()
+        self._save(source, target)
+
+        if kind < 0.35:
+            # 行程换车 / 换位置
+            trip = source.trips.pop(ti)
+            target.trips.insert(self.rng.randint(0, len(target.trips)), trip)
+        elif kind < 0.7:
+            # 单个任务移到另一个行程（或新建行程）
+            trip = source.trips[ti]
+            job = trip.pop(self.rng.randrange(len(trip)))
+            if not trip:
+                source.trips.pop(ti)
+            open_trips = [k for k, t in enumerate(target.trips) if len(t) < MAX_TRIP_TASKS and t is not trip]
+            if open_trips and self.rng.random() < 0.7:
+                target.trips[self.rng.choice(open_trips)].append(job)
+            else:
+                target.trips.insert(self.rng.randint(0, len(target.trips)), [job])
+        else:
+            # 两个行程间交换任务
+            other = self._random_trip()
+            if other is None:
+                return None
+            target, tj = other
+            self._save(target)
+            a, b = source.trips[ti], target.trips[tj]
+            if a is b:
+                return None
+            ka, kb = self.rng.randrange(len(a)), self.rng.randrange(len(b))
+            a[ka], b[kb] = b[kb], a[ka]
+        return (source,) if source is target else (source, target)
+
+    def improve(self, deadline: float) -> int:
+        """在 deadline（time.perf_counter）前做局部搜索，返回迭代次数"""
+        iterations = 0
+        while True:
+            if iterations % CHECK_EVERY == 0 and time.perf_counter() >= deadline:
+                return iterations
+            iterations += 1
+
+            self.saved.clear()
+            touched = self._move()
+            if touched is None:
+                if not any(vehicle.trips for vehicle in self.vehicles):
+                    return iterations
+                continue
+            before = sum(self.saved[vehicle.id][1] for vehicle in touched)
+            for vehicle in touched:
+                self.evaluate(vehicle)
+            if sum(vehicle.cost for vehicle in touched) > before:
+                for vehicle in touched:
+                    vehicle.trips, vehicle.cost, vehicle.schedule = self.saved[vehicle.id]
+
+
+def _container_deadline(ctn: str, field: Optional[str]) -> Optional[datetime]:
+    day = database.get_container_dates(ctn).get(field) if field is not None else None
+    return datetime.combine(day + timedelta(days=1), datetime.min.time()) if day is not None else None
+
+
+def _default_containers(day: date, field: Optional[str]) -> List[str]:
+    """field 当天到期且尚未排任务的容器（任务类型没有截止字段时为空）"""
+    if field is None:
+        return []
+    planned = database.get_planned_container_numbers()
+    return [container.ctnNumber for container in database.get_containers_by_date(field, day)
+            if container.ctnNumber not in planned]
+
+
+def prepare(day: date, container_nos: Optional[List[str]] = None, vehicle_ids: Optional[List[str]] = None,
+            task_type: TaskType = 'Client', task_minutes: int = 60, start_hour: int = 6, end_hour: int = 20,
+            seed: int = 0) -> _Solver:
+    """从存储中读取容器截止时间和车辆已占用时段，构造求解器（之后求解不再访问存储）
+
+    已占用时段包括车辆自己的行程和该车司机在其他车辆上的行程；工作时段从当前时间之后开始，不排到过去。
+    """
+    day_start = datetime.combine(day, datetime.min.time())
+    end = day_start + timedelta(hours=end_hour)
+    now = datetime.now().replace(second=0, microsecond=0) + timedelta(minutes=1)
+    start = min(max(day_start + timedelta(hours=start_hour), now), end)
+    horizon = (start, end)
+    deadline_field = TASK_DEADLINE_FIELDS.get(task_type)
+    if container_nos is None:
+        container_nos = _default_containers(day, deadline_field)
+    container_nos = list(dict.fromkeys(container_nos))
+    unknown = [ctn for ctn in container_nos if database.get_container_by_number(ctn) is None]
+    jobs = [_Job(ctn, _container_deadline(ctn, deadline_field)) for ctn in container_nos
+            if database.get_container_by_number(ctn) is not None]
+
+    vehicles = []
+    for vehicle_id in (vehicle_ids if vehicle_ids is not None else database.get_vehicle_ids()):
+        vehicle_data = database.get_vehicle(vehicle_id)
+        if vehicle_data is None:
+            continue
+        trips = {trip['id']: trip for trip in database.TRIP_INDEX.query(vehicle_id, *horizon)}
+        driver_id = vehicle_data.get('driverId')
+        if driver_id:
+            trips.update((trip['id'], trip) for trip in database.DRIVER_TRIP_INDEX.query(driver_id, *horizon))
+        busy = sorted((trip['startTime'], trip['endTime']) for trip in trips.values())
+        vehicles.append(_Vehicle(vehicle_id, driver_id, busy))
+
+    return _Solver(jobs, vehicles, horizon, timedelta(minutes=task_minutes), task_type, unknown,
+                   random.Random(seed))
+
+
+def solve(solver: _Solver, time_budget: float = 2.0) -> dict:
+    """贪心构造 + 局部搜索，生成排班预览
+
+    返回 {operations, trips, unassigned, unknown, summary}：
+    operations 为 /api/gantt/batch 的操作列表；trips 为每个新行程的安排及各任务是否超期；
+    unassigned 为工作时段内排不下的容器，unknown 为不存在的容器号。
+    """
+    started = time.perf_counter()
+    jobs, vehicles, task_duration = solver.jobs, solver.vehicles, solver.task_duration
+    iterations = 0
+    if jobs and vehicles:
+        solver.construct()
+        initial_cost = solver.total_cost()
+        iterations = solver.improve(started + time_budget)
+    else:
+        initial_cost = 0.0
+
+    operations = []
+    trips = []
+    unassigned = [] if vehicles else [job.ctn for job in jobs]
+    late = 0
+    for vehicle in vehicles:
+        for trip, slot in zip(vehicle.trips, vehicle.schedule):
+            if slot is None:
+                unassigned.extend(jobs[j].ctn for j in trip)
+                continue
+            ref = f'trip{len(trips) + 1}'
+            start, end = slot
+            operations.append({'op': 'create', 'kind': 'trip', 'ref': ref, 'fields': {
+                'vehicleId': vehicle.id, 'driverId': vehicle.driver_id,
+                'startTime': start.isoformat(), 'endTime': end.isoformat(), 'fullLoad': 'N',
+            }})
+            tasks = []
+            for k, j in enumerate(trip):
+                job = jobs[j]
+                plan_start = start + task_duration * k
+                plan_end = plan_start + task_duration
+                is_late = job.deadline is not None and plan_end > job.deadline
+                late += is_late
+                operations.append({'op': 'create', 'kind': 'task', 'fields': {
+                    'tripRef': ref, 'containerNo': job.ctn, 'taskType': solver.task_type,
+                    'planStart': plan_start.isoformat(), 'planEnd': plan_end.isoformat(),
+                }})
+                tasks.append({
+                    'containerNo': job.ctn,
+                    'planStart': plan_start.isoformat(), 'planEnd': plan_end.isoformat(),
+                    'deadline': job.deadline.isoformat() if job.deadline else None,
+                    'late': is_late,
+                })
+            trips.append({'ref': ref, 'vehicleId': vehicle.id, 'startTime': start.isoformat(),
+                          'endTime': end.isoformat(), 'tasks': tasks})
+
+    trips.sort(key=lambda trip: (trip['vehicleId'], trip['startTime']))
+    return {
+        'operations': operations,
+        'trips': trips,
+        'unassigned': unassigned,
+        'unknown': solver.unknown,
+        'summary': {
+            'containers': len(jobs),
+            'vehicles': len(vehicles),
+            'trips': len(trips),
+            'late': late,
+            'unassigned': len(unassigned),
+            'initialCost': round(initial_cost, 3),
+            'cost': round(solver.total_cost(), 3),
+            'iterations': iterations,
+            'elapsedMs': round((time.perf_counter() - started) * 1000, 1),
+        },
+    }
+
+
+def optimize(day: date, container_nos: Optional[List[str]] = None, vehicle_ids: Optional[List[str]] = None,
+             task_type: TaskType = 'Client', task_minutes: int = 60, start_hour: int = 6, end_hour: int = 20,
+             time_budget: float = 2.0, seed: int = 0) -> dict:
+    """prepare + solve"""
+    solver = prepare(day, container_nos, vehicle_ids, task_type, task_minutes, start_hour, end_hour, seed)
+    return solve(solver, time_budget)
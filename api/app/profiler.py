@@ -0,0 +1,144 @@
+# 采样分析器：在运行中的进程里按固定间隔抓取事件循环线程的调用栈，输出折叠栈（collapsed stacks）
+#
+# 输出每行 "根帧;...;叶帧 次数"，可直接交给 flamegraph.pl / speedscope / inferno 生成火焰图。
+# 采样期间临时调小解释器的线程切换间隔，否则事件循环线程忙时采样线程最多每 5ms 才能拿到一次 GIL。
+# 只采样事件循环线程：同一时间段内其他请求的代码也会出现在结果中。
+#
+# 仅供管理员使用：需要设置环境变量 BSB_ADMIN_TOKEN，请求头 X-Admin-Token 与之相同才允许采样。
+import os
+import secrets
+import sys
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+ADMIN_TOKEN = os.environ.get('BSB_ADMIN_TOKEN') or None
+
+# 单次采样最长时间（秒）和默认采样间隔（秒）
+MAX_SECONDS = 60
+DEFAULT_INTERVAL = 0.005
+# 单请求采样的间隔和保留的结果数
+REQUEST_INTERVAL = 0.001
+MAX_REQUEST_PROFILES = 20
+# 采样期间使用的线程切换间隔
+SWITCH_INTERVAL = 0.0005
+
+# 单请求采样结果：profile_id -> 折叠栈文本
+REQUEST_PROFILES: 'OrderedDict[str, str]' = OrderedDict()
+
+_switch_lock = threading.Lock()
+_active = 0
+_saved_switch_interval = sys.getswitchinterval()
+
+
+def is_admin(token: Optional[str]) -> bool:
+    """token 为按 latin-1 解码的请求头；按字节比较（compare_digest 不接受含非 ASCII 字符的 str）"""
+    if ADMIN_TOKEN is None or token is None:
+        return False
+    return secrets.compare_digest(token.encode('latin-1', 'replace'), ADMIN_TOKEN.encode())
+
+
+def _frame_label(code) -> str:
+    # 只保留路径最后两级，火焰图工具以空格分隔次数，所以标签中不能有空格
+    path = '/'.join(code.co_filename.replace('\\', '/').rsplit('/', 2)[-2:])
+    return f'{code.co_name}@{path}:{code.co_firstlineno}'.replace(' ', '_')
+
+
+class Sampler:
+    """按 interval 秒采样 thread_id 线程的调用栈"""
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='bsb-profiler', daemon=True)
+
+    def start(self):
+        global _active
+        with _switch_lock:
+            if _active == 0:
+                global _saved_switch_interval
+                _saved_switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(min(_saved_switch_interval, SWITCH_INTERVAL))
+            _active += 1
+        self._thread.start()
+
+    def stop(self):
+        global _active
+        self._stop.set()
+        self._thread.join()
+        with _switch_lock:
+            _active -= 1
+            if _active == 0:
+                sys.setswitchinterval(_saved_switch_interval)
+
+    def _run(self):
+        labels: Dict[object, str] = {}
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            del frame
+            stack.reverse()
+            self.counts[';'.join(stack)] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return ''.join(f'{stack} {count}\n' for stack, count in self.counts.most_common())
+
+
+def _save_request_profile(profile_id: str, sampler: Sampler):
+    REQUEST_PROFILES[profile_id] = sampler.collapsed()
+    while len(REQUEST_PROFILES) > MAX_REQUEST_PROFILES:
+        REQUEST_PROFILES.popitem(last=False)
+
+
+class RequestProfileMiddleware:
+    """请求头带 X-Profile: 1 且管理员令牌正确时，采样该请求处理期间的事件循环线程（未设置 BSB_ADMIN_TOKEN 时不注册）
+
+    响应头 X-Profile-Id 给出结果编号，通过 GET /api/admin/profile/{profile_id} 取回折叠栈。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope['headers'])
+        if headers.get(b'x-profile') not in (b'1', b'true') or \
+                not is_admin(headers.get(b'x-admin-token', b'').decode('latin-1') or None):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = str(uuid.uuid4())
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = list(message.get('headers', [])) + [
+                    (b'x-profile-id', profile_id.encode())
+                ]
+            await send(message)
+
+        sampler = Sampler(threading.get_ident(), REQUEST_INTERVAL)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # stop 需要等待采样线程退出，不在事件循环线程中阻塞
+            await run_in_threadpool(sampler.stop)
+            _save_request_profile(profile_id, sampler)
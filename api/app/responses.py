@@ -0,0 +1,103 @@
+# 预序列化 JSON 响应、条件请求（ETag）与响应缓存
+import json
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from fastapi import Request, Response
+
+try:
+    import orjson
+except ImportError:  # 可选依赖，未安装时使用标准库
+    orjson = None
+
+
+def dumps_json(obj: Any) -> bytes:
+    """把由 dict/list/str/数字/None 组成的数据编码为 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def json_api_response(data_json: bytes, code: int = 0, message: str = "ok",
+                      headers: Optional[Dict[str, str]] = None) -> Response:
+    """用已序列化好的 data 拼出 ApiResponse 格式的响应，跳过模型校验与二次编码"""
+    body = b'{"code":%d,"message":%s,"data":%s}' % (
+        code, json.dumps(message, ensure_ascii=False).encode(), data_json
+    )
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """已生成响应体的 LRU 缓存，键中包含数据版本，数据变化后旧条目自然不再命中并逐步被淘汰"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries: 'OrderedDict[Tuple, Tuple[bytes, Dict[str, str]]]' = OrderedDict()
+
+    def get(self, key: Tuple) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Tuple, body: bytes, headers: Dict[str, str]):
+        if len(body) > self.max_bytes // 4:
+            return  # 过大的响应不缓存，避免挤掉其他条目
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old[0])
+        self.entries[key] = (body, headers)
+        self.size += len(body)
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            _, (evicted, _) = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+
+RESPONSE_CACHE = ResponseCache()
+
+# 缓存响应时不保存的头（由 Response 重新生成）
+_UNCACHED_HEADERS = ('content-length', 'content-type')
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 是否包含 etag（弱比较）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    value = etag[2:] if etag.startswith('W/') else etag
+    return any(
+        (tag[2:] if tag.startswith('W/') else tag) == value
+        for tag in (item.strip() for item in if_none_match.split(','))
+    )
+
+
+def cached_json_response(request: Request, version: str, build: Callable[[], Any]) -> Any:
+    """按数据版本处理条件请求并缓存响应
+
+    If-None-Match 命中时直接返回 304，不调用 build；否则按 (路径, 查询参数, 版本) 查缓存，
+    未命中时调用 build，成功的 Response（状态 200）存入缓存。build 返回其他结果（如错误的 ApiResponse）时原样返回。
+    """
+    etag = f'W/"{version}"'
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers=headers)
+
+    key = (request.url.path, request.url.query, version)
+    cached = RESPONSE_CACHE.get(key)
+    if cached is not None:
+        body, cached_headers = cached
+        return Response(content=body, media_type="application/json", headers={**cached_headers, **headers})
+
+    response = build()
+    if isinstance(response, Response) and response.status_code == 200:
+        RESPONSE_CACHE.put(key, response.body, {
+            name: value for name, value in response.headers.items() if name not in _UNCACHED_HEADERS
+        })
+        response.headers.update(headers)
+    return response
@@ -0,0 +1,53 @@
+# 管理接口（需要 BSB_ADMIN_TOKEN）
+import asyncio
+import threading
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from app import profiler
+from app.models import ApiResponse
+
+router = APIRouter()
+
+# 同一时间只允许一个定时采样
+_profile_lock = asyncio.Lock()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if profiler.ADMIN_TOKEN is None:
+        raise HTTPException(status_code=403, detail="未配置管理员令牌（BSB_ADMIN_TOKEN）")
+    if not profiler.is_admin(x_admin_token):
+        raise HTTPException(status_code=401, detail="管理员令牌无效")
+
+
+@router.get("/profile", dependencies=[Depends(require_admin)])
+async def profile_event_loop(
+    seconds: float = Query(10, gt=0, le=profiler.MAX_SECONDS, description="采样时长（秒）"),
+    intervalMs: float = Query(profiler.DEFAULT_INTERVAL * 1000, ge=0.5, le=100, description="采样间隔（毫秒）")
+):
+    """采样事件循环线程 seconds 秒，返回折叠栈文本（flamegraph.pl / speedscope 可直接读取）"""
+    if _profile_lock.locked():
+        return ApiResponse(code=40005, message="已有采样在进行", data=None)
+    async with _profile_lock:
+        sampler = profiler.Sampler(threading.get_ident(), intervalMs / 1000)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await run_in_threadpool(sampler.stop)
+    return PlainTextResponse(sampler.collapsed(), headers={
+        'X-Profile-Samples': str(sampler.samples),
+        'Content-Disposition': 'attachment; filename="profile.folded"',
+    })
+
+
+@router.get("/profile/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_request_profile(profile_id: str):
+    """取回带 X-Profile 请求头的单个请求的采样结果"""
+    collapsed = profiler.REQUEST_PROFILES.get(profile_id)
+    if collapsed is None:
+        return ApiResponse(code=404, message="采样结果不存在", data=None)
+    return PlainTextResponse(collapsed)
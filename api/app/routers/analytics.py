@@ -0,0 +1,20 @@
+# 运营指标API路由
+from fastapi import APIRouter, HTTPException
+from app.analytics import MAX_DAYS, get_kpis
+from app.models import ApiResponse, DateRangeRequest
+from app.responses import dumps_json, json_api_response
+
+router = APIRouter()
+
+@router.post("/kpis")
+async def get_fleet_kpis(request: DateRangeRequest):
+    """日期范围内的车辆/司机利用率、空闲间隔、每日任务数、送货准时率和滞箱/滞期风险"""
+    try:
+        if request.start_date > request.end_date:
+            return ApiResponse(code=40001, message="开始日期不能晚于结束日期", data=None)
+        if (request.end_date - request.start_date).days >= MAX_DAYS:
+            return ApiResponse(code=40001, message="日期范围不能超过一年", data=None)
+
+        return json_api_response(dumps_json(get_kpis(request.start_date, request.end_date)))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取运营指标失败: {str(e)}")
@@ -1,58 +1,142 @@
 # 甘特图相关API路由
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Literal, Optional
 from app.models import (
     ApiResponse, TimeRange, TaskCreate, TripCreate, 
-    DragPmPayload, DragTimePayload, VehicleRefreshRequest, VehicleCreateRequest
+    DragPmPayload, DragTimePayload, DragPreviewPayload, VehicleRefreshRequest, VehicleCreateRequest, BatchRequest,
+    OptimizeRequest
 )
+from app.batch import validate_batch, apply_batch, batch_conflicts
+from app.columnar import encode_rows
+from app.conflicts import (
+    CONFLICT_MODE, check_trip_change, find_trip_conflicts, preview_trip_change, scan_conflicts
+)
+from app.summary import MAX_BUCKETS as SUMMARY_MAX_BUCKETS, bucket_count, get_vehicles_summary
+from app.optimizer import prepare as prepare_optimizer, solve as solve_optimizer
 from app.database import (
-    get_vehicles_by_time_range, add_task, delete_task, 
-    add_trip, delete_trip, update_trip_pm, update_trip_time
+    get_vehicles_payload, get_vehicles_page, get_changes, get_revision, get_data_version, add_task, delete_task, 
+    add_trip, delete_trip, update_trip_pm, update_trip_time, trip_pm_changes, trip_time_changes,
+    get_trip as get_trip_data, get_trip_tasks, count_trip_tasks, get_vehicle,
+    get_vehicle_trips, add_vehicle, update_vehicle as update_vehicle_data,
+    delete_vehicle as delete_vehicle_data, TRIP_TIME_FIELDS, TASK_TIME_FIELDS
 )
+from app.shared_state import write_transaction
+from app.responses import cached_json_response, dumps_json, json_api_response
+from app.utils import format_record_times
 
 router = APIRouter()
 
 @router.get("/vehicles")
-async def get_vehicles(start: str, end: str):
-    """获取车辆列表"""
-    try:
-        vehicles = get_vehicles_by_time_range(start, end)
-        return ApiResponse(
-            code=0,
-            message="ok",
-            data=[vehicle.dict() for vehicle in vehicles]
+async def get_vehicles(
+    request: Request,
+    start: str,
+    end: str,
+    cursor: Optional[str] = Query(None, description="上一页最后一辆车的 ID（X-Next-Cursor）"),
+    rowStart: int = Query(0, ge=0, description="起始行号（与 cursor 二选一）"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="每页行数，不传则返回全部"),
+    emptyVehicles: Literal['include', 'omit', 'ids'] = Query('include', description="时间范围内没有行程的车辆：照常返回 / 不返回 / 只返回 ID"),
+    format: Literal['json', 'columnar'] = Query('json', description="数据格式：普通 JSON / 列式字典编码（见 app/columnar.py）")
+):
+    """获取车辆列表（总行数通过 X-Total-Count、下一页游标通过 X-Next-Cursor 响应头返回）
+
+    响应带 ETag，数据未变化时 If-None-Match 请求返回 304。
+    """
+    def build():
+        if cursor is not None and rowStart:
+            return ApiResponse(code=40001, message="cursor 与 rowStart 不能同时使用", data=None)
+        if format == 'columnar' and emptyVehicles == 'ids':
+            return ApiResponse(code=40001, message="columnar 格式不支持 emptyVehicles=ids", data=None)
+        if cursor is not None and not get_vehicle(cursor):
+            return ApiResponse(code=40001, message="游标已失效", data=None)
+        revision = get_revision()
+        vehicles, total, next_cursor = get_vehicles_page(
+            datetime.strptime(start, '%Y-%m-%d %H:%M:%S'),
+            datetime.strptime(end, '%Y-%m-%d %H:%M:%S'),
+            cursor=cursor, row_start=rowStart, limit=limit, empty=emptyVehicles
         )
+        # 版本号供 /changes 增量刷新使用
+        headers = {'X-Revision': str(revision), 'X-Total-Count': str(total)}
+        if next_cursor is not None:
+            headers['X-Next-Cursor'] = next_cursor
+        if format == 'columnar':
+            return json_api_response(dumps_json(encode_rows(vehicles)), headers=headers)
+        return json_api_response(dumps_json(vehicles), headers=headers)
+
+    try:
+        return cached_json_response(request, get_data_version('fleet'), build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取车辆列表失败: {str(e)}")
 
+@router.get("/vehicles/summary")
+async def get_vehicles_summary_endpoint(
+    start: str,
+    end: str,
+    bucket: Literal['hour', 'day'] = Query('hour', description="汇总粒度")
+):
+    """缩略模式：每辆车按小时/天汇总的利用率（%）和行程数，用于周/月视图"""
+    try:
+        range_start = datetime.strptime(start, '%Y-%m-%d %H:%M:%S')
+        range_end = datetime.strptime(end, '%Y-%m-%d %H:%M:%S')
+        if range_start >= range_end:
+            return ApiResponse(code=40001, message="开始时间必须早于结束时间", data=None)
+        if bucket_count(range_start, range_end, bucket) > SUMMARY_MAX_BUCKETS:
+            return ApiResponse(code=40001, message="时间范围过大，请使用更粗的汇总粒度", data=None)
+
+        summary = get_vehicles_summary(range_start, range_end, bucket)
+        return json_api_response(dumps_json(summary), headers={'X-Revision': str(get_revision())})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取车辆汇总失败: {str(e)}")
+
+@router.get("/conflicts")
+async def get_conflicts(start: str, end: str):
+    """时间范围内同一车辆或同一司机的行程重叠"""
+    try:
+        conflicts = scan_conflicts(
+            datetime.strptime(start, '%Y-%m-%d %H:%M:%S'),
+            datetime.strptime(end, '%Y-%m-%d %H:%M:%S')
+        )
+        return ApiResponse(code=0, message="ok", data={'conflicts': conflicts})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取行程冲突失败: {str(e)}")
+
+@router.get("/changes")
+async def get_vehicle_changes(since: int, start: str, end: str):
+    """增量刷新：返回 since 版本之后、时间范围内新增/修改/删除的车辆、行程和任务
+
+    reset 为 true 时表示无法增量（版本过旧或服务已重启），需要重新调用 /vehicles。
+    """
+    try:
+        revision = get_revision()
+        changes = get_changes(
+            since,
+            datetime.strptime(start, '%Y-%m-%d %H:%M:%S'),
+            datetime.strptime(end, '%Y-%m-%d %H:%M:%S')
+        )
+        if changes is None:
+            return ApiResponse(code=0, message="ok", data={'revision': revision, 'reset': True})
+        return json_api_response(dumps_json({'revision': revision, 'reset': False, **changes}))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取增量变更失败: {str(e)}")
+
 @router.post("/vehicles/refresh")
 async def refresh_vehicles(request: VehicleRefreshRequest):
     """刷新车辆数据"""
     try:
         if request.range:
-            vehicles = get_vehicles_by_time_range(
-                request.range.startTime.strftime('%Y-%m-%d %H:%M:%S'),
-                request.range.endTime.strftime('%Y-%m-%d %H:%M:%S')
-            )
+            start = request.range.startTime
+            end = request.range.endTime
         else:
             # 默认时间范围
             now = datetime.now()
-            start = (now - timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S')
-            end = (now + timedelta(days=3)).strftime('%Y-%m-%d %H:%M:%S')
-            vehicles = get_vehicles_by_time_range(start, end)
-        
-        # 过滤指定车辆
-        filtered_vehicles = [
-            vehicle for vehicle in vehicles 
-            if vehicle.id in request.vehicleIds
-        ]
+            start = now - timedelta(days=1)
+            end = now + timedelta(days=3)
         
-        return ApiResponse(
-            code=0,
-            message="ok",
-            data=[vehicle.dict() for vehicle in filtered_vehicles]
-        )
+        # 只生成指定车辆
+        vehicles = get_vehicles_payload(start, end, vehicle_ids=request.vehicleIds)
+        
+        return json_api_response(dumps_json(vehicles))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"刷新车辆数据失败: {str(e)}")
 
@@ -60,37 +144,27 @@ async def refresh_vehicles(request: VehicleRefreshRequest):
 async def get_trip(trip_id: str):
     """获取行程详情"""
     try:
-        from app.database import DB
-        
-        trip_data = None
-        for trip in DB['trips']:
-            if trip['id'] == trip_id:
-                trip_data = trip
-                break
+        trip_data = get_trip_data(trip_id)
         
         if not trip_data:
             raise HTTPException(status_code=404, detail="行程不存在")
         
         # 获取相关任务
-        tasks = [task for task in DB['tasks'] if task['tripId'] == trip_id]
-        trip_data['tasks'] = tasks
+        trip_data = format_record_times(trip_data, TRIP_TIME_FIELDS)
+        trip_data['tasks'] = [
+            format_record_times(task, TASK_TIME_FIELDS) for task in get_trip_tasks(trip_id)
+        ]
         
         return ApiResponse(code=0, message="ok", data=trip_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取行程详情失败: {str(e)}")
 
-@router.post("/task")
+@router.post("/task", dependencies=[Depends(write_transaction)])
 async def create_task(task_data: TaskCreate):
     """创建任务"""
     try:
         # 验证行程是否存在且未满载
-        from app.database import DB
-        
-        trip = None
-        for t in DB['trips']:
-            if t['id'] == task_data.tripId:
-                trip = t
-                break
+        trip = get_trip_data(task_data.tripId)
         
         if not trip:
             return ApiResponse(code=40002, message="行程不存在", data=None)
@@ -99,8 +173,7 @@ async def create_task(task_data: TaskCreate):
             return ApiResponse(code=40002, message="行程已满载，无法添加任务", data=None)
         
         # 检查任务数量限制
-        existing_tasks = [task for task in DB['tasks'] if task['tripId'] == task_data.tripId]
-        if len(existing_tasks) >= 2:
+        if count_trip_tasks(task_data.tripId) >= 2:
             return ApiResponse(code=40002, message="行程任务数量已达上限", data=None)
         
         # 创建任务
@@ -110,8 +183,8 @@ async def create_task(task_data: TaskCreate):
             'tripId': task_data.tripId,
             'containerNo': task_data.containerNo,
             'taskType': task_data.taskType,
-            'planStart': (task_data.planStart or datetime.now()).strftime('%Y-%m-%d %H:%M:%S'),
-            'planEnd': (task_data.planEnd or datetime.now()).strftime('%Y-%m-%d %H:%M:%S'),
+            'planStart': task_data.planStart or datetime.now().replace(microsecond=0),
+            'planEnd': task_data.planEnd or datetime.now().replace(microsecond=0),
             'startAddress': '',
             'endAddress': '',
             'status': 'pending'
@@ -123,7 +196,7 @@ async def create_task(task_data: TaskCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"创建任务失败: {str(e)}")
 
-@router.delete("/task/{task_id}")
+@router.delete("/task/{task_id}", dependencies=[Depends(write_transaction)])
 async def delete_task_endpoint(task_id: str):
     """删除任务"""
     try:
@@ -135,33 +208,33 @@ async def delete_task_endpoint(task_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"删除任务失败: {str(e)}")
 
-@router.post("/drag/pm")
+@router.post("/drag/pm", dependencies=[Depends(write_transaction)])
 async def drag_change_pm(payload: DragPmPayload):
     """拖拽改变车辆"""
     try:
         # 验证目标车辆存在
-        from app.database import DB
-        
-        target_vehicle = None
-        for vehicle in DB['vehicles']:
-            if vehicle['id'] == payload.newPmId:
-                target_vehicle = vehicle
-                break
-        
-        if not target_vehicle:
+        if not get_vehicle(payload.newPmId):
             return ApiResponse(code=40003, message="目标车辆不存在", data=None)
         
+        # 冲突检查（保持时长不变）
+        trip = get_trip_data(payload.tripId)
+        if not trip:
+            return ApiResponse(code=404, message="行程不存在", data=None)
+        conflicts = check_trip_change(payload.tripId, trip_pm_changes(trip, payload.newPmId, payload.newStartTime))
+        if conflicts and CONFLICT_MODE == 'reject':
+            return ApiResponse(code=40004, message="行程时间冲突", data={'conflicts': conflicts})
+
         # 更新行程车辆
         success = update_trip_pm(payload.tripId, payload.newPmId, payload.newStartTime)
         
         if success:
-            return ApiResponse(code=0, message="ok", data=None)
+            return ApiResponse(code=0, message="ok", data={'conflicts': conflicts})
         else:
             return ApiResponse(code=404, message="行程不存在", data=None)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"拖拽改变车辆失败: {str(e)}")
 
-@router.post("/trip")
+@router.post("/trip", dependencies=[Depends(write_transaction)])
 async def create_trip(trip_data: TripCreate):
     """创建行程"""
     try:
@@ -170,18 +243,24 @@ async def create_trip(trip_data: TripCreate):
             'id': str(uuid.uuid4()),
             'vehicleId': trip_data.vehicleId,
             'driverId': trip_data.driverId,
-            'startTime': trip_data.startTime.strftime('%Y-%m-%d %H:%M:%S'),
-            'endTime': trip_data.endTime.strftime('%Y-%m-%d %H:%M:%S'),
+            'startTime': trip_data.startTime,
+            'endTime': trip_data.endTime,
             'fullLoad': trip_data.fullLoad
         }
+
+        conflicts = find_trip_conflicts(
+            trip_dict['id'], trip_data.vehicleId, trip_data.driverId, trip_data.startTime, trip_data.endTime
+        )
+        if conflicts and CONFLICT_MODE == 'reject':
+            return ApiResponse(code=40004, message="行程时间冲突", data={'conflicts': conflicts})
         
         trip = add_trip(trip_dict)
         
-        return ApiResponse(code=0, message="ok", data=trip.dict())
+        return ApiResponse(code=0, message="ok", data={**trip.dict(), 'conflicts': conflicts})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"创建行程失败: {str(e)}")
 
-@router.delete("/trip/{trip_id}")
+@router.delete("/trip/{trip_id}", dependencies=[Depends(write_transaction)])
 async def delete_trip_endpoint(trip_id: str):
     """删除行程"""
     try:
@@ -193,7 +272,7 @@ async def delete_trip_endpoint(trip_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"删除行程失败: {str(e)}")
 
-@router.post("/drag/time")
+@router.post("/drag/time", dependencies=[Depends(write_transaction)])
 async def drag_change_trip_time(payload: DragTimePayload):
     """拖拽改变时间"""
     try:
@@ -201,19 +280,89 @@ async def drag_change_trip_time(payload: DragTimePayload):
         if payload.newStart >= payload.newEnd:
             return ApiResponse(code=40001, message="开始时间必须早于结束时间", data=None)
         
+        # 冲突检查
+        conflicts = check_trip_change(payload.tripId, trip_time_changes(payload.newStart, payload.newEnd))
+        if conflicts and CONFLICT_MODE == 'reject':
+            return ApiResponse(code=40004, message="行程时间冲突", data={'conflicts': conflicts})
+
         # 更新行程时间
         success = update_trip_time(payload.tripId, payload.newStart, payload.newEnd)
         
         if success:
-            return ApiResponse(code=0, message="ok", data=None)
+            return ApiResponse(code=0, message="ok", data={'conflicts': conflicts})
         else:
             return ApiResponse(code=404, message="行程不存在", data=None)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"拖拽改变时间失败: {str(e)}")
 
-@router.get("/get_vehicle_driver_list")
-async def get_vehicle_driver_list():
+@router.post("/drag/preview")
+async def drag_preview(payload: DragPreviewPayload):
+    """拖拽预览（不写入）：与 /drag/pm、/drag/time 相同的校验和修改，返回修改后的行程、冲突和截止日期违规"""
+    try:
+        trip = get_trip_data(payload.tripId)
+        if not trip:
+            return ApiResponse(code=404, message="行程不存在", data=None)
+        if payload.newPmId is not None:
+            if not get_vehicle(payload.newPmId):
+                return ApiResponse(code=40003, message="目标车辆不存在", data=None)
+            changes = trip_pm_changes(trip, payload.newPmId, payload.newStart)
+        else:
+            if payload.newEnd is None or payload.newStart >= payload.newEnd:
+                return ApiResponse(code=40001, message="开始时间必须早于结束时间", data=None)
+            changes = trip_time_changes(payload.newStart, payload.newEnd)
+
+        preview = preview_trip_change(payload.tripId, changes)
+        preview['trip'] = format_record_times(preview['trip'], TRIP_TIME_FIELDS)
+        preview['deadlineViolations'] = [
+            format_record_times(violation, ('deadline',)) for violation in preview['deadlineViolations']
+        ]
+        return json_api_response(dumps_json(preview))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"拖拽预览失败: {str(e)}")
+
+@router.post("/batch", dependencies=[Depends(write_transaction)])
+async def batch_operations(request: BatchRequest):
+    """批量创建/更新/删除行程和任务
+
+    操作按顺序整体校验，全部通过才写入，任一失败时返回 40002 和每个失败操作的 {index, message}。
+    新建行程可设置 ref，同批任务用 fields.tripRef 引用；新建任务带 containerNo 时地址等默认值取自容器。
+    """
+    try:
+        plan, errors, refs = validate_batch(request.operations)
+        if errors:
+            return ApiResponse(code=40002, message="批量操作校验失败", data={'errors': errors})
+
+        results = apply_batch(plan)
+        return ApiResponse(code=0, message="ok", data={
+            'results': results, 'refs': refs, 'conflicts': batch_conflicts(results)
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量操作失败: {str(e)}")
+
+@router.post("/optimize")
+async def optimize_schedule(request: OptimizeRequest):
+    """自动排班预览（不写入）
+
+    把容器分配到车辆的新行程（每个行程最多 2 个任务，不与已有行程重叠），尽量满足截止日期。
+    返回的 operations 可原样提交到 /api/gantt/batch 生效。
+    """
     try:
+        if request.startHour >= request.endHour:
+            return ApiResponse(code=40001, message="开始时间必须早于结束时间", data=None)
+
+        solver = prepare_optimizer(
+            request.date, request.containerNos, request.vehicleIds, request.taskType,
+            request.taskMinutes, request.startHour, request.endHour, request.seed
+        )
+        # 求解只使用 prepare 复制出的数据，放到线程池中执行，不阻塞其他请求
+        preview = await run_in_threadpool(solve_optimizer, solver, request.timeBudgetMs / 1000)
+        return ApiResponse(code=0, message="ok", data=preview)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"自动排班失败: {str(e)}")
+
+@router.get("/get_vehicle_driver_list")
+async def get_vehicle_driver_list(request: Request):
+    def build():
         from app.database import DB
 
         # 所有车辆和司机
@@ -221,19 +370,23 @@ async def get_vehicle_driver_list():
         driverId = DB['driverId']
 
         # 已创建的车辆和司机
-        vehicles = DB['vehicles']
-        selected_vehicles = [vehicle['plateNumber'] for vehicle in vehicles]
-        selected_drivers = [vehicle['driverId'] for vehicle in vehicles]
+        vehicles = DB['vehicles'].values()
+        selected_vehicles = {vehicle['plateNumber'] for vehicle in vehicles}
+        selected_drivers = {vehicle['driverId'] for vehicle in vehicles}
 
         # 返回可选择的车辆和司机
         availableVehicles = [v for v in plateNumber if v not in selected_vehicles]
         availableDrivers = [d for d in driverId if d not in selected_drivers]
-        
-        return ApiResponse(code=0, message="ok", data=[availableVehicles, availableDrivers])
+
+        return json_api_response(dumps_json([availableVehicles, availableDrivers]))
+
+    try:
+        # 可选列表只随车辆增删改和全量装入变化
+        return cached_json_response(request, get_data_version('fleet'), build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取车辆列表失败: {str(e)}")
 
-@router.post("/create_vehicle")
+@router.post("/create_vehicle", dependencies=[Depends(write_transaction)])
 async def create_vehicle(request: VehicleCreateRequest):
     """创建新车辆"""
     try:
@@ -248,43 +401,34 @@ async def create_vehicle(request: VehicleCreateRequest):
             return ApiResponse(code=40001, message="司机不存在", data=None)
         
         # 检查车辆是否已被使用
-        existing_vehicles = [v for v in DB['vehicles'] if v['plateNumber'] == request.plateNumber]
+        existing_vehicles = [v for v in DB['vehicles'].values() if v['plateNumber'] == request.plateNumber]
         if existing_vehicles:
             return ApiResponse(code=40002, message="车辆已被使用", data=None)
         
         # 检查司机是否已被使用
-        existing_drivers = [v for v in DB['vehicles'] if v['driverId'] == request.driverId]
+        existing_drivers = [v for v in DB['vehicles'].values() if v['driverId'] == request.driverId]
         if existing_drivers:
             return ApiResponse(code=40002, message="司机已被使用", data=None)
         
         # 创建新车辆
-        new_vehicle = {
+        new_vehicle = add_vehicle({
             'id': str(uuid.uuid4()),
             'plateNumber': request.plateNumber,
-            'driverId': request.driverId,
-            'trips': []
-        }
-        
-        DB['vehicles'].append(new_vehicle)
+            'driverId': request.driverId
+        })
         
-        return ApiResponse(code=0, message="ok", data=new_vehicle)
+        return ApiResponse(code=0, message="ok", data={**new_vehicle, 'trips': []})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"创建车辆失败: {str(e)}")
 
-@router.put("/vehicle/{vehicle_id}")
+@router.put("/vehicle/{vehicle_id}", dependencies=[Depends(write_transaction)])
 async def update_vehicle(vehicle_id: str, request: VehicleCreateRequest):
     """更新车辆信息"""
     try:
         from app.database import DB
         
         # 找到要更新的车辆
-        vehicle_index = None
-        for i, vehicle in enumerate(DB['vehicles']):
-            if vehicle['id'] == vehicle_id:
-                vehicle_index = i
-                break
-        
-        if vehicle_index is None:
+        if not get_vehicle(vehicle_id):
             return ApiResponse(code=404, message="车辆不存在", data=None)
         
         # 验证车辆和司机是否可用
@@ -295,47 +439,40 @@ async def update_vehicle(vehicle_id: str, request: VehicleCreateRequest):
             return ApiResponse(code=40001, message="司机不存在", data=None)
         
         # 检查车辆是否已被其他车辆使用
-        existing_vehicles = [v for v in DB['vehicles'] if v['plateNumber'] == request.plateNumber and v['id'] != vehicle_id]
+        existing_vehicles = [v for v in DB['vehicles'].values() if v['plateNumber'] == request.plateNumber and v['id'] != vehicle_id]
         if existing_vehicles:
             return ApiResponse(code=40002, message="车辆已被使用", data=None)
         
         # 检查司机是否已被其他车辆使用
-        existing_drivers = [v for v in DB['vehicles'] if v['driverId'] == request.driverId and v['id'] != vehicle_id]
+        existing_drivers = [v for v in DB['vehicles'].values() if v['driverId'] == request.driverId and v['id'] != vehicle_id]
         if existing_drivers:
             return ApiResponse(code=40002, message="司机已被使用", data=None)
         
         # 更新车辆信息
-        DB['vehicles'][vehicle_index]['plateNumber'] = request.plateNumber
-        DB['vehicles'][vehicle_index]['driverId'] = request.driverId
+        vehicle = update_vehicle_data(vehicle_id, request.plateNumber, request.driverId)
         
-        return ApiResponse(code=0, message="ok", data=DB['vehicles'][vehicle_index])
+        return ApiResponse(code=0, message="ok", data={
+            **vehicle,
+            'trips': [format_record_times(trip, TRIP_TIME_FIELDS) for trip in get_vehicle_trips(vehicle_id)]
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"更新车辆失败: {str(e)}")
 
-@router.delete("/vehicle/{vehicle_id}")
+@router.delete("/vehicle/{vehicle_id}", dependencies=[Depends(write_transaction)])
 async def delete_vehicle(vehicle_id: str):
     """删除车辆"""
     try:
-        from app.database import DB
-        
         # 找到要删除的车辆
-        vehicle_index = None
-        for i, vehicle in enumerate(DB['vehicles']):
-            if vehicle['id'] == vehicle_id:
-                vehicle_index = i
-                break
-        
-        if vehicle_index is None:
+        if not get_vehicle(vehicle_id):
             return ApiResponse(code=404, message="车辆不存在", data=None)
         
         # 检查是否有相关行程
-        vehicle = DB['vehicles'][vehicle_index]
-        if vehicle['trips']:
+        if get_vehicle_trips(vehicle_id):
             return ApiResponse(code=40003, message="车辆存在相关行程，无法删除", data=None)
         
         # 删除车辆
-        deleted_vehicle = DB['vehicles'].pop(vehicle_index)
+        deleted_vehicle = delete_vehicle_data(vehicle_id)
         
-        return ApiResponse(code=0, message="ok", data=deleted_vehicle)
+        return ApiResponse(code=0, message="ok", data={**deleted_vehicle, 'trips': []})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"删除车辆失败: {str(e)}")
\ No newline at end of file
@@ -1,59 +1,94 @@
 # 订单相关API路由
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+import asyncio
+import io
+import tempfile
+from operator import itemgetter
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from datetime import timedelta
+from typing import List, Optional, Literal
 from app.models import *
-from app.database import get_containers, get_container_by_number
+from app.database import (
+    get_container_by_number, get_container_json, get_trip, count_trip_tasks,
+    search_containers, search_containers_json, get_containers_by_date, get_data_version
+)
+from app.container_import import ImportFormatError, import_batches, iter_csv_rows, iter_xlsx_rows
+from app.columnar import encode_columns
+from app.shared_state import write_transaction
+from app.responses import cached_json_response, dumps_json, json_api_response
 from app.utils import *
 
 router = APIRouter()
 
 @router.get("/containers")
 async def get_containers_list(
+    request: Request,
     search: Optional[str] = Query(None, description="搜索关键词"),
     logisticsStatus: Optional[str] = Query(None, description="物流状态"),
     deliverType: Optional[str] = Query(None, description="交付类型"),
-    terminal: Optional[str] = Query(None, description="码头")
+    terminal: Optional[str] = Query(None, description="码头"),
+    sortBy: Optional[str] = Query(None, description="排序字段，如 ctnNumber"),
+    sortOrder: Literal['asc', 'desc'] = Query('asc', description="排序方向"),
+    page: int = Query(1, ge=1, description="页码"),
+    pageSize: Optional[int] = Query(None, ge=1, le=500, description="每页数量，不传则返回全部"),
+    format: Literal['json', 'columnar'] = Query('json', description="数据格式：普通 JSON / 列式字典编码（见 app/columnar.py）")
 ):
-    """获取容器列表"""
-    try:
-        containers = get_containers()
-        
-        # 应用筛选条件
-        if search:
-            containers = [
-                c for c in containers 
-                if search.lower() in c.ctnNumber.lower() or 
-                   search.lower() in c.fullClientName.lower()
-            ]
-        
-        if logisticsStatus:
-            containers = [c for c in containers if c.logisticsStatus == logisticsStatus]
-        
-        if deliverType:
-            containers = [c for c in containers if c.deliverType == deliverType]
-        
-        if terminal:
-            containers = [c for c in containers if c.terminal == terminal]
-        
-        return ApiResponse(
-            code=0,
-            message="ok",
-            data=[container.dict() for container in containers]
+    """获取容器列表（总数通过 X-Total-Count 响应头返回）
+
+    响应带 ETag，数据未变化时 If-None-Match 请求返回 304。
+    """
+    def build():
+        if sortBy and sortBy not in Container.model_fields:
+            return ApiResponse(code=40001, message="不支持的排序字段", data=None)
+
+        offset = (page - 1) * pageSize if pageSize else 0
+        query = dict(
+            keyword=search,
+            filters={
+                'Logitics Status': logisticsStatus,
+                'Deliver Type': deliverType,
+                'Terminal': terminal,
+            },
+            sort_by=sortBy,
+            descending=sortOrder == 'desc',
+            offset=offset,
+            limit=pageSize
         )
+        if format == 'columnar':
+            # 直接按字段取列，输出的列名与普通格式的键一致
+            total, containers = search_containers(**query)
+            names = list(Container.model_fields)
+            # 字段值保存在实例 __dict__ 中，按键取比逐个 getattr 快
+            rows = map(itemgetter(*names), map(vars, containers))
+            values = zip(*rows) if containers else [[] for _ in names]
+            data_json = dumps_json(encode_columns(dict(zip(names, map(list, values))), len(containers)))
+        else:
+            total, data_json = search_containers_json(**query)
+
+        return json_api_response(data_json, headers={'X-Total-Count': str(total)})
+
+    try:
+        return cached_json_response(request, get_data_version('containers'), build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取容器列表失败: {str(e)}")
 
+# TodoBar 提醒判断：柜子在截止日当天仍未安排，或安排时间晚于/不符合要求
+def _pickup_pending(c: Container) -> bool:
+    return c.planPickUpDate.strip() == "" or c.planPickUpDate > c.lastFree
+
+def _dehire_pending(c: Container) -> bool:
+    return c.planDehireDate.strip() == "" or c.planDehireDate > c.lastDention
+
+def _deliver_pending(c: Container) -> bool:
+    return c.planDeliverDate.strip() == "" or c.planDeliverDate != c.RequestDeliverDate
+
 @router.post("/get_last_pickup_ctns")
 async def get_last_pickup_ctns(RequestDate: DateRequest,):
     """最后一天取出"""
     try:
         # 根据 request.query_date 查询 LastPickUp 内容
         # 逻辑：如果当天是柜子的LAST FREE且还未安排拿柜 或者安排时间晚于LAST FREE，则返回
-        """获取容器列表"""
-        containers = get_containers()
-        results = []
-        results = [c for c in containers if Str2Date(c.lastFree) == RequestDate.query_date and 
-                   (c.planPickUpDate.strip() == "" or c.planPickUpDate > c.lastFree)]
+        containers = get_containers_by_date('Last Free', RequestDate.query_date)
+        results = [c for c in containers if _pickup_pending(c)]
 
         return ApiResponse(
             code=0,
@@ -69,11 +104,8 @@ async def get_last_dehire_ctns(RequestDate: DateRequest,):
     try:
         # 根据 request.query_date 查询 LastDehire 内容
         # 逻辑：如果当天是柜子的lastDention且还未安排拿柜 或者安排时间晚于lastDention，则返回
-        """获取容器列表"""
-        containers = get_containers()
-        results = []
-        results = [c for c in containers if Str2Date(c.lastDention) == RequestDate.query_date and 
-                   (c.planDehireDate.strip() == "" or c.planDehireDate > c.lastDention)]
+        containers = get_containers_by_date('Last Dention', RequestDate.query_date)
+        results = [c for c in containers if _dehire_pending(c)]
 
         return ApiResponse(
             code=0,
@@ -89,11 +121,8 @@ async def get_today_deliver_ctns(RequestDate: DateRequest,):
     try:
         # 根据 request.query_date 查询 RequestDeliverDate 内容
         # 逻辑：客户要求当天送柜 且并未安排或安排日期与需求不符
-        """获取容器列表"""
-        containers = get_containers()
-        results = []
-        results = [c for c in containers if Str2Date(c.RequestDeliverDate) == RequestDate.query_date and 
-                   (c.planDeliverDate.strip() == "" or c.planDeliverDate != c.RequestDeliverDate)]
+        containers = get_containers_by_date('Request Deliver Date', RequestDate.query_date)
+        results = [c for c in containers if _deliver_pending(c)]
 
         return ApiResponse(
             code=0,
@@ -102,21 +131,85 @@ async def get_today_deliver_ctns(RequestDate: DateRequest,):
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取 Today Deliver 失败: {str(e)}")
+
+@router.post("/get_todo_ctns")
+async def get_todo_ctns(request: DateRangeRequest):
+    """日期范围内的全部 TodoBar 提醒（最后取出、最后还柜、当日要送）"""
+    try:
+        if request.start_date > request.end_date:
+            return ApiResponse(code=40001, message="开始日期不能晚于结束日期", data=None)
+        if (request.end_date - request.start_date).days > 366:
+            return ApiResponse(code=40001, message="日期范围不能超过一年", data=None)
+
+        buckets = {
+            'lastPickup': ('Last Free', _pickup_pending),
+            'lastDehire': ('Last Dention', _dehire_pending),
+            'todayDeliver': ('Request Deliver Date', _deliver_pending),
+        }
+        results = {key: {} for key in buckets}
+        day = request.start_date
+        while day <= request.end_date:
+            for key, (field, pending) in buckets.items():
+                containers = [c for c in get_containers_by_date(field, day) if pending(c)]
+                if containers:
+                    results[key][Date2Str(day)] = containers
+            day += timedelta(days=1)
+
+        return ApiResponse(code=0, message="ok", data=results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取 Todo 列表失败: {str(e)}")
     
+# 导入文件超过该大小后缓存到磁盘
+IMPORT_SPOOL_SIZE = 8 * 1024 * 1024
+
+@router.post("/containers/import", dependencies=[Depends(write_transaction)])
+async def import_containers(
+    request: Request,
+    format: Literal['csv', 'xlsx'] = Query('csv', description="文件格式"),
+    dryRun: bool = Query(False, description="只校验不写入")
+):
+    """批量导入容器
+
+    请求体直接为 CSV（UTF-8）或 XLSX 文件内容，列名与容器字段原始名称一致；按 CTN NUMBER 新增或覆盖。
+    返回 {total, inserted, updated, failed, errors: [{row, ctnNumber, message}]}。
+    """
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE) as f:
+            async for chunk in request.stream():
+                f.write(chunk)
+            f.seek(0)
+
+            if format == 'xlsx':
+                rows = iter_xlsx_rows(f)
+            else:
+                rows = iter_csv_rows(io.TextIOWrapper(f, encoding='utf-8-sig', newline=''))
+            try:
+                for result in import_batches(rows, dry_run=dryRun):
+                    await asyncio.sleep(0)  # 每批之间让出事件循环
+            except ImportFormatError as e:
+                return ApiResponse(code=40001, message=str(e), data=None)
+
+        return ApiResponse(code=0, message="ok", data=result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"导入容器失败: {str(e)}")
+
 @router.get("/container/{ctn_number}")
-async def get_container_detail(ctn_number: str):
+async def get_container_detail(request: Request, ctn_number: str):
     """获取容器详情"""
-    try:
-        container = get_container_by_number(ctn_number)
-        
-        if not container:
+    def build():
+        container_json = get_container_json(ctn_number)
+
+        if container_json is None:
             return ApiResponse(code=404, message="容器不存在", data=None)
-        
-        return ApiResponse(code=0, message="ok", data=container.dict())
+
+        return json_api_response(container_json)
+
+    try:
+        return cached_json_response(request, get_data_version('containers'), build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取容器详情失败: {str(e)}")
 
-@router.post("/plan-to-task")
+@router.post("/plan-to-task", dependencies=[Depends(write_transaction)])
 async def plan_to_task(task_create: TaskCreate):
     """容器转换为任务"""
     try:
@@ -137,13 +230,7 @@ async def plan_to_task(task_create: TaskCreate):
         
         # 如果是为现有行程添加任务，需要验证行程状态
         if task_create.tripId:
-            from app.database import DB
-            
-            trip = None
-            for t in DB['trips']:
-                if t['id'] == task_create.tripId:
-                    trip = t
-                    break
+            trip = get_trip(task_create.tripId)
             
             if not trip:
                 return ApiResponse(code=40002, message="行程不存在", data=None)
@@ -152,8 +239,7 @@ async def plan_to_task(task_create: TaskCreate):
                 return ApiResponse(code=40002, message="行程已满载，无法添加任务", data=None)
             
             # 检查任务数量限制
-            existing_tasks = [task for task in DB['tasks'] if task['tripId'] == task_create.tripId]
-            if len(existing_tasks) >= 2:
+            if count_trip_tasks(task_create.tripId) >= 2:
                 return ApiResponse(code=40002, message="行程任务数量已达上限", data=None)
         
         return ApiResponse(code=0, message="ok", data=task_data)
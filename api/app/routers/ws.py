@@ -0,0 +1,79 @@
+# 甘特图实时推送（WebSocket）
+import asyncio
+from datetime import datetime
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from app.database import get_revision
+from app.notifier import NOTIFIER, COALESCE_SECONDS, Subscriber
+from app.responses import dumps_json
+
+router = APIRouter()
+
+
+async def _send(websocket: WebSocket, lock: asyncio.Lock, message: dict):
+    async with lock:
+        await websocket.send_text(dumps_json(message).decode())
+
+
+async def _push_loop(websocket: WebSocket, lock: asyncio.Lock, subscriber: Subscriber):
+    """等待变更，合并后推送；客户端发送慢时变更在 pending 中继续合并
+
+    连接已断开（发送失败）时直接结束，连接由接收循环清理。
+    """
+    try:
+        while True:
+            await subscriber.wakeup.wait()
+            await asyncio.sleep(COALESCE_SECONDS)
+            subscriber.wakeup.clear()
+            message = subscriber.take()
+            if message is not None:
+                await _send(websocket, lock, message)
+    except (WebSocketDisconnect, RuntimeError, OSError):
+        pass
+
+
+@router.websocket("/ws/gantt")
+async def gantt_updates(websocket: WebSocket):
+    """甘特图变更推送
+
+    客户端发送 {"type": "subscribe", "start": "YYYY-MM-DD HH:MM:SS", "end": "...", "vehicleIds": [...]}
+    （vehicleIds 可省略表示全部车辆），服务端回复 subscribed 后推送 changes 消息，
+    格式同 /api/gantt/changes；积压过多时推送 reset，客户端需全量刷新。
+    """
+    await websocket.accept()
+    lock = asyncio.Lock()
+    subscriber = NOTIFIER.add(asyncio.get_running_loop())
+    pusher = asyncio.create_task(_push_loop(websocket, lock, subscriber))
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                await _send(websocket, lock, {'type': 'error', 'message': '消息格式错误'})
+                continue
+
+            if not isinstance(message, dict) or message.get('type') != 'subscribe':
+                await _send(websocket, lock, {'type': 'error', 'message': '不支持的消息类型'})
+                continue
+            try:
+                start = datetime.strptime(message['start'], '%Y-%m-%d %H:%M:%S')
+                end = datetime.strptime(message['end'], '%Y-%m-%d %H:%M:%S')
+            except (KeyError, TypeError, ValueError):
+                await _send(websocket, lock, {'type': 'error', 'message': '时间格式错误'})
+                continue
+
+            vehicle_ids = message.get('vehicleIds')
+            if vehicle_ids is not None and not (
+                isinstance(vehicle_ids, list) and all(isinstance(v, str) for v in vehicle_ids)
+            ):
+                await _send(websocket, lock, {'type': 'error', 'message': 'vehicleIds 必须为字符串数组'})
+                continue
+
+            subscriber.subscribe(start, end, vehicle_ids)
+            await _send(websocket, lock, {'type': 'subscribed', 'revision': get_revision()})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        pusher.cancel()
+        NOTIFIER.remove(subscriber)
+        # 取回推送任务的结果，避免异常无人读取
+        await asyncio.gather(pusher, return_exceptions=True)
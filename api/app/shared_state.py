@@ -0,0 +1,112 @@
+# 多 worker 共享状态（BSB_STORAGE=shared），以及写请求响应前等待写入落盘（BSB_STORAGE=sqlite）
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from app import database
+from app.storage import StorageError
+
+logger = logging.getLogger(__name__)
+
+# 后台同步间隔：没有 HTTP 请求时也能把其他 worker 的写入推送给本 worker 的 WebSocket 客户端
+SYNC_INTERVAL = 0.1
+
+async def _sync_loop():
+    while True:
+        await asyncio.sleep(SYNC_INTERVAL)
+        try:
+            database.sync_shared_state()
+        except Exception:
+            logger.exception('同步共享状态失败')
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    task = asyncio.create_task(_sync_loop()) if database.STORAGE.shared else None
+    yield
+    if task is not None:
+        task.cancel()
+
+
+# 本 worker 内写请求串行执行
+_write_lock = asyncio.Lock()
+
+
+async def write_transaction(request: Request):
+    """写路由的依赖（dependencies=[Depends(write_transaction)]）：共享存储模式下进入跨进程写事务
+
+    FastAPI 先读完请求体再解析依赖，上传文件不会占着写锁。事务由 install 注册的中间件
+    按响应状态提交或回滚；只读的 POST（预览、查询、求解）不加这个依赖，不会阻塞写请求。
+    后台提交的存储（sqlite）只做标记，中间件在响应前等待写入落盘。
+    """
+    if database.STORAGE.deferred:
+        request.state.deferred_write = True
+        return
+    if not database.STORAGE.shared:
+        return
+    await _write_lock.acquire()
+    try:
+        await run_in_threadpool(database.STORAGE.begin)
+    except BaseException:
+        _write_lock.release()
+        raise
+    request.state.write_transaction = True
+    try:
+        # 事务内再同步一次，保证基于最新数据修改
+        database.sync_shared_state()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"同步共享状态失败: {str(e)}")
+
+
+async def _finish_write(commit: bool):
+    try:
+        if commit:
+            await run_in_threadpool(database.STORAGE.commit)
+        else:
+            await run_in_threadpool(database.STORAGE.rollback)
+            database.reload_data()
+    finally:
+        _write_lock.release()
+
+
+def install(app: FastAPI):
+    """共享存储模式下注册同步中间件：
+
+    - 请求处理前先同步其他 worker 的已提交变更；
+    - 带 write_transaction 依赖的写请求处理结束后，响应状态小于 500 时提交事务，
+      5xx 或处理抛出异常时回滚并全量重新加载内存数据（处理中途失败时内存里可能已有部分修改）。
+
+    后台提交的存储（sqlite）下注册落盘中间件：写请求成功时等待本次写入所在批次提交后再返回，
+    提交失败时改为返回 500。内存模式不注册。
+    """
+    if database.STORAGE.deferred:
+        @app.middleware("http")
+        async def durable_write_middleware(request: Request, call_next):
+            response = await call_next(request)
+            if getattr(request.state, 'deferred_write', False) and response.status_code < 500:
+                try:
+                    await run_in_threadpool(database.STORAGE.sync)
+                except StorageError as e:
+                    return JSONResponse(status_code=500, content={"detail": f"写入持久化存储失败: {str(e)}"})
+            return response
+        return
+
+    if not database.STORAGE.shared:
+        return
+
+    @app.middleware("http")
+    async def shared_state_middleware(request: Request, call_next):
+        database.sync_shared_state()
+        try:
+            response = await call_next(request)
+        except BaseException:
+            if getattr(request.state, 'write_transaction', False):
+                await _finish_write(commit=False)
+            raise
+        if getattr(request.state, 'write_transaction', False):
+            await _finish_write(commit=response.status_code < 500)
+        return response
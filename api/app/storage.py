@@ -0,0 +1,470 @@
+# 持久化存储后端
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# 各类记录中以 datetime 保存的字段
+TIME_FIELDS = {
+    'trip': ('startTime', 'endTime'),
+    'task': ('planStart', 'planEnd'),
+}
+
+_STOP = object()
+
+logger = logging.getLogger(__name__)
+
+
+class StorageError(RuntimeError):
+    """持久化存储不可用（后台写入重试后仍失败），之后的写入一律拒绝"""
+
+
+def _encode(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False, default=lambda o: o.isoformat())
+
+
+def _decode(kind: str, data: str) -> dict:
+    record = json.loads(data)
+    for field in TIME_FIELDS.get(kind, ()):
+        record[field] = datetime.fromisoformat(record[field])
+    return record
+
+
+class Storage:
+    """存储后端接口；本身即内存模式（不持久化，每次启动重新生成示例数据）"""
+
+    # 是否为多 worker 共享模式（见 SharedSQLiteStorage）
+    shared = False
+    # 写入是否由后台线程异步提交（写请求响应前需要 sync 等待落盘）
+    deferred = False
+    # 导致存储不可用的错误（见 SQLiteStorage._run），None 表示正常
+    error: Optional[BaseException] = None
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """读取全部数据，没有已保存数据时返回 None"""
+        return None
+
+    def save(self, kind: str, record: dict) -> Optional[int]:
+        """写入/覆盖一条记录，kind 为 vehicle / trip / task / container
+
+        共享存储返回该变更的全局版本号，其他后端返回 None。
+        """
+
+    def delete(self, kind: str, record_id: str) -> Optional[int]:
+        """删除一条记录（返回值同 save）"""
+
+    def save_meta(self, key: str, value: Any):
+        """保存车辆、司机列表等附加数据"""
+
+    def flush(self):
+        """等待已提交的写入落盘"""
+
+    def sync(self):
+        """等待调用前已提交的写入全部落盘，写入失败时抛出 StorageError"""
+
+    def close(self):
+        pass
+
+
+class SQLiteStorage(Storage):
+    """SQLite（WAL 模式）存储
+
+    写入在调用线程中序列化后进入队列，由后台线程按批合并为一个事务提交（group commit），
+    拖拽产生的连续写入只需一次 fsync。
+    写请求在响应前调用 sync 等待本次写入所在的批次提交（见 shared_state.write_transaction），
+    2xx 响应即表示数据已落盘；同一时间段的多个写请求仍合并为一个事务。
+    一批写入失败时按退避间隔重试；仍失败则把存储标记为不可用，等待该批的 sync 以及之后的写入、flush
+    都抛出 StorageError，避免内存与磁盘在静默丢失一批写入后继续分叉。
+    """
+
+    deferred = True
+
+    # 一批写入失败后的重试次数和首次重试间隔（秒，之后每次翻倍）
+    WRITE_RETRIES = 3
+    RETRY_DELAY = 0.1
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS vehicles (
+            id TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS trips (
+            id TEXT PRIMARY KEY,
+            vehicle_id TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_trips_vehicle_start ON trips (vehicle_id, start_time);
+        CREATE INDEX IF NOT EXISTS idx_trips_window ON trips (start_time, end_time);
+        CREATE TABLE IF NOT EXISTS tasks (
+            id TEXT PRIMARY KEY,
+            trip_id TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_trip ON tasks (trip_id);
+        CREATE TABLE IF NOT EXISTS containers (
+            ctn_number TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    '''
+
+    # kind -> (UPSERT 语句, DELETE 语句)
+    STATEMENTS = {
+        'vehicle': (
+            'INSERT OR REPLACE INTO vehicles (id, data) VALUES (?, ?)',
+            'DELETE FROM vehicles WHERE id = ?',
+        ),
+        'trip': (
+            'INSERT OR REPLACE INTO trips (id, vehicle_id, start_time, end_time, data) VALUES (?, ?, ?, ?, ?)',
+            'DELETE FROM trips WHERE id = ?',
+        ),
+        'task': (
+            'INSERT OR REPLACE INTO tasks (id, trip_id, data) VALUES (?, ?, ?)',
+            'DELETE FROM tasks WHERE id = ?',
+        ),
+        'container': (
+            'INSERT OR REPLACE INTO containers (ctn_number, data) VALUES (?, ?)',
+            'DELETE FROM containers WHERE ctn_number = ?',
+        ),
+        'meta': (
+            'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+            'DELETE FROM meta WHERE key = ?',
+        ),
+    }
+
+    def __init__(self, path: str, commit_interval: float = 0.01, max_batch: int = 1000):
+        self.path = path
+        self.commit_interval = commit_interval
+        self.max_batch = max_batch
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connect()
+        conn.executescript(self.SCHEMA)
+        conn.close()
+        self._start()
+
+    def _start(self):
+        self.queue: queue.Queue = queue.Queue()
+        # 写入序号：submitted 为已进入队列的最大序号，committed 为已提交的最大序号
+        self.submitted = 0
+        self.committed = 0
+        self.committed_cond = threading.Condition()
+        self.writer = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+        self.writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    # ---- 读取 ----
+    def load(self) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            return self._load(conn)
+        finally:
+            conn.close()
+
+    def _load(self, conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+        meta = {key: json.loads(value) for key, value in conn.execute('SELECT key, value FROM meta')}
+        if not meta:
+            return None
+        return {
+            'meta': meta,
+            'vehicles': [_decode('vehicle', data) for (data,) in conn.execute(
+                'SELECT data FROM vehicles ORDER BY rowid')],
+            # 按车辆、开始时间顺序读出，重建区间索引时只需追加
+            'trips': [_decode('trip', data) for (data,) in conn.execute(
+                'SELECT data FROM trips ORDER BY vehicle_id, start_time')],
+            'tasks': [_decode('task', data) for (data,) in conn.execute(
+                'SELECT data FROM tasks ORDER BY rowid')],
+            'containers': [json.loads(data) for (data,) in conn.execute(
+                'SELECT data FROM containers ORDER BY rowid')],
+        }
+
+    # ---- 写入 ----
+    def _upsert_params(self, kind: str, record: dict) -> tuple:
+        data = _encode(record)
+        if kind == 'vehicle':
+            params = (record['id'], data)
+        elif kind == 'trip':
+            params = (record['id'], record['vehicleId'], record['startTime'].isoformat(),
+                      record['endTime'].isoformat(), data)
+        elif kind == 'task':
+            params = (record['id'], record['tripId'], data)
+        elif kind == 'container':
+            params = (record['CTN NUMBER'], data)
+        else:
+            raise ValueError(f'未知的记录类型: {kind}')
+        return params
+
+    def _check(self):
+        if self.error is not None:
+            raise StorageError(f'SQLite 存储不可用: {self.error}')
+
+    def _put(self, statement: str, params: tuple):
+        self._check()
+        with self.committed_cond:
+            self.submitted += 1
+            self.queue.put((self.submitted, statement, params))
+
+    def save(self, kind: str, record: dict):
+        self._put(self.STATEMENTS[kind][0], self._upsert_params(kind, record))
+
+    def delete(self, kind: str, record_id: str):
+        self._put(self.STATEMENTS[kind][1], (record_id,))
+
+    def save_meta(self, key: str, value: Any):
+        self._put(self.STATEMENTS['meta'][0], (key, json.dumps(value, ensure_ascii=False)))
+
+    def flush(self):
+        self.queue.join()
+        self._check()
+
+    def sync(self):
+        with self.committed_cond:
+            target = self.submitted
+            self.committed_cond.wait_for(lambda: self.committed >= target or self.error is not None)
+            if self.committed >= target:
+                return
+        self._check()
+
+    def close(self):
+        if self.writer.is_alive():
+            self.queue.put(_STOP)
+            self.writer.join()
+
+    def _run(self):
+        conn = self._connect()
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            batch: List[Any] = [item]
+            # 在提交间隔内继续收集写入，合并为一个事务
+            deadline = time.monotonic() + self.commit_interval
+            while item is not _STOP and len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            stopping = any(op is _STOP for op in batch)
+            writes = [op for op in batch if op is not _STOP]
+            try:
+                if writes and self.error is None and self._commit_batch(conn, writes):
+                    with self.committed_cond:
+                        self.committed = writes[-1][0]
+                        self.committed_cond.notify_all()
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+        conn.close()
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: List[tuple]) -> bool:
+        """在一个事务中写入一批，失败时重试；重试用尽后标记存储不可用并返回 False"""
+        for attempt in range(self.WRITE_RETRIES + 1):
+            try:
+                with conn:
+                    for _, statement, params in batch:
+                        conn.execute(statement, params)
+                return True
+            except sqlite3.Error as e:
+                if attempt == self.WRITE_RETRIES:
+                    logger.exception('SQLite 写入失败，本批 %d 条重试 %d 次后仍未写入，存储已标记为不可用',
+                                     len(batch), self.WRITE_RETRIES)
+                    with self.committed_cond:
+                        self.error = e
+                        self.committed_cond.notify_all()
+                    return False
+                logger.warning('SQLite 写入失败，%g 秒后重试本批 %d 条: %s',
+                               self.RETRY_DELAY * 2 ** attempt, len(batch), e)
+                time.sleep(self.RETRY_DELAY * 2 ** attempt)
+
+
+class SharedSQLiteStorage(SQLiteStorage):
+    """多 worker 共享的 SQLite 存储
+
+    每个 worker 进程仍在内存中保留完整数据和索引，SQLite 文件是唯一数据源：
+    写请求在 BEGIN IMMEDIATE 事务中执行（跨进程互斥），同步写入数据并在 changes 表追加变更；
+    其他 worker 通过 PRAGMA data_version 发现新提交，再按 changes 表增量同步到内存。
+    """
+
+    shared = True
+    # 写入在请求的事务中同步执行，由 commit 落盘
+    deferred = False
+    # changes 表保留的行数，落后更多的 worker 需全量重新加载
+    MAX_CHANGES = 100000
+
+    SCHEMA = SQLiteStorage.SCHEMA + '''
+        CREATE TABLE IF NOT EXISTS changes (
+            rev INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            op TEXT NOT NULL,
+            record_id TEXT NOT NULL
+        );
+    '''
+
+    # kind -> (表名, 主键列)
+    TABLES = {
+        'vehicle': ('vehicles', 'id'),
+        'trip': ('trips', 'id'),
+        'task': ('tasks', 'id'),
+        'container': ('containers', 'ctn_number'),
+    }
+
+    def _start(self):
+        # 写连接只在 begin/commit 之间使用（调用方保证同一时刻只有一个写事务）；
+        # 读连接用于同步和加载，WAL 下不受写事务阻塞
+        self.writer_conn = self._connect()
+        self.writer_conn.isolation_level = None  # 事务由 begin/commit 显式管理
+        self.reader_conn = self._connect()
+        self.reader_conn.isolation_level = None
+        self.reader_lock = threading.Lock()
+        self.last_rev = 0
+        self.data_version: Optional[int] = None
+        # 本进程写入的变更版本号，同步时跳过
+        self.own_revs: set = set()
+
+    def _log_change(self, kind: str, op: str, record_id: str) -> int:
+        rev = self.writer_conn.execute(
+            'INSERT INTO changes (kind, op, record_id) VALUES (?, ?, ?)', (kind, op, record_id)
+        ).lastrowid
+        self.own_revs.add(rev)
+        return rev
+
+    # ---- 写入（同步执行，返回全局版本号） ----
+    def save(self, kind: str, record: dict) -> int:
+        params = self._upsert_params(kind, record)
+        self.writer_conn.execute(self.STATEMENTS[kind][0], params)
+        return self._log_change(kind, 'upsert', params[0])
+
+    def delete(self, kind: str, record_id: str) -> int:
+        self.writer_conn.execute(self.STATEMENTS[kind][1], (record_id,))
+        return self._log_change(kind, 'delete', record_id)
+
+    def save_meta(self, key: str, value: Any):
+        self.writer_conn.execute(self.STATEMENTS['meta'][0], (key, json.dumps(value, ensure_ascii=False)))
+
+    def flush(self):
+        pass
+
+    def sync(self):
+        pass
+
+    def close(self):
+        self.writer_conn.close()
+        with self.reader_lock:
+            self.reader_conn.close()
+
+    # ---- 事务 ----
+    def begin(self):
+        """开始写事务，阻塞直到取得跨进程写锁（应在线程池中调用）"""
+        self.writer_conn.execute('BEGIN IMMEDIATE')
+
+    def commit(self):
+        self.writer_conn.execute(
+            'DELETE FROM changes WHERE rev <= (SELECT MAX(rev) FROM changes) - ?', (self.MAX_CHANGES,)
+        )
+        self.writer_conn.execute('COMMIT')
+
+    def rollback(self):
+        self.writer_conn.execute('ROLLBACK')
+        # 回滚的版本号可能被其他进程复用，调用方应随后全量重新加载
+        self.own_revs.clear()
+
+    # ---- 读取 ----
+    def load(self) -> Optional[Dict[str, Any]]:
+        with self.reader_lock:
+            conn = self.reader_conn
+            # 在同一读事务中取版本号和数据，保证快照一致
+            conn.execute('BEGIN')
+            try:
+                self.data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+                self.last_rev = conn.execute('SELECT COALESCE(MAX(rev), 0) FROM changes').fetchone()[0]
+                # 车辆/行程/任务与容器各自最近一次变更的版本号，与增量同步得到的版本号一致
+                revisions = dict(conn.execute(
+                    "SELECT kind = 'container', MAX(rev) FROM changes GROUP BY kind = 'container'"
+                ).fetchall())
+                self.own_revs = {rev for rev in self.own_revs if rev > self.last_rev}
+                snapshot = self._load(conn)
+            finally:
+                conn.execute('COMMIT')
+            if snapshot is not None:
+                snapshot['revision'] = revisions.get(0, 0)
+                snapshot['containerRevision'] = revisions.get(1, 0)
+            return snapshot
+
+    def poll(self) -> Optional[List[Tuple[int, str, str, str, Optional[dict]]]]:
+        """拉取其他 worker 提交的变更 [(rev, kind, op, record_id, 记录或 None)]
+
+        没有新提交时只执行一次 PRAGMA；所需变更已被清理时返回 None，调用方需全量重新加载。
+        """
+        with self.reader_lock:
+            conn = self.reader_conn
+            data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+            if data_version == self.data_version:
+                return []
+
+            conn.execute('BEGIN')
+            try:
+                self.data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+                first = conn.execute('SELECT MIN(rev) FROM changes').fetchone()[0]
+                if first is not None and first > self.last_rev + 1:
+                    return None
+                rows = conn.execute(
+                    'SELECT rev, kind, op, record_id FROM changes WHERE rev > ? ORDER BY rev', (self.last_rev,)
+                ).fetchall()
+
+                results = []
+                for rev, kind, op, record_id in rows:
+                    self.last_rev = rev
+                    if rev in self.own_revs:
+                        self.own_revs.discard(rev)
+                        continue
+                    record = None
+                    if op == 'upsert':
+                        table, key = self.TABLES[kind]
+                        row = conn.execute(f'SELECT data FROM {table} WHERE {key} = ?', (record_id,)).fetchone()
+                        if row is None:
+                            op = 'delete'  # 之后又被删除，以最终状态为准
+                        else:
+                            record = _decode(kind, row[0])
+                    results.append((rev, kind, op, record_id, record))
+                return results
+            finally:
+                conn.execute('COMMIT')
+
+
+def create_storage() -> Storage:
+    """根据环境变量选择存储后端
+
+    BSB_STORAGE=memory（默认）| sqlite | shared（多 worker 共享同一 SQLite 文件）；
+    BSB_SQLITE_PATH 指定数据库文件（默认 data/bsb.db）
+    """
+    backend = os.environ.get('BSB_STORAGE', 'memory').lower()
+    if backend == 'memory':
+        return Storage()
+    if backend in ('sqlite', 'shared'):
+        storage_class = SharedSQLiteStorage if backend == 'shared' else SQLiteStorage
+        storage = storage_class(os.environ.get('BSB_SQLITE_PATH', 'data/bsb.db'))
+        atexit.register(storage.close)
+        return storage
+    raise ValueError(f'未知的存储后端: {backend}')
@@ -0,0 +1,95 @@
+# 甘特图缩略模式：按小时/天汇总每辆车的利用率和行程数，不输出单个行程和任务
+#
+# 直接读取行程区间索引（database.TRIP_INDEX），同一车辆重叠的行程先合并再计算占用时间，
+# 每辆车的开销为 O(行程数 + 覆盖的桶数)。
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Dict, List
+
+from app import database
+
+BUCKET_SECONDS = {'hour': 3600, 'day': 86400}
+# 单次请求的桶数上限（每辆车）
+MAX_BUCKETS = 2000
+
+
+def bucket_origin(range_start: datetime, bucket: str) -> datetime:
+    """范围起点向下取整到整点 / 零点"""
+    if bucket == 'day':
+        return range_start.replace(hour=0, minute=0, second=0, microsecond=0)
+    return range_start.replace(minute=0, second=0, microsecond=0)
+
+
+def bucket_count(range_start: datetime, range_end: datetime, bucket: str) -> int:
+    size = BUCKET_SECONDS[bucket]
+    seconds = (range_end - bucket_origin(range_start, bucket)).total_seconds()
+    return max(1, -(-int(seconds) // size))
+
+
+def _vehicle_summary(trips: List[dict], origin: datetime, size: int, count: int) -> Dict[str, list]:
+    # 差分数组：整桶覆盖和行程数用 [first, last] 区间加一，只有区间两端的零头单独累计
+    limit = count * size
+    trip_diff = [0] * (count + 1)
+    full_diff = [0] * (count + 1)
+    partial = [0] * count
+
+    merged: List[list] = []
+    for trip_data in trips:
+        start = max(0, int((trip_data['startTime'] - origin).total_seconds()))
+        end = min(limit, int((trip_data['endTime'] - origin).total_seconds()))
+        if end <= start:
+            continue
+        trip_diff[start // size] += 1
+        trip_diff[(end - 1) // size + 1] -= 1
+        # 合并同一车辆重叠的行程（trips 已按开始时间排序），避免重复计算占用时间
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    for start, end in merged:
+        first, last = start // size, (end - 1) // size
+        if first == last:
+            partial[first] += end - start
+            continue
+        partial[first] += (first + 1) * size - start
+        partial[last] += end - last * size
+        full_diff[first + 1] += 1
+        full_diff[last] -= 1
+
+    half = size // 2
+    return {
+        'utilization': [
+            ((full * size + extra) * 100 + half) // size for full, extra in zip(accumulate(full_diff), partial)
+        ],
+        'tripCounts': list(accumulate(trip_diff))[:count],
+    }
+
+
+def get_vehicles_summary(range_start: datetime, range_end: datetime, bucket: str = 'hour') -> dict:
+    """每辆车每个桶的利用率（占用时间百分比，整数）和重叠的行程数
+
+    桶从 bucket_origin(range_start) 开始连续排列，覆盖到 range_end。
+    """
+    size = BUCKET_SECONDS[bucket]
+    origin = bucket_origin(range_start, bucket)
+    count = bucket_count(range_start, range_end, bucket)
+    window_end = origin + timedelta(seconds=count * size)
+
+    vehicles = []
+    for vehicle_id in database.get_vehicle_ids():
+        vehicle_data = database.get_vehicle(vehicle_id)
+        trips = database.TRIP_INDEX.query(vehicle_id, origin, window_end)
+        vehicles.append({
+            'id': vehicle_id,
+            'plateNumber': vehicle_data['plateNumber'],
+            'driverId': vehicle_data.get('driverId'),
+            'trips': len(trips),
+            **_vehicle_summary(trips, origin, size, count),
+        })
+    return {
+        'bucket': bucket,
+        'origin': origin.isoformat(),
+        'buckets': count,
+        'vehicles': vehicles,
+    }
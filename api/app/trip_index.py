@@ -0,0 +1,102 @@
+# 行程时间区间索引
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+
+class VehicleTripIndex:
+    """单车行程索引：按开始时间有序，配合最长行程时长裁剪查询下界"""
+
+    def __init__(self):
+        self.starts: List[Tuple[datetime, str]] = []
+        self.spans: Dict[str, Tuple[datetime, datetime]] = {}
+        self.trips: Dict[str, dict] = {}
+        self.max_duration = timedelta(0)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def add(self, trip_data: dict, start: datetime, end: datetime):
+        """加入行程"""
+        trip_id = trip_data['id']
+        insort(self.starts, (start, trip_id))
+        self.spans[trip_id] = (start, end)
+        self.trips[trip_id] = trip_data
+        if end - start > self.max_duration:
+            self.max_duration = end - start
+
+    def remove(self, trip_id: str) -> Optional[dict]:
+        """移除行程，返回原行程数据"""
+        span = self.spans.pop(trip_id, None)
+        if span is None:
+            return None
+        start, end = span
+        i = bisect_left(self.starts, (start, trip_id))
+        if i < len(self.starts) and self.starts[i] == (start, trip_id):
+            self.starts.pop(i)
+
+        # 删除的是最长行程时重新计算，避免查询下界越放越宽
+        if end - start >= self.max_duration:
+            self.max_duration = max(
+                (e - s for s, e in self.spans.values()), default=timedelta(0)
+            )
+        return self.trips.pop(trip_id)
+
+    def query(self, range_start: datetime, range_end: datetime) -> List[dict]:
+        """返回与 [range_start, range_end) 重叠的行程，按开始时间排序"""
+        lo = bisect_left(self.starts, (range_start - self.max_duration,))
+        hi = bisect_left(self.starts, (range_end,))
+        results = []
+        for _, trip_id in self.starts[lo:hi]:
+            if self.spans[trip_id][1] > range_start:
+                results.append(self.trips[trip_id])
+        return results
+
+    def overlaps(self, range_start: datetime, range_end: datetime) -> bool:
+        """是否有行程与 [range_start, range_end) 重叠"""
+        lo = bisect_left(self.starts, (range_start - self.max_duration,))
+        hi = bisect_left(self.starts, (range_end,))
+        return any(self.spans[trip_id][1] > range_start for _, trip_id in self.starts[lo:hi])
+
+
+class TripIntervalIndex:
+    """按分组字段（默认车辆）组织的行程区间索引；分组字段为空的行程不入索引"""
+
+    def __init__(self, key: str = 'vehicleId'):
+        self.key = key
+        self.vehicles: Dict[str, VehicleTripIndex] = {}
+        self.trip_vehicle: Dict[str, str] = {}
+
+    def clear(self):
+        self.vehicles.clear()
+        self.trip_vehicle.clear()
+
+    def add(self, trip_data: dict, start: datetime, end: datetime):
+        """加入行程（已存在时先移除）"""
+        self.remove(trip_data['id'])
+        vehicle_id = trip_data.get(self.key)
+        if vehicle_id is None:
+            return
+        if vehicle_id not in self.vehicles:
+            self.vehicles[vehicle_id] = VehicleTripIndex()
+        self.vehicles[vehicle_id].add(trip_data, start, end)
+        self.trip_vehicle[trip_data['id']] = vehicle_id
+
+    def remove(self, trip_id: str) -> Optional[dict]:
+        """移除行程"""
+        vehicle_id = self.trip_vehicle.pop(trip_id, None)
+        if vehicle_id is None:
+            return None
+        return self.vehicles[vehicle_id].remove(trip_id)
+
+    def query(self, vehicle_id: str, range_start: datetime, range_end: datetime) -> List[dict]:
+        """查询某车辆（分组）在时间范围内的行程"""
+        index = self.vehicles.get(vehicle_id)
+        if index is None:
+            return []
+        return index.query(range_start, range_end)
+
+    def overlaps(self, vehicle_id: str, range_start: datetime, range_end: datetime) -> bool:
+        """某车辆（分组）在时间范围内是否有行程"""
+        index = self.vehicles.get(vehicle_id)
+        return index is not None and index.overlaps(range_start, range_end)
@@ -1,6 +1,7 @@
 # 工具函数
 from datetime import datetime, timedelta, date
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, Iterable, List, Optional
 from app.models import Container, TaskType
 
 def pickup_address(container: Container) -> str:
@@ -66,8 +67,28 @@ def create_task_from_container(container: Container, task_type: TaskType,
     return task
 
 """时间处理模块"""
-def Str2Date(s: str) -> Optional[date]:
-    """把字符串转成 date 对象"""
+# 解析结果缓存条数：容器日期字段取值重复度高，跨请求复用
+DATE_CACHE_SIZE = 65536
+
+def _is_digits(part: str, min_len: int, max_len: int) -> bool:
+    return min_len <= len(part) <= max_len and part.isascii() and part.isdigit()
+
+def _parse_slash_date(s: str) -> Optional[date]:
+    """解析 'd/m/Y' 或 'Y/m/d'，按年份所在位置区分"""
+    parts = s.split('/')
+    if len(parts) != 3:
+        return None
+    first, month, last = parts
+    if not _is_digits(month, 1, 2):
+        return None
+    if _is_digits(first, 4, 4) and _is_digits(last, 1, 2):
+        return date(int(first), int(month), int(last))
+    if _is_digits(first, 1, 2) and _is_digits(last, 4, 4):
+        return date(int(last), int(month), int(first))
+    return None
+
+def _str2date_formats(s: str) -> Optional[date]:
+    """逐个格式尝试（快速路径无法识别时的兜底）"""
     formats = ["%Y-%m-%d", "%d/%m/%Y", "%Y/%m/%d", "%Y-%m-%d %H:%M:%S"]
     for fmt in formats:
         try:
@@ -79,8 +100,8 @@ def Str2Date(s: str) -> Optional[date]:
     except Exception:
         return None
 
-def Str2DateTime(s: str) -> Optional[datetime]:
-    """把字符串转成 datetime 对象"""
+def _str2datetime_formats(s: str) -> Optional[datetime]:
+    """逐个格式尝试（快速路径无法识别时的兜底）"""
     formats = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"]
     for fmt in formats:
         try:
@@ -92,6 +113,60 @@ def Str2DateTime(s: str) -> Optional[datetime]:
     except Exception:
         return None
 
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def Str2Date(s: str) -> Optional[date]:
+    """把字符串转成 date 对象
+
+    按字符串形态选择解析方式：含 '/' 的直接拆分，其余先走 fromisoformat，
+    都不符合时再按原格式列表逐个尝试。结果按字符串缓存。
+    """
+    if not s:
+        return None
+    if '/' in s:
+        try:
+            result = _parse_slash_date(s)
+        except ValueError:
+            result = None
+        if result is not None:
+            return result
+    else:
+        try:
+            return datetime.fromisoformat(s).date()
+        except ValueError:
+            if '-' not in s:
+                return None
+    return _str2date_formats(s)
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def Str2DateTime(s: str) -> Optional[datetime]:
+    """把字符串转成 datetime 对象（先走 fromisoformat，结果按字符串缓存）"""
+    if not s:
+        return None
+    try:
+        return datetime.fromisoformat(s)
+    except ValueError:
+        if '-' not in s:
+            return None
+    return _str2datetime_formats(s)
+
+def parse_date_column(values: Iterable[str]) -> List[Optional[date]]:
+    """批量解析一列日期字符串，同一批内相同取值只解析一次"""
+    parsed: Dict[str, Optional[date]] = {}
+    results = []
+    for value in values:
+        if value not in parsed:
+            parsed[value] = Str2Date(value)
+        results.append(parsed[value])
+    return results
+
+def parse_container_dates(containers: Iterable[Dict[str, Any]], fields) -> Dict[str, List[Optional[date]]]:
+    """批量解析容器的日期字段（原始字段名），返回 字段 -> 日期列"""
+    rows = list(containers)
+    return {
+        field: parse_date_column([row.get(field) or '' for row in rows])
+        for field in fields
+    }
+
 def Date2Str(d: date, fmt: str = "%Y-%m-%d") -> str:
     """把 date 转成字符串"""
     return d.strftime(fmt)
@@ -106,4 +181,12 @@ def DateTime2Date(dt: datetime) -> date:
 
 def Date2DateTime(d: date) -> datetime:
     """把 date 转成 datetime (默认 00:00:00)"""
-    return datetime.combine(d, datetime.min.time())
\ No newline at end of file
+    return datetime.combine(d, datetime.min.time())
+
+def format_record_times(record: Dict[str, Any], fields) -> Dict[str, Any]:
+    """复制记录并把指定的 datetime 字段转成字符串（API 输出用）"""
+    record = dict(record)
+    for field in fields:
+        if isinstance(record.get(field), datetime):
+            record[field] = DateTime2Str(record[field])
+    return record
@@ -0,0 +1,54 @@
+# 冲突检测：单次检查延迟随行程数量的变化，以及时间窗口扫描报告耗时
+# 运行：cd api && python -m benchmarks.bench_conflicts
+import random
+import time
+from datetime import datetime, timedelta
+
+from app import database
+from app.conflicts import check_trip_change, scan_conflicts
+
+BASE = datetime(2025, 11, 3)
+VEHICLES = 100
+CHECKS = 2000
+
+
+def populate(trips_per_vehicle: int, rng: random.Random):
+    trip_ids = []
+    for v in range(VEHICLES):
+        vehicle_id = f'CV{v:03d}'
+        if database.get_vehicle(vehicle_id) is None:
+            database.add_vehicle({'id': vehicle_id, 'plateNumber': f'CP{v:03d}', 'driverId': f'CD{v:03d}'})
+        for i in range(trips_per_vehicle):
+            start = BASE + timedelta(hours=i * 2 + rng.random())
+            trip_id = f'ct-{vehicle_id}-{trips_per_vehicle}-{i}'
+            database.add_trip({
+                'id': trip_id, 'vehicleId': vehicle_id, 'driverId': f'CD{v:03d}',
+                'startTime': start, 'endTime': start + timedelta(minutes=rng.choice([60, 150])),
+            })
+            trip_ids.append(trip_id)
+    return trip_ids
+
+
+def main():
+    rng = random.Random(7)
+    total = 0
+    for per_vehicle in (10, 100, 1000):
+        trip_ids = populate(per_vehicle, rng)
+        total += len(trip_ids)
+        samples = []
+        for trip_id in rng.choices(trip_ids, k=CHECKS):
+            start = BASE + timedelta(hours=rng.uniform(0, per_vehicle * 2))
+            began = time.perf_counter()
+            check_trip_change(trip_id, {'startTime': start, 'endTime': start + timedelta(hours=1)})
+            samples.append(time.perf_counter() - began)
+        samples.sort()
+        began = time.perf_counter()
+        conflicts = scan_conflicts(BASE, BASE + timedelta(days=7))
+        scan = time.perf_counter() - began
+        print(f'{total:>7} trips: check p50 {samples[len(samples) // 2] * 1e6:.0f} us, '
+              f'p99 {samples[int(len(samples) * 0.99)] * 1e6:.0f} us; '
+              f'7-day scan {scan * 1000:.0f} ms, {len(conflicts)} conflicts')
+
+
+if __name__ == '__main__':
+    main()
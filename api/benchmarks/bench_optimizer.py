@@ -0,0 +1,59 @@
+# 自动排班：500 个容器、50 辆车（每车已有若干行程），对比贪心初始解和局部搜索后的结果
+# 同时校验预览可以原样通过 /api/gantt/batch 的校验
+# 运行：cd api && python -m benchmarks.bench_optimizer
+import random
+from datetime import date, datetime, timedelta
+
+from app import database
+from app.batch import validate_batch
+from app.models import BatchOperation
+from app.optimizer import optimize
+
+CONTAINERS = 500
+VEHICLES = 50
+DAY = date(2025, 11, 3)
+
+
+def populate():
+    rng = random.Random(5)
+    for v in range(VEHICLES):
+        vehicle_id = f'OV{v:02d}'
+        database.add_vehicle({'id': vehicle_id, 'plateNumber': f'OP{v:02d}', 'driverId': f'D{v:02d}'})
+        for hour in rng.sample(range(6, 19, 2), 3):
+            start = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=hour, minutes=rng.choice([0, 30]))
+            database.add_trip({
+                'id': f'busy-{vehicle_id}-{hour}',
+                'vehicleId': vehicle_id,
+                'startTime': start,
+                'endTime': start + timedelta(minutes=rng.choice([45, 90])),
+                'fullLoad': 'N',
+            })
+
+    base = database.get_container_by_number('CONT001').model_dump(by_alias=True)
+    ctns = []
+    for i in range(CONTAINERS):
+        due = DAY + timedelta(days=rng.choice([0, 0, 0, 1]))
+        ctn = f'OPT{i:04d}'
+        database.add_container(dict(base, **{
+            'CTN NUMBER': ctn, 'Last Free': f'{due} 23:59:59', 'Last Dention': '', 'Request Deliver Date': '',
+        }))
+        ctns.append(ctn)
+    return ctns, [f'OV{v:02d}' for v in range(VEHICLES)]
+
+
+def main():
+    ctns, vehicle_ids = populate()
+    for budget in (0.0, 0.5, 2.0):
+        preview = optimize(DAY, ctns, vehicle_ids, task_minutes=45, time_budget=budget)
+        summary = preview['summary']
+        print(f"budget {budget:.1f}s: {summary['trips']} trips, late {summary['late']}, "
+              f"unassigned {summary['unassigned']}, cost {summary['initialCost']:.0f} -> {summary['cost']:.0f}, "
+              f"{summary['iterations']} iterations, {summary['elapsedMs']:.0f} ms")
+
+    _, errors, _ = validate_batch([BatchOperation(**op) for op in preview['operations']])
+    assert not errors, errors[:5]
+    print(f"batch validation: {len(preview['operations'])} operations ok")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# /api/gantt/vehicles 输出对比：模型路径 vs 直接序列化路径
+# 两条路径的 JSON 必须一致（逐字节的黄金输出测试见 tests/test_vehicles_payload.py）
+# 运行：cd api && python -m benchmarks.bench_vehicles_payload
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app import database
+from app.models import ApiResponse
+from app.responses import dumps_json, json_api_response
+
+VEHICLES = 300
+TRIPS_PER_VEHICLE = 40
+
+
+def populate():
+    """在示例数据之外生成一批车辆、行程和任务"""
+    rng = random.Random(1)
+    base = datetime(2025, 3, 1, 6, 0, 0)
+    for v in range(VEHICLES):
+        vehicle_id = f'BPM{v:04d}'
+        database.add_vehicle({
+            'id': vehicle_id,
+            'plateNumber': f'P{v:04d}',
+            'driverId': f'D{v:04d}' if v % 5 else None,
+        })
+        for t in range(TRIPS_PER_VEHICLE):
+            start = base + timedelta(hours=6 * t, minutes=rng.randrange(60), microseconds=rng.choice([0, 250000]))
+            trip = database.add_trip({
+                'id': str(uuid.uuid4()),
+                'vehicleId': vehicle_id,
+                'driverId': f'D{v:04d}',
+                'startTime': start,
+                'endTime': start + timedelta(hours=4),
+                'fullLoad': rng.choice(['Y', 'N']),
+            })
+            for k in range(rng.choice([0, 1, 2])):
+                database.add_task({
+                    'id': str(uuid.uuid4()),
+                    'tripId': trip.id,
+                    'containerNo': f'C{v:04d}{t:03d}{k}',
+                    'taskType': rng.choice(['Client', 'Yard(F)', 'Empty Park']),
+                    'planStart': start + timedelta(hours=2 * k),
+                    'planEnd': start + timedelta(hours=2 * k + 1),
+                    'startAddress': '悉尼港码头',
+                    'endAddress': '墨尔本仓库',
+                    'status': 'pending',
+                    'containerWeight': '20000' if k else None,
+                })
+
+
+def model_path(range_start, range_end) -> bytes:
+    """原实现：模型 -> dict -> ApiResponse -> jsonable_encoder -> JSONResponse"""
+    vehicles = database.get_vehicles_by_time_range(range_start, range_end)
+    response = ApiResponse(code=0, message="ok", data=[vehicle.dict() for vehicle in vehicles])
+    return JSONResponse(content=jsonable_encoder(response)).body
+
+
+def fast_path(range_start, range_end) -> bytes:
+    return json_api_response(dumps_json(database.get_vehicles_payload(range_start, range_end))).body
+
+
+def best_of(fn, *args, repeat: int = 5):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    populate()
+    for days in (1, 7):
+        range_start = datetime(2025, 3, 3)
+        range_end = range_start + timedelta(days=days)
+
+        expected = model_path(range_start, range_end)
+        actual = fast_path(range_start, range_end)
+        assert json.loads(actual) == json.loads(expected), 'fast path output differs from model path'
+
+        t_model = best_of(model_path, range_start, range_end)
+        t_fast = best_of(fast_path, range_start, range_end)
+        print(f'{days}-day window, {len(actual)} bytes, byte-identical: {actual == expected}')
+        print(f'  model path: {t_model * 1000:8.2f} ms')
+        print(f'  fast path:  {t_fast * 1000:8.2f} ms  ({t_model / t_fast:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# 时间窗口查询基准：字符串时间存储 vs datetime 存储
+# 运行：cd api && python -m benchmarks.bench_window_query
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.trip_index import TripIntervalIndex
+
+TRIP_COUNT = 100_000
+VEHICLE_COUNT = 200
+FMT = '%Y-%m-%d %H:%M:%S'
+
+
+def build_trips(count: int):
+    """生成 count 条随机分布在 90 天内的行程"""
+    rng = random.Random(42)
+    base = datetime(2025, 1, 1)
+    trips = []
+    for i in range(count):
+        start = base + timedelta(minutes=rng.randrange(90 * 24 * 60))
+        end = start + timedelta(minutes=rng.randrange(30, 360))
+        trips.append({
+            'id': f'T{i}',
+            'vehicleId': f'PM{i % VEHICLE_COUNT:03d}',
+            'startTime': start,
+            'endTime': end,
+        })
+    return trips
+
+
+def query_strings(trips, start_time: str, end_time: str):
+    """旧实现：每条行程都 strptime 后比较"""
+    hits = []
+    for trip in trips:
+        trip_start = datetime.strptime(trip['startTime'], FMT)
+        trip_end = datetime.strptime(trip['endTime'], FMT)
+        range_start = datetime.strptime(start_time, FMT)
+        range_end = datetime.strptime(end_time, FMT)
+        if not (trip_end <= range_start or trip_start >= range_end):
+            hits.append(trip)
+    return hits
+
+
+def query_datetimes(trips, range_start: datetime, range_end: datetime):
+    """datetime 存储：全量扫描但不解析"""
+    return [t for t in trips if not (t['endTime'] <= range_start or t['startTime'] >= range_end)]
+
+
+def query_index(index: TripIntervalIndex, range_start: datetime, range_end: datetime):
+    """datetime 存储 + 区间索引"""
+    hits = []
+    for i in range(VEHICLE_COUNT):
+        hits.extend(index.query(f'PM{i:03d}', range_start, range_end))
+    return hits
+
+
+def timed(fn, *args, repeat: int = 3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    trips = build_trips(TRIP_COUNT)
+    string_trips = [
+        {**t, 'startTime': t['startTime'].strftime(FMT), 'endTime': t['endTime'].strftime(FMT)}
+        for t in trips
+    ]
+    index = TripIntervalIndex()
+    for t in trips:
+        index.add(t, t['startTime'], t['endTime'])
+
+    range_start = datetime(2025, 2, 1)
+    range_end = range_start + timedelta(days=3)
+
+    t_str, r_str = timed(query_strings, string_trips, range_start.strftime(FMT), range_end.strftime(FMT), repeat=1)
+    t_dt, r_dt = timed(query_datetimes, trips, range_start, range_end)
+    t_idx, r_idx = timed(query_index, index, range_start, range_end)
+    assert len(r_str) == len(r_dt) == len(r_idx)
+
+    print(f'{TRIP_COUNT} trips, 3-day window, {len(r_idx)} hits')
+    print(f'  string storage (strptime per row): {t_str * 1000:9.2f} ms')
+    print(f'  datetime storage (full scan):      {t_dt * 1000:9.2f} ms  ({t_str / t_dt:.0f}x)')
+    print(f'  datetime storage + interval index: {t_idx * 1000:9.2f} ms  ({t_str / t_idx:.0f}x)')
+
+
+if __name__ == '__main__':
+    main()
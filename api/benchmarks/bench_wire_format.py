@@ -0,0 +1,174 @@
+# 传输体积与客户端解码耗时：普通 JSON vs 列式字典编码（format=columnar），不压缩 / gzip / brotli
+#
+# 数据：synthetic 50x = 500 辆车一周的行程任务（/api/gantt/vehicles）和 10000 个容器（/api/orders/containers）。
+# 服务端耗时为清空响应缓存后单次请求的生成 + 编码时间（不含压缩）；压缩耗时单独列出。
+# 客户端解码：有 node 时在 node 中计时 解压 + JSON.parse + decodeColumnar（与 src/utils/columnar.ts 相同的逻辑），
+# 否则用 Python（json.loads + columnar.decode_rows）代替。brotli 未安装时用 node 的 zlib 计算 br 体积。
+# 运行：cd api && python -m benchmarks.bench_wire_format [--scale 50] [--runs 7]
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+
+from app import compression
+from app.columnar import decode_rows
+from app.main import app
+from app.responses import RESPONSE_CACHE
+from benchmarks.synthetic import DAYS, START, generate
+
+# node 端：读入各格式的响应体，计时 解压 + JSON.parse + 解码，输出 {文件: {ms, bytes}}
+NODE_SCRIPT = r'''
+const fs = require('fs');
+const zlib = require('zlib');
+const [dir, runs] = [process.argv[1], Number(process.argv[2])];  // node -e 时 argv[1] 起为参数
+function decodeTable(table, strings) {
+  const rows = [];
+  for (let i = 0; i < table.n; i++) rows.push({});
+  for (const column of table.columns) {
+    const key = column[0];
+    if (column[1] === 's') {
+      const data = column[2];
+      for (let i = 0; i < table.n; i++) rows[i][key] = data[i] === null ? null : strings[data[i]];
+    } else if (column[1] === 'l') {
+      const children = decodeTable(column[2].table, strings);
+      let offset = 0;
+      for (let i = 0; i < table.n; i++) {
+        rows[i][key] = children.slice(offset, offset + column[2].counts[i]);
+        offset += column[2].counts[i];
+      }
+    } else {
+      const data = column[2];
+      for (let i = 0; i < table.n; i++) rows[i][key] = data[i];
+    }
+  }
+  return rows;
+}
+const inflate = { identity: (b) => b, gzip: zlib.gunzipSync, br: zlib.brotliDecompressSync };
+const params = { [zlib.constants.BROTLI_PARAM_QUALITY]: __QUALITY__ };
+const out = {};
+for (const file of fs.readdirSync(dir).filter((f) => f.endsWith('.identity'))) {
+  const [name, format] = file.split('.');
+  for (const encoding of Object.keys(inflate)) {
+    const path = `${dir}/${name}.${format}.${encoding}`;
+    // Python 未安装 brotli 时由 node 压缩
+    const body = fs.existsSync(path) ? fs.readFileSync(path)
+      : encoding === 'br' ? zlib.brotliCompressSync(fs.readFileSync(`${dir}/${file}`), { params }) : null;
+    if (body === null) continue;
+    const times = [];
+    for (let r = 0; r < runs; r++) {
+      const t0 = process.hrtime.bigint();
+      const result = JSON.parse(inflate[encoding](body).toString('utf8'));
+      if (format === 'columnar') decodeTable(result.data.table, result.data.strings);
+      times.push(Number(process.hrtime.bigint() - t0) / 1e6);
+    }
+    times.sort((a, b) => a - b);
+    out[`${name}.${format}.${encoding}`] = { ms: times[Math.floor(times.length / 2)], bytes: body.length };
+  }
+}
+console.log(JSON.stringify(out));
+'''
+
+
+def _timed(fn, runs: int):
+    times = []
+    result = None
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return result, statistics.median(times)
+
+
+def fetch(client: TestClient, url: str, runs: int):
+    """清空响应缓存后请求，返回 (未压缩响应体, 服务端耗时中位数 ms)"""
+    def once():
+        RESPONSE_CACHE.clear()
+        response = client.get(url, headers={'Accept-Encoding': 'identity'})
+        assert response.status_code == 200 and response.json()['code'] == 0, response.text[:200]
+        return response.content
+    return _timed(once, runs)
+
+
+def python_decode(body: bytes, fmt: str):
+    data = json.loads(body)['data']
+    return decode_rows(data) if fmt == 'columnar' else data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scale', type=int, default=50)
+    parser.add_argument('--runs', type=int, default=7)
+    args = parser.parse_args()
+
+    ids = generate(args.scale)
+    start = f'{START} 00:00:00'
+    end = f'{START.fromordinal(START.toordinal() + DAYS)} 00:00:00'
+    client = TestClient(app)
+    cases = [
+        ('vehicles', f'/api/gantt/vehicles?start={start}&end={end}&emptyVehicles=omit'),
+        ('containers', '/api/orders/containers?x=1'),
+    ]
+    print(f"数据：{len(ids['vehicles'])} 辆车 / {len(ids['trips'])} 个行程 / {len(ids['containers'])} 个容器，"
+          f"br 来源：{'brotli' if compression.brotli else 'node zlib' if shutil.which('node') else '无'}")
+
+    node = shutil.which('node')
+    encodings = ['identity', 'gzip'] + (['br'] if compression.brotli or node else [])
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, url in cases:
+            bodies = {}
+            for fmt in ('json', 'columnar'):
+                body, server_ms = fetch(client, f'{url}&format={fmt}', args.runs)
+                bodies[fmt] = body
+                row = {'name': name, 'format': fmt, 'server_ms': server_ms, 'bytes': {}, 'compress_ms': {}}
+                for encoding in encodings:
+                    if encoding == 'identity':
+                        payload, ms = body, 0.0
+                    elif encoding == 'br' and compression.brotli is None:
+                        continue  # 体积由 node 计算
+                    else:
+                        payload, ms = _timed(lambda: compression.compress(body, encoding), args.runs)
+                    row['bytes'][encoding] = len(payload)
+                    row['compress_ms'][encoding] = ms
+                    with open(os.path.join(tmp, f'{name}.{fmt}.{encoding}'), 'wb') as f:
+                        f.write(payload)
+                _, row['python_decode_ms'] = _timed(lambda: python_decode(body, fmt), args.runs)
+                rows.append(row)
+            # 两种格式解码结果必须一致
+            assert python_decode(bodies['columnar'], 'columnar') == python_decode(bodies['json'], 'json')
+
+        # 中间件实际协商结果
+        response = client.get(f'{cases[0][1]}&format=columnar', headers={'Accept-Encoding': 'gzip, br'})
+        print(f"中间件协商：Content-Encoding={response.headers.get('content-encoding')}")
+
+        node_times = {}
+        if node:
+            script = NODE_SCRIPT.replace('__QUALITY__', str(compression.BROTLI_QUALITY))
+            result = subprocess.run([node, '-e', script, tmp, str(args.runs)],
+                                    capture_output=True, text=True)
+            if result.returncode:
+                raise RuntimeError(result.stderr)
+            node_times = json.loads(result.stdout)
+
+    print(f"{'接口':<11}{'格式':<10}{'服务端ms':>9}" + ''.join(f'{e + " 字节":>16}' for e in encodings)
+          + f"{'gzip压缩ms':>11}" + ''.join(f'{"解码ms(" + e + ")":>15}' for e in encodings)
+          + f"{'py解码ms':>10}")
+    for row in rows:
+        sizes, times = [], []
+        for encoding in encodings:
+            file = f"{row['name']}.{row['format']}.{encoding}"
+            size = row['bytes'].get(encoding) or node_times.get(file, {}).get('bytes')
+            sizes.append(f'{size:>16,}' if size else f'{"-":>16}')
+            times.append(f'{node_times[file]["ms"]:>15.1f}' if file in node_times else f'{"-":>15}')
+        print(f"{row['name']:<11}{row['format']:<10}{row['server_ms']:>9.1f}" + ''.join(sizes)
+              + f"{row['compress_ms'].get('gzip', 0):>11.1f}" + ''.join(times) + f"{row['python_decode_ms']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
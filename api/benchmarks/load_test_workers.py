@@ -0,0 +1,175 @@
+# 多 worker 负载测试：同一份共享 SQLite 数据，分别以 1/2/4 个 uvicorn worker 启动，
+# 并发请求 /api/gantt/vehicles（可混入一定比例的拖拽写请求和只读的拖拽预览请求），对比吞吐和延迟
+# 运行：cd api && python -m benchmarks.load_test_workers [--workers 1 2 4] [--write-ratio 0.05] [--preview-ratio 0.05]
+# 吞吐随 worker 数的提升受限于机器核数（os.cpu_count()），压测客户端本身也会占用 CPU
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+VEHICLES = 100
+TRIPS_PER_VEHICLE = 40
+BASE = datetime(2025, 3, 1, 6, 0, 0)
+FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def populate(db_path: str) -> list:
+    """在共享存储中生成测试数据，返回行程 ID 列表（供写请求使用）"""
+    os.environ['BSB_STORAGE'] = 'shared'
+    os.environ['BSB_SQLITE_PATH'] = db_path
+    from app import database
+
+    rng = random.Random(1)
+    trip_ids = []
+    database.STORAGE.begin()
+    for v in range(VEHICLES):
+        vehicle_id = f'BPM{v:04d}'
+        database.add_vehicle({'id': vehicle_id, 'plateNumber': f'P{v:04d}', 'driverId': f'D{v:04d}'})
+        for t in range(TRIPS_PER_VEHICLE):
+            start = BASE + timedelta(hours=6 * t, minutes=rng.randrange(60))
+            trip = database.add_trip({
+                'id': str(uuid.uuid4()),
+                'vehicleId': vehicle_id,
+                'driverId': f'D{v:04d}',
+                'startTime': start,
+                'endTime': start + timedelta(hours=4),
+                'fullLoad': rng.choice(['Y', 'N']),
+            })
+            trip_ids.append(trip.id)
+            database.add_task({
+                'id': str(uuid.uuid4()),
+                'tripId': trip.id,
+                'containerNo': f'C{v:04d}{t:03d}',
+                'taskType': 'Client',
+                'planStart': start,
+                'planEnd': start + timedelta(hours=1),
+                'startAddress': '悉尼港码头',
+                'endAddress': '墨尔本仓库',
+                'status': 'pending',
+            })
+    database.STORAGE.commit()
+    database.STORAGE.close()
+    return trip_ids
+
+
+def wait_ready(port: int, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError('服务启动超时')
+
+
+def client(port: int, deadline: float, write_ratio: float, preview_ratio: float, trip_ids: list, seed: int,
+           latencies: list, errors: list):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    while time.monotonic() < deadline:
+        roll = rng.random()
+        if roll < write_ratio + preview_ratio:
+            new_start = BASE + timedelta(hours=rng.randrange(240))
+            body = json.dumps({
+                'tripId': rng.choice(trip_ids),
+                'newStart': new_start.isoformat(),
+                'newEnd': (new_start + timedelta(hours=4)).isoformat(),
+            })
+            # 预览是只读的 POST，不进入写事务
+            path = '/api/gantt/drag/time' if roll < write_ratio else '/api/gantt/drag/preview'
+            method, headers = 'POST', {'Content-Type': 'application/json'}
+        else:
+            # 每次换一个时间窗口，避免只测到响应缓存命中
+            start = BASE + timedelta(days=2, minutes=rng.randrange(24 * 60))
+            path = '/api/gantt/vehicles?start={}&end={}'.format(
+                quote(start.strftime(FORMAT)), quote((start + timedelta(days=1)).strftime(FORMAT))
+            )
+            method, body, headers = 'GET', None, {}
+        t0 = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(repr(e))
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - t0)
+    conn.close()
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run(workers: int, db_path: str, port: int, args, trip_ids: list):
+    env = dict(os.environ, BSB_STORAGE='shared', BSB_SQLITE_PATH=db_path)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning', '--no-access-log'],
+        env=env,
+    )
+    try:
+        wait_ready(port)
+        time.sleep(1)  # 等待所有 worker 完成加载
+
+        latencies: list = []
+        errors: list = []
+        deadline = time.monotonic() + args.duration
+        threads = [
+            threading.Thread(target=client, args=(port, deadline, args.write_ratio, args.preview_ratio, trip_ids, i, latencies, errors))
+            for i in range(args.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f'{workers} worker(s): {len(latencies) / args.duration:8.1f} req/s  '
+          f'p50 {percentile(latencies, 0.5) * 1000:7.1f} ms  '
+          f'p95 {percentile(latencies, 0.95) * 1000:7.1f} ms  '
+          f'p99 {percentile(latencies, 0.99) * 1000:7.1f} ms  '
+          f'errors {len(errors)}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.05)
+    parser.add_argument('--preview-ratio', type=float, default=0.05)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bsb.db')
+        trip_ids = populate(db_path)
+        print(f'{VEHICLES} vehicles, {len(trip_ids)} trips, cpu_count={os.cpu_count()}, '
+              f'concurrency={args.concurrency}, write_ratio={args.write_ratio}, preview_ratio={args.preview_ratio}')
+        for workers in args.workers:
+            run(workers, db_path, args.port, args, trip_ids)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+# 基准测试套件：用合成数据逐级放大到 1x / 10x / 100x，通过 TestClient 测各接口的延迟分位数
+#
+# 覆盖车辆时间窗口查询、容器搜索、TodoBar 三个接口、拖拽修改和 plan-to-task。
+# 每个用例先预热，再执行到 --iterations 次或 --seconds 秒为止（取先到者，至少 5 次）。
+# 每次请求前清空响应缓存和压缩缓存，测的是实际生成响应的耗时（与加缓存前的基线可比）。
+# 运行：cd api && python -m benchmarks.suite [--scales 1 10 100] [--json result.json]
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from fastapi.testclient import TestClient
+
+from app import database
+from app.compression import COMPRESSED_CACHE
+from app.main import app
+from app.responses import RESPONSE_CACHE
+from benchmarks import synthetic
+
+FORMAT = '%Y-%m-%d %H:%M:%S'
+DAY = datetime.combine(synthetic.START, datetime.min.time())
+
+
+def _check(response):
+    assert response.status_code == 200, response.text[:200]
+    code = response.json()['code']
+    assert code == 0, response.text[:200]
+
+
+def _vehicles(days: int) -> Callable:
+    def case(client: TestClient, ids: Dict[str, List[str]], rng: random.Random):
+        start = DAY + timedelta(days=rng.randrange(synthetic.DAYS - days + 1))
+        _check(client.get('/api/gantt/vehicles', params={
+            'start': start.strftime(FORMAT), 'end': (start + timedelta(days=days)).strftime(FORMAT),
+        }))
+    return case
+
+
+def container_search(client, ids, rng):
+    # 容器号片段（倒排索引）+ 码头过滤，分页 50 条
+    keyword = rng.choice(ids['containers'])[-4:]
+    _check(client.get('/api/orders/containers', params={
+        'search': keyword, 'terminal': rng.choice(synthetic.TERMINALS), 'pageSize': 50,
+    }))
+
+
+def _todo(path: str) -> Callable:
+    def case(client, ids, rng):
+        day = synthetic.START + timedelta(days=rng.randrange(synthetic.DAYS))
+        _check(client.post(path, json={'query_date': day.isoformat()}))
+    return case
+
+
+def _trip(ids, rng) -> dict:
+    # 直接读存储，不计入接口耗时
+    return database.get_trip(rng.choice(ids['trips']))
+
+
+def drag_time(client, ids, rng):
+    trip = _trip(ids, rng)
+    shift = timedelta(minutes=rng.choice([-15, 15]))
+    _check(client.post('/api/gantt/drag/time', json={
+        'tripId': trip['id'],
+        'newStart': (trip['startTime'] + shift).isoformat(),
+        'newEnd': (trip['endTime'] + shift).isoformat(),
+    }))
+
+
+def drag_pm(client, ids, rng):
+    trip = _trip(ids, rng)
+    _check(client.post('/api/gantt/drag/pm', json={
+        'tripId': trip['id'],
+        'newPmId': rng.choice(ids['vehicles']),
+        'newStartTime': trip['startTime'].isoformat(),
+    }))
+
+
+def plan_to_task(client, ids, rng):
+    _check(client.post('/api/orders/plan-to-task', json={
+        'containerNo': rng.choice(ids['containers']),
+        'taskType': rng.choice(synthetic.TASK_TYPES),
+    }))
+
+
+CASES = {
+    'vehicles (1 day)': _vehicles(1),
+    'vehicles (7 days)': _vehicles(7),
+    'container search': container_search,
+    'todo last pickup': _todo('/api/orders/get_last_pickup_ctns'),
+    'todo last dehire': _todo('/api/orders/get_last_dehire_ctns'),
+    'todo today deliver': _todo('/api/orders/get_today_deliver_ctns'),
+    'drag time': drag_time,
+    'drag pm': drag_pm,
+    'plan-to-task': plan_to_task,
+}
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def _clear_caches():
+    RESPONSE_CACHE.clear()
+    COMPRESSED_CACHE.clear()
+
+
+def run_case(client, ids, case: Callable, iterations: int, seconds: float, seed: int) -> Dict[str, float]:
+    rng = random.Random(seed)
+    for _ in range(3):
+        case(client, ids, rng)
+    samples = []
+    deadline = time.perf_counter() + seconds
+    while len(samples) < iterations and (len(samples) < 5 or time.perf_counter() < deadline):
+        _clear_caches()
+        began = time.perf_counter()
+        case(client, ids, rng)
+        samples.append((time.perf_counter() - began) * 1000)
+    samples.sort()
+    return {
+        'n': len(samples),
+        'p50': _percentile(samples, 0.50),
+        'p95': _percentile(samples, 0.95),
+        'p99': _percentile(samples, 0.99),
+        'max': samples[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='接口延迟基准（合成数据 1x / 10x / 100x）')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--iterations', type=int, default=200, help='每个用例最多执行次数')
+    parser.add_argument('--seconds', type=float, default=5.0, help='每个用例最长执行时间')
+    parser.add_argument('--json', help='结果另存为 JSON 文件')
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    ids = {'vehicles': [], 'trips': [], 'containers': []}
+    generated = 0
+    results = {}
+    for scale in sorted(args.scales):
+        # 在上一级数据的基础上补足到当前规模
+        began = time.perf_counter()
+        for key, values in synthetic.generate(scale - generated, offset=generated).items():
+            ids[key].extend(values)
+        generated = scale
+        print(f"\n== {scale}x: {len(ids['vehicles'])} vehicles, {len(ids['trips'])} trips, "
+              f"{len(ids['containers'])} containers (generated in {time.perf_counter() - began:.1f}s)")
+        print(f"{'case':<20} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        results[f'{scale}x'] = {}
+        for name, case in CASES.items():
+            stats = run_case(client, ids, case, args.iterations, args.seconds, seed=scale)
+            results[f'{scale}x'][name] = stats
+            print(f"{name:<20} {stats['n']:>5} {stats['p50']:>9.2f} {stats['p95']:>9.2f} "
+                  f"{stats['p99']:>9.2f} {stats['max']:>9.2f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
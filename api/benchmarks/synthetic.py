@@ -0,0 +1,142 @@
+# 合成数据生成：车队（车辆、每天若干行程、每个行程 2 个任务）和带截止日期分布的容器
+#
+# 按倍数生成：1x = 10 辆车、每车每天 4 个行程、7 天、200 个容器，其余规模线性放大。
+# 多次调用时 offset 递增即可在已有数据上继续扩充（ID 不重复），便于逐级测 1x / 10x / 100x。
+# 运行：cd api && python -m benchmarks.synthetic --scale 10
+import argparse
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+from app import database
+from app.models import Container
+
+VEHICLES = 10
+TRIPS_PER_DAY = 4
+DAYS = 7
+CONTAINERS = 200
+START = date(2025, 11, 3)
+
+TERMINALS = ['悉尼港', '墨尔本港', '布里斯班港', '弗里曼特尔港']
+STATUSES = ['新订单', 'Client', '已提柜', '已还柜']
+CTN_TYPES = ['20GP', '40GP', '40HQ']
+TASK_TYPES = ['Client', 'Yard(F)', 'Yard(E)', 'Empty Park']
+ADDRESSES = ['悉尼港码头', '墨尔本仓库', '布里斯班堆场', '帕拉马塔仓库', '空柜场A']
+FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _fmt(value: datetime) -> str:
+    return value.strftime(FORMAT)
+
+
+def make_container(ctn: str, rng: random.Random, start: date = START, days: int = DAYS) -> Dict[str, str]:
+    """一个容器记录：ETA 落在时间范围内，免费期 1~5 天，还柜期再加 3~14 天，约 60% 有送货要求日期"""
+    eta = datetime.combine(start, datetime.min.time()) + timedelta(
+        days=rng.randrange(-3, days), hours=rng.randrange(24)
+    )
+    first_free = eta + timedelta(days=1)
+    last_free = (first_free + timedelta(days=rng.choice([1, 2, 3, 3, 4, 5]))).replace(hour=23, minute=59, second=59)
+    last_dention = last_free + timedelta(days=rng.randrange(3, 15))
+    deliver = last_free - timedelta(days=rng.randrange(0, 3)) if rng.random() < 0.6 else None
+    # 约一半已安排提柜，其中少数晚于 Last Free
+    plan_pickup = last_free - timedelta(days=rng.choice([0, 1, 2, -1])) if rng.random() < 0.5 else None
+    return {
+        'CTN NUMBER': ctn,
+        'Logitics Status': rng.choice(STATUSES),
+        'FULL CLIENT Name': f'客户{rng.randrange(100):02d}',
+        'FULL Deliver Address': rng.choice(ADDRESSES),
+        'Deliver Type': rng.choice(['Full', 'Empty']),
+        'Door Positon': f'{rng.choice("ABCD")}{rng.randrange(1, 10)}',
+        'FULL Vessel Name': f'货轮{rng.randrange(30):02d}',
+        'CTN Type': rng.choice(CTN_TYPES),
+        'CTN Weight': str(rng.randrange(8000, 28000, 500)),
+        'REMARK': rng.choice(['', '', '紧急', '冷藏']),
+        'Freight Forwarders': f'物流公司{rng.randrange(20):02d}',
+        'Terminal': rng.choice(TERMINALS),
+        'ETA': _fmt(eta),
+        'ETD': _fmt(eta + timedelta(days=rng.randrange(2, 8))),
+        'First Free': _fmt(first_free.replace(hour=0)),
+        'Last Free': _fmt(last_free),
+        'Last Dention': _fmt(last_dention),
+        'Discharge Time': _fmt(eta + timedelta(hours=2)),
+        'Gateout Time': '',
+        'EDO PIN': f'PIN{rng.randrange(10 ** 6):06d}',
+        'Shipping Line': f'航运公司{rng.choice("ABCDE")}',
+        'Empty Park': f'空柜场{rng.choice("ABC")}',
+        'Pick Up Date': '',
+        'Deliver Date': '',
+        'Pick Empty Date': '',
+        'Dehire Date': '',
+        'Plan Pick Up Date': _fmt(plan_pickup) if plan_pickup else '',
+        'Plan Deliver Date': _fmt(deliver) if deliver and rng.random() < 0.5 else '',
+        'Plan Pick Empty Date': '',
+        'Plan Dehire Date': '',
+        'Request Deliver Date': _fmt(deliver.replace(hour=9, minute=0, second=0)) if deliver else '',
+    }
+
+
+def generate(scale: int = 1, offset: int = 0, seed: int = 0, start: date = START, days: int = DAYS) -> Dict[str, List[str]]:
+    """写入 scale 倍的数据（编号从 offset 倍开始），返回新生成的车辆、行程、容器 ID"""
+    rng = random.Random(seed * 1000003 + offset)
+    containers = [
+        Container.model_validate(make_container(f'SYN{i:07d}', rng, start, days))
+        for i in range(offset * CONTAINERS, (offset + scale) * CONTAINERS)
+    ]
+    database.upsert_containers(containers)
+    ctns = [container.ctnNumber for container in containers]
+
+    vehicle_ids, trip_ids = [], []
+    day_start = datetime.combine(start, datetime.min.time())
+    for v in range(offset * VEHICLES, (offset + scale) * VEHICLES):
+        vehicle_id = f'SPM{v:05d}'
+        driver_id = f'SD{v:05d}' if rng.random() < 0.9 else None
+        database.add_vehicle({'id': vehicle_id, 'plateNumber': f'SP{v:05d}', 'driverId': driver_id})
+        vehicle_ids.append(vehicle_id)
+        for day in range(days):
+            # 06:00 开始，每个行程 1.5~3 小时，之间留 0~60 分钟空档
+            cursor = day_start + timedelta(days=day, hours=6, minutes=rng.randrange(0, 60, 5))
+            for _ in range(TRIPS_PER_DAY):
+                end = cursor + timedelta(minutes=rng.randrange(90, 181, 15))
+                trip = database.add_trip({
+                    'id': str(uuid.uuid4()),
+                    'vehicleId': vehicle_id,
+                    'driverId': driver_id,
+                    'startTime': cursor,
+                    'endTime': end,
+                    'fullLoad': 'Y' if rng.random() < 0.7 else 'N',
+                })
+                trip_ids.append(trip.id)
+                middle = cursor + (end - cursor) / 2
+                for plan_start, plan_end in ((cursor, middle), (middle, end)):
+                    database.add_task({
+                        'id': str(uuid.uuid4()),
+                        'tripId': trip.id,
+                        'containerNo': rng.choice(ctns),
+                        'taskType': rng.choice(TASK_TYPES),
+                        'planStart': plan_start,
+                        'planEnd': plan_end,
+                        'startAddress': rng.choice(ADDRESSES),
+                        'endAddress': rng.choice(ADDRESSES),
+                        'status': 'pending',
+                    })
+                cursor = end + timedelta(minutes=rng.randrange(0, 61, 15))
+    return {'vehicles': vehicle_ids, 'trips': trip_ids, 'containers': ctns}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成车队和容器数据')
+    parser.add_argument('--scale', type=int, default=1, help='数据规模倍数（1x = 10 辆车、200 个容器、7 天）')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    began = time.perf_counter()
+    ids = generate(args.scale, seed=args.seed)
+    database.STORAGE.flush()
+    print(f"{len(ids['vehicles'])} vehicles, {len(ids['trips'])} trips, {len(ids['trips']) * 2} tasks, "
+          f"{len(ids['containers'])} containers in {time.perf_counter() - began:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,17 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import database
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    """每个测试从示例数据开始（默认内存存储）"""
+    database.init_sample_data()
+    return TestClient(app)
+
+
+@pytest.fixture
+def sample_trip(client):
+    return next(iter(database.DB['trips'].values()))
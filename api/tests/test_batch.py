@@ -0,0 +1,74 @@
+from app import batch, database
+
+
+def _batch(client, *operations):
+    response = client.post('/api/gantt/batch', json={'operations': list(operations)})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_update_trip_with_timezone_aware_time(client, sample_trip):
+    body = _batch(client, {
+        'kind': 'trip', 'op': 'update', 'id': sample_trip['id'],
+        'fields': {'endTime': '2099-01-01T10:00:00+08:00'},
+    })
+    assert body['code'] == 0, body
+    stored = database.get_trip(sample_trip['id'])
+    assert stored['endTime'].tzinfo is None
+    assert stored['endTime'].isoformat() == '2099-01-01T10:00:00'
+
+
+def test_update_trip_with_timezone_aware_time_before_start(client, sample_trip):
+    body = _batch(client, {
+        'kind': 'trip', 'op': 'update', 'id': sample_trip['id'],
+        'fields': {'endTime': '2000-01-01T10:00:00+08:00'},
+    })
+    assert body['code'] == 40002
+    assert body['data']['errors'] == [{'index': 0, 'message': '开始时间必须早于结束时间'}]
+
+
+def test_create_trip_with_mixed_timezones(client):
+    body = _batch(client, {
+        'kind': 'trip', 'op': 'create',
+        'fields': {'vehicleId': 'PM002', 'startTime': '2099-01-01T08:00:00',
+                   'endTime': '2099-01-01T10:00:00+08:00'},
+    })
+    assert body['code'] == 0, body
+    trip = database.get_trip(body['data']['results'][0]['id'])
+    assert trip['endTime'].tzinfo is None
+
+
+def _overlapping_trips(vehicle_id='PM002'):
+    return [
+        {'kind': 'trip', 'op': 'create', 'id': 'BT1',
+         'fields': {'vehicleId': vehicle_id, 'startTime': '2099-02-01T08:00:00', 'endTime': '2099-02-01T12:00:00'}},
+        {'kind': 'trip', 'op': 'create', 'id': 'BT2',
+         'fields': {'vehicleId': vehicle_id, 'startTime': '2099-02-01T10:00:00', 'endTime': '2099-02-01T14:00:00'}},
+    ]
+
+
+def test_flag_mode_writes_and_reports_each_overlap_once(client):
+    body = _batch(client, *_overlapping_trips())
+    assert body['code'] == 0, body
+    assert database.get_trip('BT1') is not None and database.get_trip('BT2') is not None
+    conflicts = body['data']['conflicts']
+    assert len(conflicts) == 1
+    assert {conflicts[0]['tripId'], conflicts[0]['otherTripId']} == {'BT1', 'BT2'}
+    assert conflicts[0]['type'] == 'vehicle'
+
+
+def test_reject_mode_rejects_whole_batch(client, monkeypatch):
+    monkeypatch.setattr(batch, 'CONFLICT_MODE', 'reject')
+    body = _batch(client, *_overlapping_trips())
+    assert body['code'] == 40002
+    assert body['data']['errors'] == [{'index': 1, 'message': '行程时间冲突: BT1'}]
+    assert database.get_trip('BT1') is None and database.get_trip('BT2') is None
+
+
+def test_reject_mode_allows_non_overlapping_trips(client, monkeypatch):
+    monkeypatch.setattr(batch, 'CONFLICT_MODE', 'reject')
+    operations = _overlapping_trips()
+    operations[1]['fields'].update(startTime='2099-02-01T12:00:00', endTime='2099-02-01T14:00:00')
+    body = _batch(client, *operations)
+    assert body['code'] == 0, body
+    assert body['data']['conflicts'] == []
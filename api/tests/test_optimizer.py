@@ -0,0 +1,42 @@
+from datetime import date, datetime
+
+from app import database, optimizer
+from app.models import Container
+
+DAY = date(2099, 3, 10)
+
+
+def _container(ctn: str, **dates) -> Container:
+    record = {alias: '' for alias in (f.alias for f in Container.model_fields.values())}
+    record.update({'CTN NUMBER': ctn, **dates})
+    return Container.model_validate(record)
+
+
+def _deadlines(solver) -> dict:
+    return {job.ctn: job.deadline for job in solver.jobs}
+
+
+def test_deadline_follows_task_type(client):
+    database.upsert_containers([_container(
+        'OPT001', **{'Last Free': '2099-03-01', 'Request Deliver Date': '2099-03-10',
+                     'Last Dention': '2099-03-20'}
+    )])
+    expected = {
+        'Yard(F)': datetime(2099, 3, 2),
+        'Client': datetime(2099, 3, 11),
+        'Empty Park': datetime(2099, 3, 21),
+        'Yard(E)': None,
+    }
+    for task_type, deadline in expected.items():
+        solver = optimizer.prepare(DAY, ['OPT001'], task_type=task_type)
+        assert _deadlines(solver) == {'OPT001': deadline}, task_type
+
+
+def test_default_containers_use_task_type_field(client):
+    database.upsert_containers([
+        _container('OPT002', **{'Request Deliver Date': '2099-03-10'}),
+        _container('OPT003', **{'Last Free': '2099-03-10'}),
+    ])
+    assert list(_deadlines(optimizer.prepare(DAY, task_type='Client'))) == ['OPT002']
+    assert list(_deadlines(optimizer.prepare(DAY, task_type='Yard(F)'))) == ['OPT003']
+    assert optimizer.prepare(DAY, task_type='Yard(E)').jobs == []
@@ -0,0 +1,32 @@
+import sqlite3
+
+import pytest
+
+from app.storage import SQLiteStorage, StorageError
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / 'bsb.db'))
+    storage.RETRY_DELAY = 0.001
+    yield storage
+    storage.close()
+
+
+def test_sync_waits_for_commit(storage):
+    storage.save('vehicle', {'id': 'V1'})
+    storage.save_meta('plateNumber', ['A'])
+    storage.sync()
+    assert storage.committed == storage.submitted == 2
+    assert [v['id'] for v in storage.load()['vehicles']] == ['V1']
+
+
+def test_sync_raises_when_batch_fails(storage):
+    conn = sqlite3.connect(storage.path)
+    conn.execute('DROP TABLE vehicles')
+    conn.close()
+    storage.save('vehicle', {'id': 'V1'})
+    with pytest.raises(StorageError):
+        storage.sync()
+    with pytest.raises(StorageError):
+        storage.save('vehicle', {'id': 'V1'})
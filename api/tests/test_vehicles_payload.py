@@ -0,0 +1,93 @@
+# /api/gantt/vehicles 的直接序列化输出必须与原模型路径（ApiResponse + jsonable_encoder）逐字节一致
+from datetime import datetime
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app import database
+from app.columnar import decode_rows
+from app.models import ApiResponse
+
+START = datetime(2099, 5, 1)
+END = datetime(2099, 5, 2)
+QUERY = {'start': '2099-05-01 00:00:00', 'end': '2099-05-02 00:00:00'}
+
+
+@pytest.fixture
+def fleet(client):
+    # 有司机、带微秒的行程，任务箱重为空
+    database.add_vehicle({'id': 'GV1', 'plateNumber': '粤B-0001', 'driverId': 'GD1'})
+    trip = database.add_trip({
+        'id': 'GT1', 'vehicleId': 'GV1', 'driverId': 'GD1',
+        'startTime': datetime(2099, 5, 1, 8, 0, 0, 250000), 'endTime': datetime(2099, 5, 1, 12, 30, 0, 123456),
+        'fullLoad': 'N',
+    })
+    database.add_task({
+        'id': 'GK1', 'tripId': trip.id, 'containerNo': 'GCTN1', 'taskType': 'Client',
+        'planStart': datetime(2099, 5, 1, 8, 0, 0, 250000), 'planEnd': datetime(2099, 5, 1, 9, 0),
+        'startAddress': '悉尼港码头', 'endAddress': '客户仓库', 'status': 'pending',
+        'containerWeight': None, 'containerType': '40HC',
+    })
+    # 没有司机、跨越查询窗口起点、没有任务的行程
+    database.add_vehicle({'id': 'GV2', 'plateNumber': 'P-0002', 'driverId': None})
+    database.add_trip({
+        'id': 'GT2', 'vehicleId': 'GV2', 'driverId': None,
+        'startTime': datetime(2099, 4, 30, 22, 0), 'endTime': datetime(2099, 5, 1, 2, 0), 'fullLoad': 'Y',
+    })
+    # 窗口内没有行程的车辆
+    database.add_vehicle({'id': 'GV3', 'plateNumber': 'P-0003', 'driverId': 'GD3'})
+
+
+def _model_path() -> bytes:
+    vehicles = database.get_vehicles_by_time_range(START, END)
+    response = ApiResponse(code=0, message="ok", data=[vehicle.dict() for vehicle in vehicles])
+    return JSONResponse(content=jsonable_encoder(response)).body
+
+
+def test_matches_model_path_byte_for_byte(client, fleet):
+    response = client.get('/api/gantt/vehicles', params=QUERY)
+    assert response.status_code == 200
+    assert response.content == _model_path()
+
+
+def test_golden_output(client, fleet):
+    data = client.get('/api/gantt/vehicles', params=QUERY).json()['data']
+    by_id = {vehicle['id']: vehicle for vehicle in data}
+    assert by_id['GV1'] == {
+        'id': 'GV1', 'plateNumber': '粤B-0001', 'driverId': 'GD1',
+        'trips': [{
+            'id': 'GT1', 'vehicleId': 'GV1', 'driverId': 'GD1',
+            'startTime': '2099-05-01T08:00:00.250000', 'endTime': '2099-05-01T12:30:00.123456',
+            'fullLoad': 'N',
+            'tasks': [{
+                'id': 'GK1', 'tripId': 'GT1', 'containerNo': 'GCTN1', 'taskType': 'Client',
+                'planStart': '2099-05-01T08:00:00.250000', 'planEnd': '2099-05-01T09:00:00',
+                'startAddress': '悉尼港码头', 'endAddress': '客户仓库', 'status': 'pending',
+                'driverId': None, 'vehiclePmId': None, 'vehicleTailId': None,
+                'containerWeight': None, 'containerType': '40HC',
+            }],
+        }],
+    }
+    assert by_id['GV2'] == {
+        'id': 'GV2', 'plateNumber': 'P-0002', 'driverId': None,
+        'trips': [{
+            'id': 'GT2', 'vehicleId': 'GV2', 'driverId': None,
+            'startTime': '2099-04-30T22:00:00', 'endTime': '2099-05-01T02:00:00',
+            'fullLoad': 'Y', 'tasks': [],
+        }],
+    }
+    assert by_id['GV3'] == {'id': 'GV3', 'plateNumber': 'P-0003', 'driverId': 'GD3', 'trips': []}
+    # 字段顺序也是输出格式的一部分
+    task = by_id['GV1']['trips'][0]['tasks'][0]
+    assert list(task) == ['id', 'tripId', 'containerNo', 'taskType', 'planStart', 'planEnd', 'startAddress',
+                          'endAddress', 'status', 'driverId', 'vehiclePmId', 'vehicleTailId',
+                          'containerWeight', 'containerType']
+    # 原始文本不转义中文
+    assert '粤B-0001'.encode() in client.get('/api/gantt/vehicles', params=QUERY).content
+
+
+def test_columnar_decodes_to_json_output(client, fleet):
+    plain = client.get('/api/gantt/vehicles', params=QUERY).json()['data']
+    columnar = client.get('/api/gantt/vehicles', params={**QUERY, 'format': 'columnar'}).json()['data']
+    assert decode_rows(columnar) == plain
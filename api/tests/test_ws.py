@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from app.routers import ws
+
+SUBSCRIBE = {'type': 'subscribe', 'start': '2020-01-01 00:00:00', 'end': '2100-01-01 00:00:00'}
+
+
+class _ClosedSocket:
+    async def send_text(self, text: str):
+        raise WebSocketDisconnect(1006)
+
+
+class _Subscriber:
+    def __init__(self):
+        self.wakeup = asyncio.Event()
+        self.wakeup.set()
+
+    def take(self):
+        return {'type': 'reset', 'revision': 0}
+
+
+def test_push_loop_ends_quietly_when_client_is_gone():
+    async def run():
+        task = asyncio.create_task(ws._push_loop(_ClosedSocket(), asyncio.Lock(), _Subscriber()))
+        await asyncio.wait_for(task, timeout=1)
+        return task
+
+    task = asyncio.run(run())
+    assert task.done() and task.exception() is None
+
+
+def test_subscribe_and_push(client, sample_trip):
+    with client.websocket_connect('/ws/gantt') as websocket:
+        websocket.send_json(SUBSCRIBE)
+        assert websocket.receive_json()['type'] == 'subscribed'
+        response = client.post('/api/gantt/drag/time', json={
+            'tripId': sample_trip['id'],
+            'newStart': sample_trip['startTime'].isoformat(),
+            'newEnd': sample_trip['endTime'].isoformat(),
+        })
+        assert response.json()['code'] == 0
+        message = websocket.receive_json()
+        assert message['type'] == 'changes'
+        assert [trip['id'] for trip in message['trips']['upserted']] == [sample_trip['id']]
+
+
+@pytest.mark.parametrize('vehicle_ids', ['PM001', [1, 2], {'PM001': True}])
+def test_subscribe_rejects_invalid_vehicle_ids(client, vehicle_ids):
+    with client.websocket_connect('/ws/gantt') as websocket:
+        websocket.send_json({**SUBSCRIBE, 'vehicleIds': vehicle_ids})
+        assert websocket.receive_json() == {'type': 'error', 'message': 'vehicleIds 必须为字符串数组'}
+        websocket.send_json({**SUBSCRIBE, 'vehicleIds': ['PM001']})
+        assert websocket.receive_json()['type'] == 'subscribed'
@@ -13,6 +13,7 @@ import type {
   ApiResponse 
 } from '@/types';
 import { getCurrentTime, getDefaultTimeRange } from '@/utils/time';
+import { decodeColumnar, type ColumnarPayload } from '@/utils/columnar';
 
 export const useGanttStore = defineStore('gantt', () => {
   // 时间轴设置
@@ -87,12 +88,14 @@ export const useGanttStore = defineStore('gantt', () => {
         params.append('start', timelineStart.value);
         params.append('end', timelineEnd.value);
       }
+      // 整周/整月的车辆数据较大，使用列式格式传输
+      params.append('format', 'columnar');
       
       const response = await fetch(`/api/gantt/vehicles?${params}`);
-      const result: ApiResponse<Vehicle[]> = await response.json();
+      const result: ApiResponse<ColumnarPayload> = await response.json();
       
       if (result.code === 0) {
-        vehicles.value = result.data;
+        vehicles.value = decodeColumnar<Vehicle>(result.data);
       } else {
         console.error('Failed to fetch vehicles:', result.message);
       }
@@ -101,6 +104,52 @@ export const useGanttStore = defineStore('gantt', () => {
     }
   }
 
+  // 分页获取车辆（滚动时按需加载）：返回本页车辆、总行数和下一页游标
+  async function fetchVehiclePage({ cursor, rowStart, limit, emptyVehicles, range }: {
+    cursor?: string;
+    rowStart?: number;
+    limit: number;
+    emptyVehicles?: 'include' | 'omit' | 'ids';
+    range?: TimeRange;
+  }) {
+    const params = new URLSearchParams({
+      start: range ? range.start : timelineStart.value,
+      end: range ? range.end : timelineEnd.value,
+      limit: String(limit),
+    });
+    if (cursor) params.append('cursor', cursor);
+    if (rowStart) params.append('rowStart', String(rowStart));
+    if (emptyVehicles) params.append('emptyVehicles', emptyVehicles);
+
+    const response = await fetch(`/api/gantt/vehicles?${params}`);
+    const result: ApiResponse<Vehicle[]> = await response.json();
+
+    if (result.code !== 0) {
+      throw new Error(result.message);
+    }
+    return {
+      vehicles: result.data,
+      total: Number(response.headers.get('X-Total-Count') ?? result.data.length),
+      nextCursor: response.headers.get('X-Next-Cursor'),
+    };
+  }
+
+  // 缩略模式（周/月视图）：每辆车按小时或天汇总的利用率（%）和行程数
+  async function fetchVehicleSummary(bucket: 'hour' | 'day', range?: TimeRange) {
+    const params = new URLSearchParams({
+      start: range ? range.start : timelineStart.value,
+      end: range ? range.end : timelineEnd.value,
+      bucket,
+    });
+    const response = await fetch(`/api/gantt/vehicles/summary?${params}`);
+    const result: ApiResponse = await response.json();
+
+    if (result.code !== 0) {
+      throw new Error(result.message);
+    }
+    return result.data;
+  }
+
   // 更新车辆数据
   async function updateVehicleData(vehicleIds: string[], range?: TimeRange) {
     try {
@@ -327,6 +376,29 @@ export const useGanttStore = defineStore('gantt', () => {
     }
   }
 
+  // 拖拽预览（不写入）：返回拖拽后的行程、冲突和截止日期违规
+  async function previewDrag(payload: {
+    tripId: string;
+    newPmId?: string;
+    newStart: string;
+    newEnd?: string;
+  }) {
+    const response = await fetch('/api/gantt/drag/preview', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(payload)
+    });
+
+    const result: ApiResponse = await response.json();
+
+    if (result.code !== 0) {
+      throw new Error(result.message);
+    }
+    return result.data;
+  }
+
   // 持久化设置
   function persistSettings() {
     localStorage.setItem('gantt_settings', JSON.stringify(settings.value));
@@ -384,6 +456,8 @@ export const useGanttStore = defineStore('gantt', () => {
     timeToPx,
     pxToTime,
     fetchVehicleList,
+    fetchVehiclePage,
+    fetchVehicleSummary,
     updateVehicleData,
     addTrip,
     addTask,
@@ -391,6 +465,7 @@ export const useGanttStore = defineStore('gantt', () => {
     deleteTrip,
     dragChangePm,
     dragChangeTripTime,
+    previewDrag,
     persistSettings,
     loadSettings,
     showContextMenu,
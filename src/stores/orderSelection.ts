@@ -3,6 +3,7 @@
 import { defineStore } from 'pinia';
 import { ref } from 'vue';
 import type { Container } from '@/types';
+import { decodeColumnar } from '@/utils/columnar';
 
 export const useOrderSelectionStore = defineStore('orderSelection', () => {
   // 面板可见性
@@ -53,11 +54,13 @@ export const useOrderSelectionStore = defineStore('orderSelection', () => {
         params.append('terminal', filters.value.terminal);
       }
 
+      params.append('format', 'columnar');
+
       const response = await fetch(`/api/orders/containers?${params}`);
       const result = await response.json();
       
       if (result.code === 0) {
-        containers.value = result.data;
+        containers.value = decodeColumnar<Container>(result.data);
       } else {
         console.error('Failed to load containers:', result.message);
       }
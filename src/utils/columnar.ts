@@ -0,0 +1,51 @@
+// 列式字典编码响应（format=columnar）的解码，格式说明见 api/app/columnar.py
+
+type ColumnarColumn =
+  | [string, 's', (number | null)[]]
+  | [string, 'v', unknown[]]
+  | [string, 'l', { counts: number[]; table: ColumnarTable }];
+
+export interface ColumnarTable {
+  n: number;
+  columns: ColumnarColumn[];
+}
+
+export interface ColumnarPayload {
+  strings: string[];
+  table: ColumnarTable;
+}
+
+function decodeTable(table: ColumnarTable, strings: string[]): Record<string, unknown>[] {
+  const rows: Record<string, unknown>[] = [];
+  for (let i = 0; i < table.n; i++) rows.push({});
+
+  for (const column of table.columns) {
+    const key = column[0];
+    if (column[1] === 's') {
+      const data = column[2];
+      for (let i = 0; i < table.n; i++) {
+        const index = data[i];
+        rows[i][key] = index === null ? null : strings[index];
+      }
+    } else if (column[1] === 'l') {
+      const { counts, table: child } = column[2];
+      const children = decodeTable(child, strings);
+      let offset = 0;
+      for (let i = 0; i < table.n; i++) {
+        rows[i][key] = children.slice(offset, offset + counts[i]);
+        offset += counts[i];
+      }
+    } else {
+      const data = column[2];
+      for (let i = 0; i < table.n; i++) rows[i][key] = data[i];
+    }
+  }
+  return rows;
+}
+
+/**
+ * 还原为普通格式的行数组
+ */
+export function decodeColumnar<T>(payload: ColumnarPayload): T[] {
+  return decodeTable(payload.table, payload.strings) as T[];
+}